@@ -50,6 +50,9 @@ class ModularAlertBase(ModularAction):
         self.setup_util = Setup_Util(self.splunk_uri, self.session_key, self._logger)
 
         self.rest_helper = TARestHelper(self._logger)
+        # proxy uri resolved once per alert
+        self._proxy_uri = None
+        self._proxy_uri_resolved = False
 
     def log_error(self, msg):
         self.message(msg, "failure", level=logging.ERROR)
@@ -117,8 +120,10 @@ class ModularAlertBase(ModularAction):
         return self.setup_util.get_proxy_settings()
 
     def _get_proxy_uri(self):
-        proxy = self.get_proxy()
-        return util.get_proxy_uri(proxy)
+        if not self._proxy_uri_resolved:
+            self._proxy_uri = util.get_proxy_uri(self.get_proxy())
+            self._proxy_uri_resolved = True
+        return self._proxy_uri
 
     def send_http_request(
         self,
@@ -146,6 +151,22 @@ class ModularAlertBase(ModularAction):
             proxy_uri=self._get_proxy_uri() if use_proxy else None,
         )
 
+    def send_http_requests(self, http_requests, use_proxy=True):
+        """
+        Send http requests concurrently, see TARestHelper.send_http_requests.
+        """
+        return self.rest_helper.send_http_requests(
+            http_requests, proxy_uri=self._get_proxy_uri() if use_proxy else None
+        )
+
+    def send_http_requests_async(self, http_requests, use_proxy=True):
+        """
+        Async version of send_http_requests.
+        """
+        return self.rest_helper.send_http_requests_async(
+            http_requests, proxy_uri=self._get_proxy_uri() if use_proxy else None
+        )
+
     def build_http_connection(self, config, timeout=120, disable_ssl_validation=False):
         raise NotImplementedError(
             "Replace the usage of this function to send_http_request function of same class "
@@ -14,6 +14,7 @@
 # limitations under the License.
 #
 
+import copy
 import hashlib
 import json
 
@@ -65,3 +66,29 @@ class UCCException(Exception):
     """
 
     pass
+
+
+class ReadOnlyDict(dict):
+    """
+    Dict which cannot be modified, so one object can be shared by all
+    its readers instead of being copied for each. ``copy`` and
+    ``copy.deepcopy`` return modifiable dicts.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"'{type(self).__name__}' object is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def copy(self):
+        return dict(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
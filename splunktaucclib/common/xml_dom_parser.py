@@ -14,10 +14,14 @@
 # limitations under the License.
 #
 
+import io
 import re
 
 from defusedxml import ElementTree as et
 
+ATOM_NS = "http://www.w3.org/2005/Atom"
+SPLUNK_NS = "http://dev.splunk.com/ns/rest"
+
 
 def parse_conf_xml_dom(xml_content):
     """
@@ -28,36 +32,83 @@ def parse_conf_xml_dom(xml_content):
     m = re.search(r'xmlns:s="([^"]+)"', xml_content)
     sub_ns = m.group(1)
     entry_path = "./{%s}entry" % ns
-    stanza_path = "./{%s}title" % ns
-    key_path = f"./{{{ns}}}content/{{{sub_ns}}}dict/{{{sub_ns}}}key"
-    meta_path = f"./{{{sub_ns}}}dict/{{{sub_ns}}}key"
-    list_path = f"./{{{sub_ns}}}list/{{{sub_ns}}}item"
 
     xml_conf = et.fromstring(xml_content)
     stanza_objs = []
     for entry in xml_conf.iterfind(entry_path):
-        for stanza in entry.iterfind(stanza_path):
-            stanza_obj = {"name": stanza.text, "stanza": stanza.text}
-            break
-        else:
+        stanza_obj = _parse_entry(entry, ns, sub_ns)
+        if stanza_obj is not None:
+            stanza_objs.append(stanza_obj)
+    return stanza_objs
+
+
+def iter_conf_xml_dom(source):
+    """
+    Streaming variant of ``parse_conf_xml_dom``. Stanzas are yielded one
+    by one while parsing, and parsed elements are cleared, so neither
+    the whole XML text nor the whole tree is kept in memory.
+
+    @source: file-like object of XML DOM from splunkd, e.g. ``raw`` of
+        a streamed requests response. str or bytes is accepted as well.
+    """
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    namespaces = {}
+    root = None
+    entry_tag = None
+    for event, item in et.iterparse(source, events=("start-ns", "start", "end")):
+        if event == "start-ns":
+            prefix, uri = item
+            namespaces.setdefault(prefix, uri)
+            continue
+        if event == "start":
+            if root is None:
+                root = item
+                entry_tag = "{%s}entry" % namespaces.get("", ATOM_NS)
+            continue
+        if item.tag != entry_tag:
             continue
+        stanza_obj = _parse_entry(
+            item,
+            namespaces.get("", ATOM_NS),
+            namespaces.get("s", SPLUNK_NS),
+        )
+        # drop parsed entries from the tree
+        root.clear()
+        if stanza_obj is not None:
+            yield stanza_obj
 
-        for key in entry.iterfind(key_path):
-            if key.get("name") == "eai:acl":
-                meta = {}
-                for k in key.iterfind(meta_path):
-                    meta[k.get("name")] = k.text
-                stanza_obj[key.get("name")] = meta
-            elif key.get("name") != "eai:attributes":
-                name = key.get("name")
-                if name.startswith("eai:"):
-                    name = name[4:]
-                list_vals = [k.text for k in key.iterfind(list_path)]
-                if list_vals:
-                    stanza_obj[name] = list_vals
-                else:
-                    stanza_obj[name] = key.text
-                    if key.text == "None":
-                        stanza_obj[name] = None
-        stanza_objs.append(stanza_obj)
-    return stanza_objs
+
+def _parse_entry(entry, ns, sub_ns):
+    stanza_path = "./{%s}title" % ns
+    key_path = f"./{{{ns}}}content/{{{sub_ns}}}dict/{{{sub_ns}}}key"
+    meta_path = f"./{{{sub_ns}}}dict/{{{sub_ns}}}key"
+    list_path = f"./{{{sub_ns}}}list/{{{sub_ns}}}item"
+
+    for stanza in entry.iterfind(stanza_path):
+        stanza_obj = {"name": stanza.text, "stanza": stanza.text}
+        break
+    else:
+        return None
+
+    for key in entry.iterfind(key_path):
+        if key.get("name") == "eai:acl":
+            meta = {}
+            for k in key.iterfind(meta_path):
+                meta[k.get("name")] = k.text
+            stanza_obj[key.get("name")] = meta
+        elif key.get("name") != "eai:attributes":
+            name = key.get("name")
+            if name.startswith("eai:"):
+                name = name[4:]
+            list_vals = [k.text for k in key.iterfind(list_path)]
+            if list_vals:
+                stanza_obj[name] = list_vals
+            else:
+                stanza_obj[name] = key.text
+                if key.text == "None":
+                    stanza_obj[name] = None
+    return stanza_obj
@@ -20,10 +20,17 @@ The load/save action is based on specified schema.
 """
 
 
+import itertools
 import json
 import logging
+import random
+import threading
 import time
 import traceback
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
 from urllib.parse import quote
 
 from solnlib.utils import is_true
@@ -72,6 +79,35 @@ class ConfigException(UCCException):
     pass
 
 
+class TransientConfigException(ConfigException):
+    """Exception for UCC Config failure which may succeed on retry,
+    e.g. no response, server busy or deadline exceeded.
+    """
+
+    pass
+
+
+# field type -> (load, dump)
+_CODECS = {
+    "bool": (
+        lambda fval: True if is_true(fval) else False,
+        lambda fval: str(fval).lower(),
+    ),
+    "int": (int, lambda fval: fval),
+    "json": (json.loads, json.dumps),
+}
+
+# Compiled converters of a field.
+# load/dump: None for unsupported field type
+Codec = namedtuple("Codec", ["field_type", "load", "dump"])
+
+# Result of updating an item.
+# status: one of Config.UPDATED, Config.SKIPPED and Config.FAILED
+# code: HTTP status code, None if no request sent or no response
+# message: error message if failed
+UpdateResult = namedtuple("UpdateResult", ["status", "code", "message"])
+
+
 class Config:
     """UCC Config Module"""
 
@@ -95,6 +131,31 @@ class Config:
         "_encryption_formatter": "",
     }
 
+    # Retry attempts and backoff (in seconds) for loading an endpoint
+    LOAD_RETRIES = 4
+    LOAD_BACKOFF_BASE = 0.5
+    LOAD_BACKOFF_CAP = 8.0
+
+    # Max endpoints loaded concurrently
+    LOAD_MAX_WORKERS = 8
+
+    # Max workers of the executor shared by all configs
+    MAX_WORKERS = 8
+
+    # Timeout for a single REST request
+    REQUEST_TIMEOUT = 300
+
+    # HTTP status which is worth retrying
+    TRANSIENT_STATUS = (429, 500, 502, 503, 504)
+
+    # Status of updated items
+    UPDATED = "updated"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+    _shared_executor = None
+    _shared_executor_lock = threading.Lock()
+
     def __init__(self, splunkd_uri, session_key, schema, user="nobody", app="-"):
         """
         :param splunkd_uri: the root uri of Splunk server,
@@ -108,54 +169,167 @@ class Config:
         self.splunkd_uri = splunkd_uri.strip("/")
         self.session_key = session_key
         self.user, self.app = user, app
+        # last known content of items, (endpoint_id, item_name) -> content
+        self._last_state = {}
         self._parse_schema(schema)
 
-    def load(self):
+    @classmethod
+    def shared_executor(cls):
+        """Get the long-lived executor shared by all configs.
+        :return: ThreadPoolExecutor
+        """
+        with cls._shared_executor_lock:
+            if Config._shared_executor is None:
+                Config._shared_executor = ThreadPoolExecutor(
+                    max_workers=cls.MAX_WORKERS, thread_name_prefix="config"
+                )
+            return Config._shared_executor
+
+    def _run_concurrently(self, func, args_list, max_workers, deadline=None):
+        """Call func with each args on the shared executor, with at most
+        max_workers calls submitted at a time.
+        :return: generator of (args, future) in completion order.
+        :raise FutureTimeoutError: when deadline exceeded.
+        """
+        executor = self.shared_executor()
+        args_list = iter(args_list)
+        running = {}
+
+        def submit(count):
+            for args in itertools.islice(args_list, count):
+                running[executor.submit(func, *args)] = args
+
+        try:
+            submit(max_workers)
+            while running:
+                done, _ = wait(
+                    running,
+                    timeout=self._remaining(deadline),
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    raise FutureTimeoutError()
+                submit(len(done))
+                for future in done:
+                    yield running.pop(future), future
+        finally:
+            # not started calls are cancelled on failure
+            for future in running:
+                future.cancel()
+
+    def load(self, timeout=None):
         """Load Configurations in UCC according to the schema
         It will raise exception if failing to load any endpoint,
         because it make no sense with not complete configuration info.
+        Endpoints are loaded concurrently. Transient failures are retried
+        with exponential backoff and jitter.
+        :param timeout: overall deadline in seconds for loading all
+            endpoints. No deadline if it is None.
+        :raise TransientConfigException: on transient failure after all
+            retries or when deadline exceeded.
+        :raise ConfigException: on permanent failure, e.g. 4xx response.
         """
         log('"load" method in', level=logging.DEBUG)
 
         ret = {
             meta_field: getattr(self, meta_field) for meta_field in Config.META_FIELDS
         }
+        if not self._endpoints:
+            return ret
 
-        for ep_id, ep in self._endpoints.items():
-            data = {"output_mode": "json", "--cred--": "1"}
-
-            retries = 4
-            waiting_time = [1, 2, 2]
-            for retry in range(retries):
-                resp = splunkd_request(
-                    splunkd_uri=self.make_uri(ep_id),
-                    session_key=self.session_key,
-                    data=data,
-                    retry=3,
-                )
-
-                if resp is None or resp.status_code != 200:
-                    msg = f'Fail to load endpoint "{ep_id}" - {code_to_msg(resp)}'
-                    log(msg, level=logging.ERROR, need_tb=True)
-                    raise ConfigException(msg)
-
-                try:
-                    ret[ep_id] = self._parse_content(ep_id, resp.text)
-                except ConfigException as exc:
-                    log(exc, level=logging.WARNING, need_tb=True)
-                    if retry < retries - 1:
-                        time.sleep(waiting_time[retry])
-                else:
-                    break
-            else:
-                log(exc, level=logging.ERROR, need_tb=True)
-                raise exc
+        deadline = time.time() + timeout if timeout is not None else None
+        loaded = set()
+        try:
+            for (ep_id, _), future in self._run_concurrently(
+                self._load_endpoint,
+                [(ep_id, deadline) for ep_id in self._endpoints],
+                Config.LOAD_MAX_WORKERS,
+                deadline,
+            ):
+                ret[ep_id] = future.result()
+                loaded.add(ep_id)
+        except FutureTimeoutError:
+            pending = sorted(set(self._endpoints) - loaded)
+            msg = f"Timed out to load endpoints - {pending}"
+            log(msg, level=logging.ERROR)
+            raise TransientConfigException(msg)
 
         log('"load" method out', level=logging.DEBUG)
         return ret
 
+    def _load_endpoint(self, endpoint_id, deadline=None):
+        """Load an endpoint, retry on transient failures.
+        :param endpoint_id: endpoint id in schema
+        :param deadline: absolute time to give up, or None
+        :return: parsed content of the endpoint
+        """
+        for attempt in range(Config.LOAD_RETRIES):
+            try:
+                return self._load_endpoint_once(endpoint_id, deadline)
+            except TransientConfigException as exc:
+                delay = self._backoff(attempt)
+                remaining = self._remaining(deadline)
+                if attempt == Config.LOAD_RETRIES - 1 or (
+                    remaining is not None and delay >= remaining
+                ):
+                    log(exc, level=logging.ERROR, need_tb=True)
+                    raise
+                log(exc, msgx=f"retry in {delay:.2f}s", level=logging.WARNING)
+                time.sleep(delay)
+
+    def _load_endpoint_once(self, endpoint_id, deadline=None):
+        remaining = self._remaining(deadline)
+        resp = splunkd_request(
+            splunkd_uri=self.make_uri(endpoint_id),
+            session_key=self.session_key,
+            data={"output_mode": "json", "--cred--": "1"},
+            timeout=(
+                Config.REQUEST_TIMEOUT
+                if remaining is None
+                else min(Config.REQUEST_TIMEOUT, max(remaining, 0.1))
+            ),
+            retry=1,
+        )
+
+        if resp is None:
+            raise TransientConfigException(
+                f'Fail to load endpoint "{endpoint_id}" - no response'
+            )
+        if resp.status_code != 200:
+            msg = f'Fail to load endpoint "{endpoint_id}" - {code_to_msg(resp)}'
+            if resp.status_code in Config.TRANSIENT_STATUS:
+                raise TransientConfigException(msg)
+            log(msg, level=logging.ERROR, need_tb=True)
+            raise ConfigException(msg)
+
+        try:
+            return self._parse_content(endpoint_id, resp.text)
+        except ConfigException as exc:
+            # content may be incomplete while splunkd is busy
+            raise TransientConfigException(str(exc))
+
+    @staticmethod
+    def _backoff(attempt):
+        """Exponential backoff with full jitter."""
+        return random.uniform(
+            0, min(Config.LOAD_BACKOFF_CAP, Config.LOAD_BACKOFF_BASE * 2**attempt)
+        )
+
+    @staticmethod
+    def _remaining(deadline):
+        if deadline is None:
+            return None
+        return max(deadline - time.time(), 0)
+
     def update_items(
-        self, endpoint_id, item_names, field_names, data, raise_if_failed=False
+        self,
+        endpoint_id,
+        item_names,
+        field_names,
+        data,
+        raise_if_failed=False,
+        max_workers=1,
+        skip_unchanged=False,
     ):
         """Update items in specified endpoint with given fields in data
         :param endpoint_id: endpoint id in schema, the key name in schema
@@ -173,10 +347,53 @@ class Config:
                 }
             }
         :raise_if_failed: raise an exception if updating failed.
+        :param max_workers: max items updated concurrently.
+        :param skip_unchanged: skip items whose dumped content is the same
+            as the last known content, see ``update_items_status``.
         :return: a list of endpoint ids, which are failed to be updated.
             If raise_if_failed is True, it will exist with an exception
             on any updating failed.
         """
+        results = self.update_items_status(
+            endpoint_id,
+            item_names,
+            field_names,
+            data,
+            raise_if_failed=raise_if_failed,
+            max_workers=max_workers,
+            skip_unchanged=skip_unchanged,
+        )
+        return [
+            item_name
+            for item_name, result in results.items()
+            if result.status == Config.FAILED
+        ]
+
+    def update_items_status(
+        self,
+        endpoint_id,
+        item_names,
+        field_names,
+        data,
+        raise_if_failed=False,
+        max_workers=8,
+        skip_unchanged=True,
+    ):
+        """Update items like ``update_items``, concurrently with a bounded
+        pool, and return the status of each item.
+        :param endpoint_id: endpoint id in schema, the key name in schema
+        :param item_names: a list of item name
+        :param field_names: a list of updated fields
+        :param data: a dict of content for items, see ``update_items``
+        :param raise_if_failed: raise an exception on the first failure,
+            items not started yet are cancelled.
+        :param max_workers: max items updated concurrently.
+        :param skip_unchanged: skip items whose dumped content is the same
+            as the last known content, which is the content loaded by
+            ``load`` or last updated successfully.
+        :return: a dict of item name to ``UpdateResult``. Items with
+            nothing to update are not included.
+        """
         log(
             '"update_items" method in',
             msgx="endpoint_id=%s, item_names=%s, field_names=%s"
@@ -190,7 +407,7 @@ class Config:
             ep_id=endpoint_id
         )
 
-        item_names_failed = []
+        tasks = []
         for item_name in item_names:
             item_data = data.get(item_name, {})
             post_data = {
@@ -200,26 +417,69 @@ class Config:
                 for field_name in field_names
                 if field_name in item_data
             }
-            if not post_data:
-                continue
-            item_uri = self.make_uri(endpoint_id, item_name=item_name)
-
-            resp = splunkd_request(
-                splunkd_uri=item_uri,
-                session_key=self.session_key,
-                data=post_data,
-                method="POST",
-                retry=3,
-            )
-            if resp is None or resp.status_code not in (200, 201):
-                msg = f'Fail to update item "{item_name}" in endpoint "{endpoint_id}" - {code_to_msg(resp)}'
-                log(msg, level=logging.ERROR)
-                if raise_if_failed:
-                    raise ConfigException(msg)
-                item_names_failed.append(item_name)
+            if post_data:
+                tasks.append((item_name, post_data))
+
+        results = {}
+        if max_workers <= 1 or len(tasks) <= 1:
+            for item_name, post_data in tasks:
+                results[item_name] = self._update_item(
+                    endpoint_id, item_name, post_data, skip_unchanged
+                )
+                self._check_update_result(
+                    endpoint_id, item_name, results[item_name], raise_if_failed
+                )
+        else:
+            for (_, item_name, _, _), future in self._run_concurrently(
+                self._update_item,
+                [
+                    (endpoint_id, item_name, post_data, skip_unchanged)
+                    for item_name, post_data in tasks
+                ],
+                max_workers,
+            ):
+                results[item_name] = future.result()
+                self._check_update_result(
+                    endpoint_id, item_name, results[item_name], raise_if_failed
+                )
 
         log('"update_items" method out', level=logging.DEBUG)
-        return item_names_failed
+        return results
+
+    def _update_item(self, endpoint_id, item_name, post_data, skip_unchanged):
+        state_key = (endpoint_id, item_name)
+        if skip_unchanged:
+            last_state = self._last_state.get(state_key, {})
+            if all(
+                field_name in last_state and last_state[field_name] == value
+                for field_name, value in post_data.items()
+            ):
+                return UpdateResult(Config.SKIPPED, None, None)
+
+        resp = splunkd_request(
+            splunkd_uri=self.make_uri(endpoint_id, item_name=item_name),
+            session_key=self.session_key,
+            data=post_data,
+            method="POST",
+            retry=3,
+        )
+        if resp is None or resp.status_code not in (200, 201):
+            reason = code_to_msg(resp) if resp is not None else "no response"
+            msg = f'Fail to update item "{item_name}" in endpoint "{endpoint_id}" - {reason}'
+            log(msg, level=logging.ERROR)
+            return UpdateResult(
+                Config.FAILED, resp.status_code if resp is not None else None, msg
+            )
+
+        self._last_state[state_key] = dict(
+            self._last_state.get(state_key, {}), **post_data
+        )
+        return UpdateResult(Config.UPDATED, resp.status_code, None)
+
+    @staticmethod
+    def _check_update_result(endpoint_id, item_name, result, raise_if_failed):
+        if raise_if_failed and result.status == Config.FAILED:
+            raise ConfigException(result.message)
 
     def make_uri(self, endpoint_id, item_name=None):
         """Make uri for REST endpoint in TA according to given schema
@@ -274,15 +534,26 @@ class Config:
             log(msg, level=logging.ERROR, need_tb=True)
             raise ConfigException(msg)
 
-        ret = {
-            name: {
-                key: self.load_value(endpoint_id, name, key, val)
-                for key, val in ent.items()
-                if not key.startswith("eai:")
+        for name, ent in ret.items():
+            self._last_state[(endpoint_id, name)] = {
+                key: val for key, val in ent.items() if not key.startswith("eai:")
             }
-            for name, ent in ret.items()
-        }
-        return ret
+
+        parsed = {}
+        for name, ent in ret.items():
+            codecs = self._item_codecs(endpoint_id, name)
+            item = {}
+            for key, val in ent.items():
+                if key.startswith("eai:"):
+                    continue
+                codec = codecs.get(key)
+                item[key] = (
+                    val
+                    if codec is None
+                    else self._load_with(codec, endpoint_id, name, key, val)
+                )
+            parsed[name] = item
+        return parsed
 
     def _parse_schema(self, ucc_config_schema):
         try:
@@ -320,31 +591,60 @@ class Config:
 
             self._endpoints[key] = val
 
+        self._compile_codecs()
+
+    def _compile_codecs(self):
+        """Compile value codecs of each endpoint from field types in schema,
+        endpoint_id -> item name or FIELD_PLACEHOLDER -> field -> Codec.
+        """
+        self._codecs = {}
+        for endpoint_id, endpoint in self._endpoints.items():
+            self._codecs[endpoint_id] = {
+                item_name: {
+                    fname: Codec(
+                        field_type,
+                        *_CODECS.get(field_type, (None, None)),
+                    )
+                    for fname, field_type in fields.items()
+                    if field_type != ""
+                }
+                for item_name, fields in endpoint.get("field_types", {}).items()
+            }
+
+    def _item_codecs(self, endpoint_id, item_name):
+        codecs = self._codecs[endpoint_id]
+        if item_name in codecs:
+            return codecs[item_name]
+        return codecs.get(Config.FIELD_PLACEHOLDER, {})
+
     def load_value(self, endpoint_id, item_name, fname, fval):
-        field_type = self._get_field_type(endpoint_id, item_name, fname)
-        if field_type == "":
+        codec = self._item_codecs(endpoint_id, item_name).get(fname)
+        if codec is None:
             return fval
+        return self._load_with(codec, endpoint_id, item_name, fname, fval)
 
+    def _load_with(self, codec, endpoint_id, item_name, fname, fval):
+        if codec.load is None:
+            self._raise_unsupported(codec, endpoint_id, item_name, fname)
         try:
-            field_type = field_type.lower()
-            if field_type == "bool":
-                return True if is_true(fval) else False
-            elif field_type == "int":
-                return int(fval)
-            elif field_type == "json":
-                try:
-                    return json.loads(fval)
-                except ValueError as err:
-                    if err.message.startswith("Extra data:"):
-                        return json.loads(self.try_fix_corrupted_json(fval, err))
-                    else:
-                        raise err
+            try:
+                return codec.load(fval)
+            except json.JSONDecodeError as err:
+                if not err.msg.startswith("Extra data"):
+                    raise
+                log(
+                    'Extra data of "json" value is discarded - '
+                    f"endpoint={endpoint_id}, item={item_name}, field={fname}",
+                    msgx=f"char={err.pos}",
+                    level=logging.WARNING,
+                )
+                return codec.load(self.try_fix_corrupted_json(fval, err))
         except Exception as exc:
             msg = (
                 'Fail to load value of "{type_name}" - '
                 "endpoint={endpoint}, item={item}, field={field}"
                 "".format(
-                    type_name=field_type,
+                    type_name=codec.field_type.lower(),
                     endpoint=endpoint_id,
                     item=item_name,
                     field=fname,
@@ -359,31 +659,26 @@ class Config:
         A bug was encountered that 'access_token_encrypted' or 'refresh_token'
         got corrupted when it was saved in the conf file
         """
-        # value_err.message is in this format:
-        #   Extra data: line 1 column 2720 - line 1 column 2941 (char 2719 - 2940)
-        # what we need is the first number in the parenthesis (2719 in the above example)
-        end_index = int(value_err.message.split("(char")[1].split("-")[0].strip())
-        return corrupted_json[0:end_index]
+        # value_err is a json.JSONDecodeError with message like
+        #   Extra data: line 1 column 2720 (char 2719)
+        # what we need is the position where the extra data starts
+        return corrupted_json[0 : value_err.pos]
 
     def dump_value(self, endpoint_id, item_name, fname, fval):
-        field_type = self._get_field_type(endpoint_id, item_name, fname)
-        if field_type == "":
+        codec = self._item_codecs(endpoint_id, item_name).get(fname)
+        if codec is None:
             return fval
+        if codec.dump is None:
+            self._raise_unsupported(codec, endpoint_id, item_name, fname)
 
         try:
-            field_type = field_type.lower()
-            if field_type == "bool":
-                return str(fval).lower()
-            elif field_type == "json":
-                return json.dumps(fval)
-            else:
-                return fval
+            return codec.dump(fval)
         except Exception as exc:
             msg = (
                 'Fail to dump value of "{type_name}" - '
                 "endpoint={endpoint}, item={item}, field={field}"
                 "".format(
-                    type_name=field_type,
+                    type_name=codec.field_type.lower(),
                     endpoint=endpoint_id,
                     item=item_name,
                     field=fname,
@@ -392,30 +687,20 @@ class Config:
             log(msg, msgx=str(exc), level=logging.ERROR, need_tb=True)
             raise ConfigException(msg)
 
-    def _get_field_type(self, endpoint_id, item_name, fname):
-        field_types = self._endpoints[endpoint_id].get("field_types", {})
-        if item_name in field_types:
-            fields = field_types[item_name]
-        elif Config.FIELD_PLACEHOLDER in field_types:
-            fields = field_types[Config.FIELD_PLACEHOLDER]
-        else:
-            fields = {}
-
-        field_type = fields.get(fname, "")
-        if field_type not in ("", "bool", "int", "json"):
-            msg = (
-                'Unsupported type "{type_name}" for value in schema - '
-                "endpoint={endpoint}, item={item}, field={field}"
-                "".format(
-                    type_name=field_type,
-                    endpoint=endpoint_id,
-                    item=item_name,
-                    field=fname,
-                )
+    @staticmethod
+    def _raise_unsupported(codec, endpoint_id, item_name, fname):
+        msg = (
+            'Unsupported type "{type_name}" for value in schema - '
+            "endpoint={endpoint}, item={item}, field={field}"
+            "".format(
+                type_name=codec.field_type,
+                endpoint=endpoint_id,
+                item=item_name,
+                field=fname,
             )
-            log(msg, level=logging.ERROR, need_tb=True)
-            raise ConfigException(msg)
-        return field_type
+        )
+        log(msg, level=logging.ERROR, need_tb=True)
+        raise ConfigException(msg)
 
     def get_endpoints(self):
         return self._endpoints
@@ -23,13 +23,25 @@ import urllib.parse
 
 from solnlib.splunk_rest_client import SplunkRestClient
 
-from .configuration import Configs, Configuration, GlobalConfigError, Inputs, Settings
-from .schema import GlobalConfigSchema
+from .configuration import (
+    Configs,
+    Configuration,
+    GlobalConfigError,
+    Inputs,
+    SaveStats,
+    Settings,
+)
+from .schema import GlobalConfigSchema, load_global_config_schema
+from .snapshot import GlobalConfigSnapshot, change_token
 
 __all__ = [
     "GlobalConfigError",
     "GlobalConfigSchema",
+    "GlobalConfigSnapshot",
+    "change_token",
+    "load_global_config_schema",
     "GlobalConfig",
+    "SaveStats",
     "Inputs",
     "Configs",
     "Settings",
@@ -37,7 +49,7 @@ __all__ = [
 
 
 class GlobalConfig:
-    def __init__(self, splunkd_uri, session_key, schema):
+    def __init__(self, splunkd_uri, session_key, schema, executor=None):
         """
         Global Config.
 
@@ -45,6 +57,8 @@ class GlobalConfig:
         :param session_key:
         :param schema:
         :type schema: GlobalConfigSchema
+        :param executor: ``concurrent.futures.Executor`` for saving.
+            The executor shared in process is used if it is None.
         """
         self._splunkd_uri = splunkd_uri
         self._session_key = session_key
@@ -58,10 +72,10 @@ class GlobalConfig:
             host=splunkd_info.hostname,
             port=splunkd_info.port,
         )
-        self._configuration = Configuration(self._client, self._schema)
-        self._inputs = Inputs(self._client, self._schema)
-        self._configs = Configs(self._client, self._schema)
-        self._settings = Settings(self._client, self._schema)
+        self._configuration = Configuration(self._client, self._schema, executor)
+        self._inputs = Inputs(self._client, self._schema, executor)
+        self._configs = Configs(self._client, self._schema, executor)
+        self._settings = Settings(self._client, self._schema, executor)
 
     @property
     def inputs(self):
@@ -76,5 +90,12 @@ class GlobalConfig:
         return self._settings
 
     # add support for batch save of configuration payload
-    def save(self, payload):
-        return self._configuration.save(payload)
+    def save(self, payload, timeout=None):
+        return self._configuration.save(payload, timeout=timeout)
+
+    def iter_save(self, payload, timeout=None):
+        return self._configuration.iter_save(payload, timeout=timeout)
+
+    @property
+    def save_stats(self):
+        return self._configuration.save_stats
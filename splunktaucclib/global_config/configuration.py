@@ -17,7 +17,11 @@
 
 import copy
 import json
-from multiprocessing.pool import ThreadPool
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import as_completed
 
 from splunklib.binding import HTTPError
 
@@ -26,6 +30,7 @@ from ..rest_handler.schema import RestSchema
 
 __all__ = [
     "GlobalConfigError",
+    "SaveStats",
     "Configuration",
     "Inputs",
     "Configs",
@@ -37,6 +42,30 @@ class GlobalConfigError(Exception):
     pass
 
 
+class SaveStats:
+    """
+    Statistics of the last save.
+    """
+
+    def __init__(self, total=0, failed=0, cancelled=0, running=0, elapsed=0.0):
+        self.total = total
+        self.failed = failed
+        # not started before the deadline
+        self.cancelled = cancelled
+        # started but not done at the deadline, they may still succeed
+        self.running = running
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self):
+        """
+        Saved stanzas per second.
+        """
+        if not self.elapsed:
+            return 0.0
+        return (self.total - self.cancelled - self.running) / self.elapsed
+
+
 class Configuration:
     """
     Splunk Configuration Handler.
@@ -46,15 +75,43 @@ class Configuration:
     ENTITY_NAME = "name"
     SETTINGS = "settings"
     NOT_FOUND = "[404]: Not Found"
+    # max workers of the executor shared by all configurations
+    MAX_WORKERS = 8
 
-    def __init__(self, splunkd_client, schema):
+    _shared_executor = None
+    _shared_executor_lock = threading.Lock()
+
+    def __init__(self, splunkd_client, schema, executor=None):
         """
 
         :param splunkd_client: SplunkRestClient
         :param schema:
+        :param executor: ``concurrent.futures.Executor`` for saving stanzas.
+            The executor shared in process is used if it is None.
         """
         self._client = splunkd_client
         self._schema = schema
+        self._executor = executor
+        self.save_stats = SaveStats()
+
+    @classmethod
+    def shared_executor(cls):
+        """
+        Get the long-lived executor shared by all configurations.
+
+        :return: ThreadPoolExecutor
+        """
+        with cls._shared_executor_lock:
+            if Configuration._shared_executor is None:
+                Configuration._shared_executor = ThreadPoolExecutor(
+                    max_workers=cls.MAX_WORKERS,
+                    thread_name_prefix="global_config",
+                )
+            return Configuration._shared_executor
+
+    @property
+    def executor(self):
+        return self._executor or self.shared_executor()
 
     def load(self, *args, **kwargs):
         """
@@ -70,19 +127,27 @@ class Configuration:
         """
         Save configuration with type_name and configuration
 
-        :param item:
+        :param item: (type_name, configuration) or
+            (type_name, configuration, existing) where existing is the
+            stored stanzas index returned by ``_load_existing``.
         :return: error while save the configuration
         """
-        return self._save_configuration(item[0], item[1])
+        return self._save_configuration(*item)
 
-    def save(self, payload):
+    def save(self, payload, timeout=None):
         """
         Save configuration. Return error while saving.
-        It includes creating and updating. That is, it will try to
-        update first, then create if NOT FOUND error occurs.
+        It includes creating and updating. The stored stanzas of each
+        endpoint are listed once, so that every configuration is routed
+        straight to create or update, and only changed fields are sent
+        while updating.
 
         :param payload: same format with return of ``load``.
-        :return:
+        :param timeout: overall deadline in seconds. Stanzas not saved
+            before it get ``GlobalConfigError``. Those not started are
+            cancelled, while those being saved are still running and may
+            succeed, see ``save_stats``.
+        :return: list of errors in the order of payload.
 
         Usage::
         >>> from splunktaucclib.global_config import GlobalConfig
@@ -102,22 +167,87 @@ class Configuration:
         >>> }
         >>> global_config.settings.save(payload)
         """
+        task_list = self._build_tasks(payload)
+        errors = [None] * len(task_list)
+        for index, error in self._save_tasks(task_list, timeout):
+            errors[index] = error
+        return errors
+
+    def iter_save(self, payload, timeout=None):
+        """
+        Save configuration and yield the result of each stanza as soon
+        as it completes. Closing the generator cancels stanzas which are
+        not started yet.
+
+        :param payload: same format with return of ``load``.
+        :param timeout: overall deadline in seconds.
+        :return: generator of (type_name, configuration name, error)
+
+        Usage::
+        >>> for type_name, name, error in global_config.configs.iter_save(
+        >>>     payload, timeout=30
+        >>> ):
+        >>>     if error:
+        >>>         break
+        """
+        task_list = self._build_tasks(payload)
+        for index, error in self._save_tasks(task_list, timeout):
+            type_name, configuration = task_list[index][:2]
+            yield type_name, configuration[self.ENTITY_NAME], error
+
+    def _build_tasks(self, payload):
         # expand the payload to task_list
         task_list = []
         for type_name, configurations in payload.items():
+            if not configurations:
+                continue
+            existing = self._load_existing(type_name)
             task_list.extend(
-                [(type_name, configuration) for configuration in configurations]
+                [
+                    (type_name, configuration, existing)
+                    for configuration in configurations
+                ]
             )
-        task_len = len(task_list)
-        # return empty error list if task list is empty
-        if not task_list:
-            return []
-        task_len = min(8, task_len)
-        pool = ThreadPool(processes=task_len)
-        errors = pool.map(self.save_stanza, task_list)
-        pool.close()
-        pool.join()
-        return errors
+        return task_list
+
+    def _save_tasks(self, task_list, timeout=None):
+        stats = SaveStats(total=len(task_list))
+        start = time.time()
+        futures = {
+            self.executor.submit(self.save_stanza, task): index
+            for index, task in enumerate(task_list)
+        }
+        try:
+            try:
+                for future in as_completed(futures, timeout=timeout):
+                    error = future.result()
+                    if error is not None:
+                        stats.failed += 1
+                    yield futures[future], error
+            except FutureTimeoutError:
+                for future, index in futures.items():
+                    if future.done():
+                        continue
+                    if future.cancel():
+                        stats.cancelled += 1
+                        state = "cancelled"
+                    else:
+                        stats.running += 1
+                        state = "still running"
+                    yield index, GlobalConfigError(
+                        "Timed out for saving configuration, {state}, "
+                        "configuration_type={configuration_type}, "
+                        "configuration_name={configuration_name}".format(
+                            state=state,
+                            configuration_type=task_list[index][0],
+                            configuration_name=task_list[index][1][self.ENTITY_NAME],
+                        )
+                    )
+        finally:
+            for future in futures:
+                future.cancel()
+            stats.elapsed = time.time() - start
+            self.save_stats = stats
 
     @property
     def internal_schema(self):
@@ -126,15 +256,20 @@ class Configuration:
 
         :return:
         """
-        return self._schema.inputs + self._schema.configs + self._schema.settings
+        return self._schema.internal_schema
 
-    def _save_configuration(self, type_name, configuration):
-        schema = self._search_configuration_schema(
+    def _save_configuration(self, type_name, configuration, existing=None):
+        schema_name = self._search_configuration_schema(
             type_name,
             configuration[self.ENTITY_NAME],
         )
         configuration = copy.copy(configuration)
-        self._dump_multiple_select(configuration, schema)
+        self._dump_multiple_select(
+            configuration, self._schema.multiple_select_delimiters(schema_name)
+        )
+
+        if existing is not None:
+            return self._upsert(type_name, configuration, existing)
 
         # update
         try:
@@ -158,6 +293,66 @@ class Configuration:
         else:
             return None
 
+    def _upsert(self, type_name, configuration, existing):
+        """
+        Create or update configuration according to the stored stanzas.
+
+        :param type_name:
+        :param configuration: dumped configuration
+        :param existing: dict of stored stanza name to its content
+        :return: error while saving the configuration
+        """
+        current = existing.get(configuration[self.ENTITY_NAME])
+        try:
+            if current is None:
+                self._create(type_name, configuration)
+                return None
+            changes = self._diff(configuration, current)
+            if changes:
+                changes[self.ENTITY_NAME] = configuration[self.ENTITY_NAME]
+                self._update(type_name, changes)
+        except Exception as exc:
+            return exc
+        return None
+
+    @classmethod
+    def _diff(cls, configuration, current):
+        """
+        Get fields in configuration which differ from the stored content.
+
+        :param configuration:
+        :param current: stored content of the stanza
+        :return: dict of changed fields, without entity name
+        """
+        changes = {}
+        for k, v in configuration.items():
+            if k == cls.ENTITY_NAME:
+                continue
+            if k in current and (current[k] == v or str(current[k]) == str(v)):
+                continue
+            changes[k] = v
+        return changes
+
+    def _load_existing(self, type_name):
+        """
+        Load the stored stanzas of the endpoint for given type.
+
+        :param type_name:
+        :return: dict of stanza name to its content, or None if the
+            endpoint can not be listed.
+        """
+        try:
+            entries = self._list_endpoint(type_name)
+        except Exception:
+            # fall back to update-then-create for each stanza
+            return None
+        existing = {}
+        for entry in entries:
+            content = entry["content"]
+            self._filter_fields(content)
+            existing[entry["name"]] = content
+        return existing
+
     def _create(self, type_name, configuration):
         self._save_endpoint(
             type_name,
@@ -179,7 +374,7 @@ class Configuration:
             if k in cls.FILTERS:
                 del entity[k]
 
-    def _load_endpoint(self, name, schema):
+    def _list_endpoint(self, name):
         query = {
             "output_mode": "json",
             "count": "0",
@@ -189,13 +384,14 @@ class Configuration:
             RestHandler.path_segment(self._endpoint_path(name)), **query
         )
         body = response.body.read()
-        cont = json.loads(body)
+        return json.loads(body)["entry"]
 
+    def _load_endpoint(self, name, delimiters):
         entities = []
-        for entry in cont["entry"]:
+        for entry in self._list_endpoint(name):
             entity = entry["content"]
             entity[self.ENTITY_NAME] = entry["name"]
-            self._load_multiple_select(entity, schema)
+            self._load_multiple_select(entity, delimiters)
             entities.append(entity)
         return entities
 
@@ -204,26 +400,26 @@ class Configuration:
         self._client.post(RestHandler.path_segment(endpoint, name=name), **content)
 
     @classmethod
-    def _load_multiple_select(cls, entity, schema):
-        for field in schema:
-            field_type = field.get("type")
-            value = entity.get(field["field"])
-            if field_type != "multipleSelect" or not value:
+    def _load_multiple_select(cls, entity, delimiters):
+        """
+        :param entity:
+        :param delimiters: list of (field name, delimiter) for
+            multipleSelect fields, see
+            ``GlobalConfigSchema.multiple_select_delimiters``
+        """
+        for field, delimiter in delimiters:
+            value = entity.get(field)
+            if not value or isinstance(value, list):
                 continue
-            delimiter = field["options"]["delimiter"]
-            entity[field["field"]] = value.split(delimiter)
+            entity[field] = value.split(delimiter)
 
     @classmethod
-    def _dump_multiple_select(cls, entity, schema):
-        for field in schema:
-            field_type = field.get("type")
-            value = entity.get(field["field"])
-            if field_type != "multipleSelect" or not value:
+    def _dump_multiple_select(cls, entity, delimiters):
+        for field, delimiter in delimiters:
+            value = entity.get(field)
+            if not value or not isinstance(value, list):
                 continue
-            if not isinstance(value, list):
-                continue
-            delimiter = field["options"]["delimiter"]
-            entity[field["field"]] = delimiter.join(value)
+            entity[field] = delimiter.join(value)
 
     def _endpoint_path(self, name):
         return "{admin_match}/{endpoint_name}".format(
@@ -232,12 +428,19 @@ class Configuration:
         )
 
     def _search_configuration_schema(self, type_name, configuration_name):
-        for item in self.internal_schema:
-            # add support for settings schema
-            if item["name"] == type_name or (
-                type_name == self.SETTINGS and item["name"] == configuration_name
-            ):
-                return item["entity"]
+        """
+        Search schema for configuration.
+
+        :return: name of the matched input, config or setting schema
+        """
+        if self._schema.entity(type_name) is not None:
+            return type_name
+        # add support for settings schema
+        if (
+            type_name == self.SETTINGS
+            and self._schema.entity(configuration_name) is not None
+        ):
+            return configuration_name
         else:
             raise GlobalConfigError(
                 "Schema Not Found for Configuration, "
@@ -250,16 +453,18 @@ class Configuration:
 
 
 class Inputs(Configuration):
-    def __init__(self, splunkd_client, schema):
-        super().__init__(splunkd_client, schema)
+    def __init__(self, splunkd_client, schema, executor=None):
+        super().__init__(splunkd_client, schema, executor=executor)
         self._splunkd_client = splunkd_client
         self._schema = schema
         self._references = None
 
-    def load(self, input_type=None):
+    def load(self, input_type=None, references=None):
         """
 
         :param input_type:
+        :param references: loaded configs for expanding referenced
+            entities, configs will be loaded if it is None.
         :return:
 
         Usage::
@@ -267,14 +472,21 @@ class Inputs(Configuration):
         >>> global_config = GlobalConfig()
         >>> inputs = global_config.inputs.load()
         """
+        if references is not None:
+            self._references = references
         # move configs read operation out of init method
         if not self._references:
             self._references = Configs(self._splunkd_client, self._schema).load()
+        references = {
+            config_type: {config["name"]: config for config in configs}
+            for config_type, configs in self._references.items()
+        }
         inputs = {}
         for input_item in self.internal_schema:
             if input_type is None or input_item["name"] == input_type:
                 input_entities = self._load_endpoint(
-                    input_item["name"], input_item["entity"]
+                    input_item["name"],
+                    self._schema.multiple_select_delimiters(input_item["name"]),
                 )
                 # filter unused fields in response
                 for input_entity in input_entities:
@@ -282,8 +494,9 @@ class Inputs(Configuration):
                 # expand referenced entity
                 self._reference(
                     input_entities,
-                    input_item,
-                    self._references,
+                    input_item["name"],
+                    self._schema.references(input_item["name"]),
+                    references,
                 )
                 inputs[input_item["name"]] = input_entities
         return inputs
@@ -293,25 +506,29 @@ class Inputs(Configuration):
         return self._schema.inputs
 
     @classmethod
-    def _reference(cls, input_entities, input_item, configs):
+    def _reference(cls, input_entities, input_type, reference_fields, configs):
+        """
+        :param input_entities:
+        :param input_type:
+        :param reference_fields: list of (field name, config type), see
+            ``GlobalConfigSchema.references``
+        :param configs: dict of config type to dict of config name to config
+        """
+        if not reference_fields:
+            return
         for input_entity in input_entities:
-            cls._input_reference(
-                input_item["name"], input_entity, input_item["entity"], configs
-            )
+            cls._input_reference(input_type, input_entity, reference_fields, configs)
 
     @classmethod
-    def _input_reference(cls, input_type, input_entity, input_schema, configs):
-        for field in input_schema:
-            options = field.get("options", {})
-            config_type = options.get("referenceName")
-            config_name = input_entity.get(field["field"])
-            if not config_type or not config_name:
+    def _input_reference(cls, input_type, input_entity, reference_fields, configs):
+        for field, config_type in reference_fields:
+            config_name = input_entity.get(field)
+            if not config_name:
                 continue
 
-            for config in configs.get(config_type, []):
-                if config["name"] == config_name:
-                    input_entity[field["field"]] = config
-                    break
+            config = configs.get(config_type, {}).get(config_name)
+            if config is not None:
+                input_entity[field] = config
             else:
                 raise GlobalConfigError(
                     "Config Not Found for Input, "
@@ -342,7 +559,10 @@ class Configs(Configuration):
         configs = {}
         for config in self.internal_schema:
             if config_type is None or config["name"] == config_type:
-                config_entities = self._load_endpoint(config["name"], config["entity"])
+                config_entities = self._load_endpoint(
+                    config["name"],
+                    self._schema.multiple_select_delimiters(config["name"]),
+                )
                 for config_entity in config_entities:
                     self._filter_fields(config_entity)
                 configs[config["name"]] = config_entities
@@ -370,9 +590,9 @@ class Settings(Configuration):
         settings = []
         for setting in self.internal_schema:
             setting_entity = self._load_endpoint(
-                "settings/%s" % setting["name"], setting["entity"]
+                "settings/%s" % setting["name"],
+                self._schema.multiple_select_delimiters(setting["name"]),
             )
-            self._load_multiple_select(setting_entity[0], setting["entity"])
             entity = setting_entity[0]
             self._filter_fields(entity)
             settings.append(entity)
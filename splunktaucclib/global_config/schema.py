@@ -15,10 +15,92 @@
 #
 
 
+import json
+import os
+import pickle
+import tempfile
+import threading
 import traceback
 
 from ..rest_handler.schema import RestSchema, RestSchemaError
 
+__all__ = [
+    "GlobalConfigSchema",
+    "load_global_config_schema",
+]
+
+# bump it when attributes of GlobalConfigSchema change
+COMPILED_VERSION = 1
+COMPILED_SUFFIX = ".pickle"
+# delimiter of multipleSelect fields without one in options
+DEFAULT_DELIMITER = ","
+
+_schema_cache = {}
+_schema_cache_lock = threading.Lock()
+
+
+def load_global_config_schema(path, compiled=False):
+    """
+    Load ``GlobalConfigSchema`` from globalConfig.json. The parsed schema
+    is cached in process and shared by all callers until the file changes.
+
+    :param path: path of globalConfig.json
+    :param compiled: if True, keep the parsed schema pickled next to the
+        JSON file (``<path>.pickle``), and load it instead of parsing the
+        JSON file while its modification time and size are unchanged.
+    :return: GlobalConfigSchema
+    """
+    stat = os.stat(path)
+    file_key = (stat.st_mtime_ns, stat.st_size)
+    with _schema_cache_lock:
+        cached = _schema_cache.get(path)
+    if cached and cached[0] == file_key:
+        return cached[1]
+
+    schema = _load_compiled(path, file_key) if compiled else None
+    if schema is None:
+        with open(path) as f:
+            schema = GlobalConfigSchema(json.load(f))
+        if compiled:
+            _dump_compiled(path, file_key, schema)
+
+    with _schema_cache_lock:
+        _schema_cache[path] = (file_key, schema)
+    return schema
+
+
+def _load_compiled(path, file_key):
+    try:
+        with open(path + COMPILED_SUFFIX, "rb") as f:
+            version, key, schema = pickle.load(f)
+    except Exception:
+        return None
+    if version != COMPILED_VERSION or tuple(key) != file_key:
+        return None
+    if not isinstance(schema, GlobalConfigSchema):
+        return None
+    return schema
+
+
+def _dump_compiled(path, file_key, schema):
+    dirname = os.path.dirname(path) or "."
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix=".globalConfig")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(
+                    (COMPILED_VERSION, file_key, schema),
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, path + COMPILED_SUFFIX)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+    except Exception:
+        # compiled schema is optional, e.g. app directory is read-only
+        pass
+
 
 class GlobalConfigSchema(RestSchema):
     def __init__(self, content, *args, **kwargs):
@@ -33,6 +115,12 @@ class GlobalConfigSchema(RestSchema):
         self._inputs = []
         self._configs = []
         self._settings = []
+        # indexes built once at parse time, see ``_build_index``
+        self._internal_schema = []
+        self._entities = {}
+        self._field_types = {}
+        self._multiple_selects = {}
+        self._references = {}
 
         try:
             self._parse()
@@ -65,11 +153,84 @@ class GlobalConfigSchema(RestSchema):
     def settings(self):
         return self._settings
 
+    @property
+    def internal_schema(self):
+        """
+        Schema items of inputs, configs and settings.
+        """
+        return self._internal_schema
+
+    def entity(self, name):
+        """
+        Get entity schema by name of input, config or setting.
+        Names are unique among inputs and configs as they
+        are used as REST endpoint names.
+
+        :param name:
+        :return: list of fields, None if not found.
+        """
+        return self._entities.get(name)
+
+    def fields_of_type(self, name, field_type):
+        """
+        Get fields of given type in entity.
+
+        :param name: name of input, config or setting
+        :param field_type: field type, e.g. multipleSelect
+        :return: list of fields
+        """
+        return self._field_types.get(name, {}).get(field_type, [])
+
+    def multiple_select_delimiters(self, name):
+        """
+        Get multipleSelect fields in entity.
+
+        :param name: name of input, config or setting
+        :return: list of (field name, delimiter)
+        """
+        return self._multiple_selects.get(name, [])
+
+    def references(self, name):
+        """
+        Get fields in entity which reference a config.
+
+        :param name: name of input, config or setting
+        :return: list of (field name, config type)
+        """
+        return self._references.get(name, [])
+
     def _parse(self):
         self._meta = self._content["meta"]
         pages = self._content["pages"]
         self._parse_configuration(pages.get("configuration"))
         self._parse_inputs(pages.get("inputs"))
+        self._build_index()
+
+    def _build_index(self):
+        self._internal_schema = self._inputs + self._configs + self._settings
+        for item in self._internal_schema:
+            name = item["name"]
+            if name in self._entities:
+                # keep the first one, as searching in internal schema does
+                continue
+            entity = item["entity"]
+            field_types = {}
+            multiple_selects = []
+            references = []
+            for field in entity:
+                field_type = field.get("type")
+                field_types.setdefault(field_type, []).append(field)
+                options = field.get("options") or {}
+                if field_type == "multipleSelect":
+                    multiple_selects.append(
+                        (field["field"], options.get("delimiter", DEFAULT_DELIMITER))
+                    )
+                if options.get("referenceName"):
+                    references.append((field["field"], options["referenceName"]))
+            self._entities[name] = entity
+            self._field_types[name] = field_types
+            self._multiple_selects[name] = multiple_selects
+            self._references[name] = references
 
     def _parse_configuration(self, configurations):
         if not configurations or "tabs" not in configurations:
@@ -0,0 +1,190 @@
+#
+# Copyright 2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Global Config Snapshot
+
+On-disk snapshot of resolved global configuration, so that modular
+inputs can skip loading configuration over REST until it changes.
+The content is encrypted at rest with a key derived from
+``splunk.secret``, as it includes clear credentials.
+"""
+
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+
+from solnlib import splunkenv
+
+try:
+    from cryptography.fernet import Fernet
+except ImportError:
+    # snapshot is disabled without cryptography
+    Fernet = None
+
+__all__ = [
+    "GlobalConfigSnapshot",
+    "change_token",
+]
+
+
+def change_token(app_dir, extra_paths=()):
+    """
+    Cheap token which changes when configuration of the app changes.
+    It is made of the paths, modification time and size of conf and
+    meta files of the app, no REST request is needed.
+
+    :param app_dir: root directory of the app
+    :param extra_paths: other files the configuration depends on,
+        e.g. globalConfig.json
+    :return: hex digest
+    """
+    paths = []
+    for sub_dir in ("default", "local", "metadata"):
+        conf_dir = os.path.join(app_dir, sub_dir)
+        try:
+            names = sorted(os.listdir(conf_dir))
+        except OSError:
+            continue
+        paths.extend(
+            os.path.join(conf_dir, name)
+            for name in names
+            if name.endswith((".conf", ".meta"))
+        )
+    paths.extend(extra_paths)
+
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+        digest.update(
+            "{path}:{mtime}:{size}\n".format(
+                path=path,
+                mtime=stat.st_mtime_ns if stat else "",
+                size=stat.st_size if stat else "",
+            ).encode("utf-8")
+        )
+    return digest.hexdigest()
+
+
+class GlobalConfigSnapshot:
+    """
+    Versioned and encrypted snapshot of resolved global configuration.
+
+    Usage::
+    >>> snapshot = GlobalConfigSnapshot(path, change_token(app_dir), key)
+    >>> content = snapshot.load()
+    >>> if content is None:
+    >>>     content = load_from_rest()
+    >>>     snapshot.save(content)
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, token, key):
+        """
+
+        :param path: snapshot file path
+        :param token: change token, the snapshot is stale if token differs
+        :param key: Fernet key, see ``make_key``
+        """
+        self._path = path
+        self._token = token
+        self._fernet = Fernet(key) if Fernet and key else None
+
+    @staticmethod
+    def make_key(app):
+        """
+        Make snapshot key for app from ``splunk.secret``.
+
+        :param app: app name
+        :return: Fernet key, None if it is not available.
+        """
+        if Fernet is None:
+            return None
+        try:
+            secret_path = splunkenv.make_splunkhome_path(
+                ["etc", "auth", "splunk.secret"]
+            )
+            with open(secret_path, "rb") as f:
+                secret = f.read().strip()
+        except Exception:
+            return None
+        if not secret:
+            return None
+        digest = hashlib.sha256(secret + b":" + app.encode("utf-8")).digest()
+        return base64.urlsafe_b64encode(digest)
+
+    @property
+    def enabled(self):
+        return self._fernet is not None
+
+    def load(self):
+        """
+        Load snapshot content.
+
+        :return: content, None if the snapshot is missing, stale or invalid.
+        """
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path) as f:
+                snapshot = json.load(f)
+            if (
+                snapshot.get("version") != self.VERSION
+                or snapshot.get("token") != self._token
+            ):
+                return None
+            content = self._fernet.decrypt(snapshot["content"].encode("utf-8"))
+            return json.loads(content)
+        except Exception:
+            return None
+
+    def save(self, content):
+        """
+        Save snapshot content. It is written to a temporary file then
+        renamed, so readers never see a partial snapshot.
+
+        :param content: JSON serializable content
+        :return: True if saved
+        """
+        if not self.enabled:
+            return False
+        encrypted = self._fernet.encrypt(json.dumps(content).encode("utf-8"))
+        snapshot = {
+            "version": self.VERSION,
+            "token": self._token,
+            "content": encrypted.decode("utf-8"),
+        }
+        dirname = os.path.dirname(self._path) or "."
+        try:
+            os.makedirs(dirname, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix=".snapshot")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self._path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+        except OSError:
+            return False
+        return True
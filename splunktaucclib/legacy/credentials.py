@@ -18,18 +18,23 @@
 Handles credentials related stuff
 """
 
+import json
 import re
+import urllib.parse
 import warnings
+from concurrent import futures
 
 import defusedxml.minidom as xdm
 
 import splunktaucclib.legacy.util as util
-import splunktaucclib.common.xml_dom_parser as xdp
 import splunktaucclib.legacy.rest as rest
 
 # Splunk can only encrypt string when length <=255
 SPLUNK_CRED_LEN_LIMIT = 255
 
+# Max concurrent requests when writing split credential stanzas
+UPDATE_MAX_WORKERS = 8
+
 
 class CredException(Exception):
     pass
@@ -74,6 +79,7 @@ class CredentialManager:
         self._splunkd_uri = splunkd_uri
         self._owner = owner
         self._sep = "``splunk_cred_sep``"
+        self._chunk_pattern = re.compile(rf"(.+){re.escape(self._sep)}(\d+)")
 
         if realm:
             self._realm = realm
@@ -138,40 +144,98 @@ class CredentialManager:
 
     def _update(self, name, str_to_encrypt):
         """
-        Update the string for the name.
+        Update the string for the name. Strings longer than
+        SPLUNK_CRED_LEN_LIMIT are split into stanzas "<name><sep><index>",
+        which are written concurrently. Stanzas left over from a previous
+        longer (or shorter, unsplit) value are deleted afterwards.
         :return: raise on failure
         """
 
         if len(str_to_encrypt) <= SPLUNK_CRED_LEN_LIMIT:
-            self._do_update(name, str_to_encrypt)
-            return
+            chunks = {name: str_to_encrypt}
+        else:
+            chunks = {
+                self._sep.join((name, str(i))): str_to_encrypt[
+                    start : start + SPLUNK_CRED_LEN_LIMIT
+                ]
+                for i, start in enumerate(
+                    range(0, len(str_to_encrypt), SPLUNK_CRED_LEN_LIMIT)
+                )
+            }
 
-        # split the str_to_encrypt when len > 255
-        length = SPLUNK_CRED_LEN_LIMIT
-        i = 0
-        while length < len(str_to_encrypt) + SPLUNK_CRED_LEN_LIMIT:
-            curr_str = str_to_encrypt[length - SPLUNK_CRED_LEN_LIMIT : length]
-            length += SPLUNK_CRED_LEN_LIMIT
+        existing = self._get_existing_names(name)
+        if existing is None:
+            # unknown, create then update each stanza as before
+            stanzas = [(stanza_name, None) for stanza_name in chunks]
+        else:
+            stanzas = [(stanza_name, stanza_name in existing) for stanza_name in chunks]
+
+        if len(stanzas) == 1:
+            self._do_update(stanzas[0][0], chunks[stanzas[0][0]], stanzas[0][1])
+        else:
+            with futures.ThreadPoolExecutor(
+                max_workers=min(UPDATE_MAX_WORKERS, len(stanzas))
+            ) as executor:
+                pending = [
+                    executor.submit(
+                        self._do_update, stanza_name, chunks[stanza_name], exists
+                    )
+                    for stanza_name, exists in stanzas
+                ]
+            for future in pending:
+                future.result()
 
-            stanza_name = self._sep.join((name, str(i)))
-            self._do_update(stanza_name, curr_str)
-            i += 1
+        for stanza_name in sorted(set(existing or ()) - set(chunks)):
+            self._delete(stanza_name)
 
-    def _do_update(self, name, password):
+    def _get_existing_names(self, name):
+        """
+        Get names of existing stanzas of the credential in realm, split
+        or not, with one listing.
+        :return: a set of names, None if listing failed.
+        """
+        prefix = self._realm + ":" + name
         try:
-            self._create(name, password)
+            stanzas = self._get_all_passwords(search=name)
         except CredException:
-            payload = {"password": password}
-            endpoint = self._get_endpoint(name)
-            response = rest.splunkd_request(
-                endpoint, self._session_key, method="POST", data=payload
-            )
-            if not response or response.status_code not in (200, 201):
-                raise CredException(
-                    "Unable to update password for username={}, status={}".format(
-                        name, response.status_code
-                    )
+            return None
+
+        names = set()
+        for stanza in stanzas:
+            stanza_name = stanza.get("name", "")
+            if stanza.get("realm") != self._realm:
+                continue
+            if stanza_name == prefix + ":":
+                names.add(name)
+                continue
+            match = self._chunk_pattern.match(stanza_name)
+            if match and match.group(1) == prefix:
+                names.add(self._sep.join((name, match.group(2))))
+        return names
+
+    def _do_update(self, name, password, exists=None):
+        """
+        Create or update the stanza.
+        :param exists: whether the stanza exists, None if it is unknown
+        """
+        if not exists:
+            try:
+                self._create(name, password)
+                return
+            except CredException:
+                pass
+
+        payload = {"password": password}
+        endpoint = self._get_endpoint(name)
+        response = rest.splunkd_request(
+            endpoint, self._session_key, method="POST", data=payload
+        )
+        if not response or response.status_code not in (200, 201):
+            raise CredException(
+                "Unable to update password for username={}, status={}".format(
+                    name, response.status_code if response is not None else None
                 )
+            )
 
     def _create(self, name, str_to_encrypt):
         """
@@ -243,59 +307,49 @@ class CredentialManager:
             if throw:
                 raise CredException(f"Failed to delete credential stanza {name}")
 
-    def get_all_passwords(self):
+    def get_all_passwords(self, realm=None):
+        """
+        :param realm: only get credentials of the realm if not None.
+        :return: a list of credential dict, with split stanzas merged.
+        """
+        search = f"realm={realm}" if realm else None
+        return self._merge_chunks(self._get_all_passwords(search=search))
+
+    def _merge_chunks(self, stanzas):
+        """
+        Merge split stanzas "<realm>:<user><sep><index>:" of credentials
+        longer than SPLUNK_CRED_LEN_LIMIT into one stanza "<realm>:<user>:".
+        """
         results = {}
-        all_stanzas = self._get_all_passwords()
-        for stanza in all_stanzas:
+        chunks = {}
+        for stanza in stanzas:
             name = stanza.get("name")
-            match = re.match(rf"(.+){self._sep}(\d+)", name)
-            if match:
-                actual_name = match.group(1) + ":"
-                index = int(match.group(2))
-                if results.get(actual_name):
-                    exist_stanza = results.get(actual_name)
-                else:
-                    exist_stanza = stanza
-                    exist_stanza["name"] = actual_name
-                    exist_stanza["username"] = exist_stanza["username"].split(
-                        self._sep
-                    )[0]
-                    exist_stanza["clears"] = {}
-                    exist_stanza["encrs"] = {}
-
-                try:
-                    exist_stanza["clears"][index] = stanza.get("clear_password")
-                    exist_stanza["encrs"][index] = stanza.get("encr_password")
-                except KeyError:
-                    exist_stanza["clears"] = {}
-                    exist_stanza["encrs"] = {}
-                    exist_stanza["clears"][index] = stanza.get("clear_password")
-                    exist_stanza["encrs"][index] = stanza.get("encr_password")
-
-                results[actual_name] = exist_stanza
-
-            else:
+            match = self._chunk_pattern.match(name)
+            if not match:
                 results[name] = stanza
-
-        # merge the stanzas by index
-        for name, stanza in list(results.items()):
-            field_clear = stanza.get("clears")
-            field_encr = stanza.get("encrs")
-            if isinstance(field_clear, dict):
-                clear_password = ""
-                encr_password = ""
-                for index in sorted(field_clear.keys()):
-                    clear_password += field_clear.get(index)
-                    encr_password += field_encr.get(index)
-                stanza["clear_password"] = clear_password
-                stanza["encr_password"] = encr_password
-
-                del stanza["clears"]
-                del stanza["encrs"]
+                continue
+            actual_name = match.group(1) + ":"
+            # keep position of first seen chunk
+            results.setdefault(actual_name, None)
+            chunks.setdefault(actual_name, {})[int(match.group(2))] = stanza
+
+        for actual_name, indexed in chunks.items():
+            indexes = sorted(indexed)
+            stanza = dict(indexed[indexes[0]])
+            stanza["name"] = actual_name
+            stanza["username"] = stanza["username"].split(self._sep)[0]
+            stanza["clear_password"] = "".join(
+                indexed[i].get("clear_password") or "" for i in indexes
+            )
+            stanza["encr_password"] = "".join(
+                indexed[i].get("encr_password") or "" for i in indexes
+            )
+            results[actual_name] = stanza
         return list(results.values())
 
-    def _get_all_passwords(self):
+    def _get_all_passwords(self, search=None):
         """
+        :param search: filter applied by splunkd, e.g. "realm=xxx"
         :return: a list of dict when successful, None when failed.
         the dict at least contains
         {
@@ -306,11 +360,56 @@ class CredentialManager:
         """
 
         endpoint = self._get_endpoint()
+        query = {"output_mode": "json"}
+        if search:
+            query["search"] = search
+        endpoint = f"{endpoint}&{urllib.parse.urlencode(query)}"
         response = rest.splunkd_request(endpoint, self._session_key, method="GET")
         if response and response.status_code in (200, 201) and response.text:
-            return xdp.parse_conf_xml_dom(response.text)
+            return self._parse_entries(response.text)
         raise CredException("Failed to get credentials")
 
+    def _get_passwords_by_name(self, name):
+        """
+        Get credentials of the name in realm, without listing all
+        credentials.
+        :return: a list of credential dict, with split stanzas merged.
+        """
+        endpoint = f"{self._get_endpoint(name)}?output_mode=json"
+        response = rest.splunkd_request(endpoint, self._session_key, method="GET")
+        if response is not None and response.status_code == 200 and response.text:
+            return self._parse_entries(response.text)
+        if response is not None and response.status_code != 404:
+            raise CredException("Failed to get credentials")
+
+        # the credential may be split, look for its chunks
+        prefix = self._realm + ":" + name + self._sep
+        stanzas = [
+            stanza
+            for stanza in self._get_all_passwords(search=name + self._sep)
+            if stanza.get("name", "").startswith(prefix)
+        ]
+        return self._merge_chunks(stanzas)
+
+    @staticmethod
+    def _parse_entries(content):
+        """
+        Parse JSON response of storage/passwords into the same format
+        as ``xml_dom_parser.parse_conf_xml_dom``.
+        """
+        stanza_objs = []
+        for entry in json.loads(content).get("entry", []):
+            stanza_obj = {"name": entry["name"], "stanza": entry["name"]}
+            for key, value in entry.get("content", {}).items():
+                if key == "eai:acl":
+                    stanza_obj[key] = entry.get("acl") or value
+                elif key != "eai:attributes":
+                    if key.startswith("eai:"):
+                        key = key[4:]
+                    stanza_obj[key] = value
+            stanza_objs.append(stanza_obj)
+        return stanza_objs
+
     def get_clear_password(self, name=None):
         """
         :return: clear password(s)
@@ -333,7 +432,10 @@ class CredentialManager:
         :return: clear or encrypted password for specified realm, user
         """
 
-        all_stanzas = self.get_all_passwords()
+        if name:
+            all_stanzas = self._get_passwords_by_name(name)
+        else:
+            all_stanzas = self.get_all_passwords(realm=self._realm)
         results = {}
 
         for stanza in all_stanzas:
@@ -15,17 +15,83 @@
 #
 
 import json
+import threading
+import time
 import urllib.parse
+from http.cookiejar import DefaultCookiePolicy
 from traceback import format_exc
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from solnlib import log
 
 
 logger = log.Logs().get_logger("util")
 
+# Connection pool size of each session
+POOL_MAXSIZE = 16
+# Retries on connection errors, before the request is sent. Responses
+# with retryable status are retried by splunkd_request and its callers,
+# not to stack retries with a timeout of each.
+ADAPTER_RETRIES = 3
+ADAPTER_BACKOFF_FACTOR = 0.5
+# Backoff between attempts of splunkd_request, in seconds
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_CAP = 5.0
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(splunkd_uri, verify=False) -> requests.Session:
+    """
+    Get the keep-alive session for splunkd. Sessions are pooled per
+    splunkd scheme, host, port and ``verify``, and shared by threads.
+    Cookies are not kept, since requests are authorized by session key.
+
+    :param splunkd_uri: any URI of splunkd
+    :param verify: same as ``verify`` of requests
+    :return: requests.Session
+    """
+    parsed = urllib.parse.urlsplit(splunkd_uri)
+    key = (parsed.scheme, parsed.netloc, verify)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            session.verify = verify
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=POOL_MAXSIZE,
+                max_retries=Retry(
+                    total=ADAPTER_RETRIES,
+                    connect=ADAPTER_RETRIES,
+                    read=0,
+                    status=0,
+                    backoff_factor=ADAPTER_BACKOFF_FACTOR,
+                    raise_on_status=False,
+                ),
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+        return session
+
+
+def close_sessions():
+    """
+    Close all pooled sessions.
+    """
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
 
 def splunkd_request(
     splunkd_uri,
@@ -56,9 +122,12 @@ def splunkd_request(
 
     msg_temp = "Failed to send rest request=%s, errcode=%s, reason=%s"
     resp = None
-    for _ in range(retry):
+    session = get_session(splunkd_uri, verify)
+    for attempt in range(retry):
+        if attempt:
+            time.sleep(min(RETRY_BACKOFF * 2 ** (attempt - 1), RETRY_BACKOFF_CAP))
         try:
-            resp = requests.request(
+            resp = session.request(
                 method=method,
                 url=splunkd_uri,
                 data=data,
@@ -74,6 +143,9 @@ def splunkd_request(
                     logger.debug(
                         msg_temp, splunkd_uri, resp.status_code, code_to_msg(resp)
                     )
+                if resp.status_code != 429 and resp.status_code < 500:
+                    # resending a client error fails again
+                    return resp
             else:
                 return resp
     else:
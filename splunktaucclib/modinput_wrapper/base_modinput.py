@@ -14,12 +14,16 @@
 # limitations under the License.
 #
 # encoding = utf-8
-import copy
+import atexit
 import json
 import logging
 import os
+import signal
 import sys
+import threading
 import tempfile
+import time
+import traceback
 import urllib
 
 from solnlib import utils as sutils
@@ -27,7 +31,27 @@ from solnlib.log import Logs
 from solnlib.modular_input import checkpointer
 from splunklib import modularinput as smi
 
-from splunktaucclib.global_config import GlobalConfig, GlobalConfigSchema
+from splunktaucclib.common import ReadOnlyDict
+from splunktaucclib.global_config import (
+    GlobalConfig,
+    GlobalConfigSnapshot,
+    change_token,
+    load_global_config_schema,
+)
+from splunktaucclib.modinput_wrapper.checkpoint_cache import WriteBehindCheckpointer
+from splunktaucclib.modinput_wrapper.dedup_filter import DedupFilter
+from splunktaucclib.modinput_wrapper.event_writer import (
+    BatchEventWriter,
+    MeteredEventWriter,
+)
+from splunktaucclib.modinput_wrapper.metrics import RunMetrics
+from splunktaucclib.modinput_wrapper.sharded_checkpoint import ShardedCheckpoint
+from splunktaucclib.modinput_wrapper.stanza_executor import (
+    StanzaExecutor,
+    StanzaLogFilter,
+)
+from splunktaucclib.splunk_aoblib.http_cache import HTTPCache
+from splunktaucclib.splunk_aoblib.rate_limiter import RateLimiter
 from splunktaucclib.splunk_aoblib.rest_helper import TARestHelper
 from splunktaucclib.splunk_aoblib.setup_util import Setup_Util
 
@@ -38,6 +62,7 @@ FIELD_FORMAT = "format_type"
 CUSTOMIZED_VAR = "customized_var"
 TYPE_CHECKBOX = "checkbox"
 TYPE_ACCOUNT = "global_account"
+SNAPSHOT_FILE = "global_config.snapshot"
 
 
 class BaseModInput(smi.Script):
@@ -55,9 +80,42 @@ class BaseModInput(smi.Script):
         "critical": logging.CRITICAL,
     }
 
-    def __init__(self, app_namespace, input_name, use_single_instance=False):
+    # max stanzas collected concurrently by single instance inputs
+    STANZA_MAX_WORKERS = 8
+    # max seconds to collect one stanza, no limit if None
+    STANZA_TIMEOUT = None
+    # seconds between runs of a stanza in daemon mode, if its interval
+    # is not a number of seconds
+    DAEMON_INTERVAL = 60
+    # seconds between checks of configuration changes in daemon mode
+    DAEMON_CONFIG_CHECK_INTERVAL = 30
+
+    def __init__(
+        self,
+        app_namespace,
+        input_name,
+        use_single_instance=False,
+        use_config_snapshot=False,
+        use_compiled_schema=False,
+        use_checkpoint_cache=False,
+        emit_metrics=True,
+        use_daemon_mode=False,
+    ):
         super().__init__()
         self.use_single_instance = use_single_instance
+        # reuse resolved global config saved in checkpoint dir until
+        # configuration of the app changes
+        self.use_config_snapshot = use_config_snapshot
+        # keep parsed globalConfig.json pickled next to it
+        self.use_compiled_schema = use_compiled_schema
+        # cache checkpoints in memory and write them behind in batches
+        self.use_checkpoint_cache = use_checkpoint_cache
+        # log counters and timings of each run
+        self.emit_metrics = emit_metrics
+        self.metrics = RunMetrics()
+        # stay resident and collect each stanza at its own interval
+        self.use_daemon_mode = use_daemon_mode
+        self._daemon_stop = threading.Event()
         self._canceled = False
         self.input_type = input_name
         self.input_stanzas = {}
@@ -67,9 +125,16 @@ class BaseModInput(smi.Script):
         Logs.set_context(namespace=app_namespace, root_logger_log_file=input_name)
         self.logger = logging.getLogger()
         self.logger.setLevel(logging.INFO)
-        self.rest_helper = TARestHelper(self.logger)
+        self.rest_helper = TARestHelper(self.logger, metrics=self.metrics)
+        # proxy uri resolved once per run
+        self._proxy_uri = None
+        self._proxy_uri_resolved = False
         # check point
         self.ckpt = None
+        self._sharded_ckpts = {}
+        # event dedup, opt-in by enable_dedup
+        self._dedup = None
+        self._dedup_key = None
         self.setup_util = None
 
     @property
@@ -113,14 +178,19 @@ class BaseModInput(smi.Script):
         #     'session_key': 'ceAvf3z^hZHYxe7wjTyTNo6_0ZRpf5cvWPdtSg'
         # }
         self.context_meta = inputs.metadata
+        self._proxy_uri_resolved = False
+        self._reset_metrics()
         # init setup util
         uri = inputs.metadata["server_uri"]
         session_key = inputs.metadata["session_key"]
-        self.setup_util = Setup_Util(uri, session_key, self.logger)
+        self.setup_util = Setup_Util(
+            uri, session_key, self.logger, compiled_schema=self.use_compiled_schema
+        )
 
+        # stanzas are only read, so copying the top level is enough
         input_definition = smi.input_definition.InputDefinition()
-        input_definition.metadata = copy.deepcopy(inputs.metadata)
-        input_definition.inputs = copy.deepcopy(inputs.inputs)
+        input_definition.metadata = dict(inputs.metadata)
+        input_definition.inputs = dict(inputs.inputs)
         try:
             self.parse_input_args(input_definition)
         except Exception as e:
@@ -137,8 +207,12 @@ class BaseModInput(smi.Script):
             self.set_log_level(self.log_level)
         except:
             self.log_debug("set log level fails.")
+        if self.use_daemon_mode:
+            self._run_daemon(input_definition, ew)
+            return
         try:
-            self.collect_events(ew)
+            with self.metrics.timer("collect"):
+                self.collect_events(MeteredEventWriter(ew, self.metrics))
         except Exception as e:
             import traceback
 
@@ -148,14 +222,193 @@ class BaseModInput(smi.Script):
             print(traceback.format_exc(), file=sys.stderr)
             # print >> sys.stderr, traceback.format_exc()
             raise RuntimeError(str(e))
+        finally:
+            with self.metrics.timer("checkpoint_close"):
+                self._close_check_point()
+            self._emit_metrics()
+
+    def _reset_metrics(self):
+        self.metrics = RunMetrics()
+        self.rest_helper.metrics = self.metrics
+
+    def _emit_metrics(self):
+        if not self.emit_metrics:
+            return
+        try:
+            self.log_info(
+                "Collection metrics: " + self.metrics.render(input_type=self.input_type)
+            )
+        except Exception:
+            self.log_debug("Fail to render collection metrics.")
 
     def collect_events(self, event_writer):
         """Collect events and stream to Splunk using event writer provided.
         Note: This method is originally collect_events(self, inputs, event_writer).
+        If ``collect_stanza_events`` is implemented instead, input stanzas are collected concurrently.
         :param event_writer: An object with methods to write events and log messages to Splunk.
         """
+        if type(self).collect_stanza_events is not BaseModInput.collect_stanza_events:
+            return self.run_stanzas(event_writer)
         raise NotImplemented()
 
+    def collect_stanza_events(self, input_stanza_name, event_writer):
+        """Collect events of one input stanza. It may be called concurrently for different stanzas.
+        :param input_stanza_name: `string`, a stanza name
+        :param event_writer: A thread safe object with methods to write events and log messages to Splunk.
+        """
+        raise NotImplemented()
+
+    def run_stanzas(self, event_writer, collect=None, max_workers=None, timeout=None):
+        """Collect input stanzas concurrently, each in its own thread.
+        A stanza failing or timing out does not stop others, and log messages are prefixed with the stanza name.
+        :param event_writer: An object with methods to write events and log messages to Splunk.
+        :param collect: function called as ``collect(input_stanza_name, event_writer)``,
+            ``collect_stanza_events`` by default.
+        :param max_workers: max stanzas collected concurrently, ``STANZA_MAX_WORKERS`` by default.
+        :param timeout: max seconds to collect one stanza, ``STANZA_TIMEOUT`` by default.
+        :return: a list of ``StanzaResult``. Raise RuntimeError if any stanza fails or times out.
+        """
+        executor = StanzaExecutor(
+            collect or self.collect_stanza_events,
+            max_workers=max_workers or self.STANZA_MAX_WORKERS,
+            timeout=timeout if timeout is not None else self.STANZA_TIMEOUT,
+            logger=self.logger,
+        )
+        log_filter = StanzaLogFilter()
+        handlers = list(logging.getLogger().handlers)
+        for handler in handlers:
+            handler.addFilter(log_filter)
+        try:
+            results = executor.run(list(self.input_stanzas), event_writer)
+        finally:
+            for handler in handlers:
+                handler.removeFilter(log_filter)
+
+        for result in results:
+            self.metrics.observe("collect", result.elapsed, stanza=result.name)
+            self.metrics.count(result.status, stanza=result.name)
+        failed = [r.name for r in results if r.status != StanzaExecutor.DONE]
+        if failed:
+            raise RuntimeError(
+                "Fail to collect stanzas: {}".format(", ".join(sorted(failed)))
+            )
+        return results
+
+    def _run_daemon(self, input_definition, ew):
+        """Collect stanzas at their intervals until the process is terminated or ``stop_daemon`` is called.
+        Sessions, config snapshot and checkpoint caches are kept between runs. Input stanzas and the log
+        level are reloaded when conf files of the app change, and disabled stanzas are no longer collected.
+        Only stanzas given by splunkd at start are collected, so new stanzas are collected once the input
+        is restarted. A stanza whose interval is not in seconds, e.g. a cron expression, runs every
+        ``DAEMON_INTERVAL`` seconds.
+        :param input_definition: An ``InputDefinition`` object, to reload input stanzas.
+        :param ew: An object with methods to write events and log messages to Splunk.
+        """
+        self._daemon_stop.clear()
+        self._handle_daemon_sigterm()
+        token = self._config_change_token()
+        next_check = time.time() + self.DAEMON_CONFIG_CHECK_INTERVAL
+        # stanza name to start time of its last run, so a changed interval
+        # applies to the next run
+        last_runs = {}
+        try:
+            while not self._daemon_stop.is_set():
+                now = time.time()
+                if now >= next_check:
+                    next_check = now + self.DAEMON_CONFIG_CHECK_INTERVAL
+                    new_token = self._config_change_token()
+                    if new_token != token:
+                        token = new_token
+                        self._reload_input_args(input_definition)
+                schedule = {
+                    name: last_runs[name] + self._stanza_interval(name)
+                    if name in last_runs
+                    else now
+                    for name in self.input_stanzas
+                }
+                due = [name for name, at in schedule.items() if at <= now]
+                if due:
+                    self._run_due_stanzas(due, ew)
+                    last_runs.update(dict.fromkeys(due, now))
+                    continue
+                wake = min([next_check, *schedule.values()])
+                self._daemon_stop.wait(max(0, wake - time.time()))
+        finally:
+            self._close_check_point()
+            self.rest_helper.close()
+
+    def stop_daemon(self):
+        """Stop daemon mode once the running collection is done."""
+        self._daemon_stop.set()
+
+    def _handle_daemon_sigterm(self):
+        if threading.current_thread() is not threading.main_thread():
+            return
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def _stop(signum, frame):
+            self.stop_daemon()
+            if callable(previous):
+                previous(signum, frame)
+
+        signal.signal(signal.SIGTERM, _stop)
+
+    def _config_change_token(self):
+        return change_token(
+            self._get_app_dir(), extra_paths=[self._get_global_config_path()]
+        )
+
+    def _reload_input_args(self, input_definition):
+        self.log_info("Configuration of the app changed, reload input stanzas.")
+        metadata = input_definition.metadata
+        self.setup_util = Setup_Util(
+            metadata["server_uri"],
+            metadata["session_key"],
+            self.logger,
+            compiled_schema=self.use_compiled_schema,
+        )
+        self._proxy_uri_resolved = False
+        input_stanzas = self.input_stanzas
+        try:
+            self.parse_input_args(input_definition)
+        except Exception:
+            self.log_error(
+                "Fail to reload input stanzas, keep current ones.\n"
+                + traceback.format_exc()
+            )
+            self.input_stanzas = input_stanzas
+        try:
+            self.set_log_level(self.log_level)
+        except Exception:
+            self.log_debug("set log level fails.")
+
+    def _stanza_interval(self, input_stanza_name):
+        try:
+            interval = float(self.input_stanzas[input_stanza_name].get("interval"))
+        except (KeyError, TypeError, ValueError):
+            interval = 0
+        return interval if interval > 0 else self.DAEMON_INTERVAL
+
+    def _run_due_stanzas(self, input_stanza_names, ew):
+        """Run ``collect_events`` for due stanzas only, as one run with its own metrics."""
+        input_stanzas = self.input_stanzas
+        self.input_stanzas = {name: input_stanzas[name] for name in input_stanza_names}
+        self._reset_metrics()
+        try:
+            with self.metrics.timer("collect"):
+                self.collect_events(MeteredEventWriter(ew, self.metrics))
+        except Exception:
+            self.log_error(
+                "Get error when collecting events.\n" + traceback.format_exc()
+            )
+        finally:
+            self.input_stanzas = input_stanzas
+            try:
+                self.flush_check_point()
+            except Exception:
+                self.log_error("Fail to flush checkpoints.")
+            self._emit_metrics()
+
     def parse_input_args(self, inputs):
         """Parse input arguments, either from os environment when testing or from global configuration.
         :param inputs: An ``InputDefinition`` object.
@@ -172,25 +425,8 @@ class BaseModInput(smi.Script):
         """Parse input arguments from global configuration.
         :param inputs:
         """
-        # dirname at this point will be <splunk_home>/etc/apps/<ta-name>/lib/splunktaucclib/modinput_wrapper, go up 3 dirs from this file to find the root TA directory
-        dirname = os.path.dirname
-        config_path = os.path.join(
-            dirname(dirname(dirname(dirname(__file__)))),
-            "appserver",
-            "static",
-            "js",
-            "build",
-            "globalConfig.json",
-        )
-        with open(config_path) as f:
-            schema_json = "".join([l for l in f])
-        global_schema = GlobalConfigSchema(json.loads(schema_json))
-
-        uri = inputs.metadata["server_uri"]
-        session_key = inputs.metadata["session_key"]
-        global_config = GlobalConfig(uri, session_key, global_schema)
-        ucc_inputs = global_config.inputs.load(input_type=self.input_type)
-        all_stanzas = ucc_inputs.get(self.input_type, {})
+        resolved = self._load_resolved_global_config(inputs.metadata)
+        all_stanzas = resolved["inputs"].get(self.input_type, {})
         if not all_stanzas:
             # for single instance input. There might be no input stanza.
             # Only the default stanza. In this case, modinput should exit.
@@ -199,22 +435,102 @@ class BaseModInput(smi.Script):
 
         account_fields = self.get_account_fields()
         checkbox_fields = self.get_checkbox_fields()
+        accounts = {}
         self.input_stanzas = {}
         for stanza in all_stanzas:
             full_stanza_name = "{}://{}".format(self.input_type, stanza.get("name"))
             if full_stanza_name in inputs.inputs:
                 if stanza.get("disabled", False):
-                    raise RuntimeError("Running disabled data input!")
+                    if not self.use_daemon_mode:
+                        raise RuntimeError("Running disabled data input!")
+                    # disabled since the daemon started
+                    self.log_info(f"Input stanza {full_stanza_name} is disabled.")
+                    continue
                 stanza_params = {}
                 for k, v in stanza.items():
                     if k in checkbox_fields:
                         stanza_params[k] = sutils.is_true(v)
                     elif k in account_fields:
-                        stanza_params[k] = copy.deepcopy(v)
+                        stanza_params[k] = self._shared_account(v, accounts)
                     else:
                         stanza_params[k] = v
                 self.input_stanzas[stanza.get("name")] = stanza_params
 
+    @staticmethod
+    def _get_app_dir():
+        # dirname at this point will be <splunk_home>/etc/apps/<ta-name>/lib/splunktaucclib/modinput_wrapper, go up 3 dirs from this file to find the root TA directory
+        dirname = os.path.dirname
+        return dirname(dirname(dirname(dirname(__file__))))
+
+    def _get_global_config_path(self):
+        return os.path.join(
+            self._get_app_dir(),
+            "appserver",
+            "static",
+            "js",
+            "build",
+            "globalConfig.json",
+        )
+
+    def _get_config_snapshot(self, metadata):
+        """Get global config snapshot in checkpoint dir.
+        :param metadata: input metadata
+        :return: ``GlobalConfigSnapshot`` or None if it is not enabled.
+        """
+        if not self.use_config_snapshot or not metadata.get("checkpoint_dir"):
+            return None
+        snapshot = GlobalConfigSnapshot(
+            os.path.join(
+                metadata["checkpoint_dir"],
+                f"{self.input_type}_{SNAPSHOT_FILE}",
+            ),
+            self._config_change_token(),
+            GlobalConfigSnapshot.make_key(self.app),
+        )
+        if not snapshot.enabled:
+            self.log_debug("Global config snapshot is not available.")
+            return None
+        return snapshot
+
+    def _load_resolved_global_config(self, metadata):
+        """Load inputs of this input type, and configs and settings if
+        global config snapshot is used.
+        :param metadata: input metadata
+        :return: `dict` with "inputs", and optional "configs" and "settings"
+        """
+        snapshot = self._get_config_snapshot(metadata)
+        resolved = snapshot.load() if snapshot else None
+        if resolved is None:
+            global_schema = load_global_config_schema(
+                self._get_global_config_path(), compiled=self.use_compiled_schema
+            )
+
+            uri = metadata["server_uri"]
+            session_key = metadata["session_key"]
+            global_config = GlobalConfig(uri, session_key, global_schema)
+            if snapshot is None:
+                return {"inputs": global_config.inputs.load(input_type=self.input_type)}
+
+            configs = global_config.configs.load()
+            resolved = {
+                "inputs": global_config.inputs.load(
+                    input_type=self.input_type, references=configs
+                ),
+                "configs": configs,
+            }
+            try:
+                resolved["settings"] = global_config.settings.load()
+            except Exception:
+                # settings are loaded again by setup util when needed
+                self.log_debug("Fail to load settings for global config snapshot.")
+            else:
+                snapshot.save(resolved)
+        else:
+            self.log_debug("Use global config snapshot.")
+        if self.setup_util is not None:
+            self.setup_util.preload(resolved.get("configs"), resolved.get("settings"))
+        return resolved
+
     def _parse_input_args_from_env(self, inputs):
         """Parse input arguments from os environment. This is used for testing inputs.
         :param inputs:
@@ -222,9 +538,10 @@ class BaseModInput(smi.Script):
         data_inputs_options = json.loads(os.environ.get(DATA_INPUTS_OPTIONS, "[]"))
         account_fields = self.get_account_fields()
         checkbox_fields = self.get_checkbox_fields()
+        accounts = {}
         self.input_stanzas = {}
-        while len(inputs.inputs) > 0:
-            input_stanza, stanza_args = inputs.inputs.popitem()
+        # in the order stanzas were popped from inputs before
+        for input_stanza, stanza_args in reversed(list(inputs.inputs.items())):
             kind_and_name = input_stanza.split("://")
             if len(kind_and_name) == 2:
                 stanza_params = {}
@@ -235,13 +552,30 @@ class BaseModInput(smi.Script):
                         arg_value_trans = arg_value
                     stanza_params[arg_name] = arg_value_trans
                     if arg_name in account_fields:
-                        stanza_params[arg_name] = self.get_user_credential_by_id(
-                            arg_value_trans
+                        stanza_params[arg_name] = self._shared_account(
+                            self.get_user_credential_by_id(arg_value_trans), accounts
                         )
                     elif arg_name in checkbox_fields:
                         stanza_params[arg_name] = sutils.is_true(arg_value_trans)
                 self.input_stanzas[kind_and_name[1]] = stanza_params
 
+    @staticmethod
+    def _shared_account(account, accounts):
+        """Get a read-only account shared by stanzas referencing the same account.
+        :param account: account `dict` of a stanza.
+        :param accounts: `dict` of shared accounts of the stanzas by name.
+        :return: ``ReadOnlyDict``, or account as is if it is not a `dict`.
+        """
+        if not isinstance(account, dict):
+            return account
+        name = account.get("name")
+        shared = accounts.get(name)
+        # accounts of different types may have the same name
+        if shared is None or shared != account:
+            shared = ReadOnlyDict(account)
+            accounts[name] = shared
+        return shared
+
     def get_account_fields(self):
         """Get the names of account variables.
         Should be implemented in subclass.
@@ -393,6 +727,58 @@ class BaseModInput(smi.Script):
             unbroken=unbroken,
         )
 
+    def new_event_writer(
+        self,
+        event_writer,
+        host=None,
+        index=None,
+        source=None,
+        sourcetype=None,
+        **kwargs,
+    ):
+        """Create a buffered event writer, which writes events in bulk with the given constant fields.
+        Events are flushed when the buffer reaches size or time thresholds, and when the writer is closed.
+        Usage::
+        >>> with self.new_event_writer(ew, index=index, sourcetype=sourcetype) as writer:
+        >>>     writer.write_events(records)
+        :param event_writer: An object with methods to write events and log messages to Splunk.
+        :param host: ``string``, the events' host, ex: localhost.
+        :param index: ``string``, the index events are written to, or None if default index.
+        :param source: ``string``, the source of events, or None to have Splunk guess.
+        :param sourcetype: ``string``, source type of events, or None to have Splunk guess.
+        :param kwargs: thresholds ``max_events``, ``max_bytes`` and ``max_wait`` of ``BatchEventWriter``.
+        :return: ``BatchEventWriter`` object, which drops duplicates if ``enable_dedup`` is called.
+        """
+        if self._dedup is not None:
+            kwargs.setdefault("dedup", self._dedup)
+            kwargs.setdefault("dedup_key", self._dedup_key)
+        kwargs.setdefault("metrics", self.metrics)
+        return BatchEventWriter(
+            event_writer,
+            host=host,
+            index=index,
+            source=source,
+            sourcetype=sourcetype,
+            **kwargs,
+        )
+
+    def write_events(self, event_writer, events, **kwargs):
+        """Write events in bulk.
+        :param event_writer: An object with methods to write events and log messages to Splunk.
+        :param events: iterable of ``Event`` objects or event texts.
+        :param kwargs: constant fields of events and thresholds, see ``new_event_writer``.
+        :return: number of events written
+        """
+        with self.new_event_writer(event_writer, **kwargs) as writer:
+            count = writer.write_events(events)
+        self.log_debug(
+            "Wrote {events} events, {bytes} bytes in {flushes} flushes, "
+            "{throughput:.1f} events/s, dropped {duplicates} duplicates.".format(
+                **writer.stats()
+            )
+        )
+        return count
+
     # Basic get functions. To get params in input stanza.
     def get_input_type(self):
         """Get input type.
@@ -506,7 +892,144 @@ class BaseModInput(smi.Script):
             proxy_uri=self._get_proxy_uri() if use_proxy else None,
         )
 
+    def paginate(
+        self,
+        url,
+        paging,
+        records=None,
+        method="GET",
+        prefetch=True,
+        use_proxy=True,
+        **kwargs,
+    ):
+        """Iterate over records of a paginated API, fetching the next page while records of the current one are processed.
+        Usage::
+        >>> from splunktaucclib.splunk_aoblib import pagination
+        >>> for record in self.paginate(url, pagination.LinkHeaderPaging(), pagination.line_records(), stream=True):
+        >>>     ...
+        :param url: URL of the first page.
+        :param paging: ``pagination.Paging`` strategy, e.g. ``LinkHeaderPaging``, ``CursorPaging`` or ``OffsetPaging``.
+        :param records: (optional) function to extract records of a page, e.g. ``pagination.json_records("items")``.
+            If None, responses of pages are yielded.
+        :param method: (optional) method of requests, default to "GET".
+        :param prefetch: (optional) whether the next page is fetched while the current one is processed.
+        :param use_proxy: (optional) whether to use proxy. If set to True, proxy in global setting will be used.
+        :param kwargs: (optional) other ``send_http_request`` arguments, e.g. parameters, headers or stream.
+        :return: generator of records or responses
+        """
+        return self.rest_helper.paginate(
+            dict(kwargs, url=url, method=method),
+            paging,
+            records=records,
+            prefetch=prefetch,
+            proxy_uri=self._get_proxy_uri() if use_proxy else None,
+        )
+
+    def send_http_requests(self, http_requests, use_proxy=True):
+        """Send http requests concurrently, with a limit of concurrent requests per host.
+        :param http_requests: iterable of `dict` of ``send_http_request`` arguments except use_proxy,
+            e.g. {"url": url, "method": "GET"}.
+        :param use_proxy: (optional) whether to use proxy. If set to True, proxy in global setting will be used.
+        :return: generator of ``HTTPResult`` (request, response, error) in completion order
+        """
+        return self.rest_helper.send_http_requests(
+            http_requests, proxy_uri=self._get_proxy_uri() if use_proxy else None
+        )
+
+    def send_http_requests_async(self, http_requests, use_proxy=True):
+        """Async version of ``send_http_requests``.
+        Usage::
+        >>> async for result in self.send_http_requests_async(http_requests):
+        >>>     ...
+        :return: async generator of ``HTTPResult`` (request, response, error) in completion order
+        """
+        return self.rest_helper.send_http_requests_async(
+            http_requests, proxy_uri=self._get_proxy_uri() if use_proxy else None
+        )
+
+    def set_rate_limit(
+        self, rate=None, burst=None, host_rates=None, shared=False, max_wait=None
+    ):
+        """Rate limit http requests per host. Hosts are also paused as told by "Retry-After" and
+        "X-RateLimit-Remaining"/"X-RateLimit-Reset" response headers.
+        :param rate: requests per second to each host. If None, only rate limit headers are honored.
+        :param burst: (optional) max requests sent at once, default to rate.
+        :param host_rates: (optional) `dict` of host to (rate, burst) for hosts with other limits.
+        :param shared: (optional) whether the limits are shared by all processes of this input, through
+            files in checkpoint dir.
+        :param max_wait: (optional) max seconds to wait for a request, ``RateLimitExceeded`` is raised
+            instead of waiting longer.
+        """
+        state_dir = None
+        if shared:
+            state_dir = os.path.join(self.context_meta["checkpoint_dir"], "ratelimit")
+        self.rest_helper.rate_limiter = RateLimiter(
+            rate=rate,
+            burst=burst,
+            host_rates=host_rates,
+            state_dir=state_dir,
+            max_wait=max_wait,
+        )
+
+    def enable_http_cache(self, persistent=True, **kwargs):
+        """Cache responses of GET http requests with "ETag" or "Last-Modified" headers. Requests are sent
+        with "If-None-Match"/"If-Modified-Since", and the cached response is returned if the server
+        answers 304 Not Modified. The response has ``from_cache`` set to True in that case.
+        :param persistent: (optional) whether responses are kept in checkpoint dir across runs. They are encrypted
+            with the key of the global config snapshot, and only kept in memory if the key is not available.
+        :param kwargs: (optional) size limits ``max_entries``, ``max_bytes`` and ``max_disk_bytes`` of ``HTTPCache``.
+        """
+        cache_dir = key = None
+        if persistent and self.context_meta.get("checkpoint_dir"):
+            key = GlobalConfigSnapshot.make_key(self.app)
+            if key is not None:
+                cache_dir = os.path.join(
+                    self.context_meta["checkpoint_dir"], "http_cache"
+                )
+            else:
+                self.log_debug("Keep http cache in memory, no encryption key.")
+        self.rest_helper.http_cache = HTTPCache(cache_dir, key=key, **kwargs)
+
+    def enable_dedup(
+        self,
+        key=None,
+        error_rate=DedupFilter.ERROR_RATE,
+        max_bytes=DedupFilter.MAX_BYTES,
+        window=DedupFilter.WINDOW,
+    ):
+        """Drop events already written within a time window, in event writers created by ``new_event_writer``
+        and ``write_events``. Seen events are kept in Bloom filters in checkpoint dir instead of checkpoints, so
+        a new event is dropped as a duplicate at the given false positive rate.
+        :param key: (optional) function of the event text to its dedup key, e.g. the event ID. The text itself is
+            the key by default.
+        :param error_rate: (optional) false positive rate.
+        :param max_bytes: (optional) memory and disk size of the filters.
+        :param window: (optional) seconds events are remembered.
+        """
+        path = None
+        if self.context_meta.get("checkpoint_dir"):
+            path = os.path.join(
+                self.context_meta["checkpoint_dir"], "dedup", self.input_type
+            )
+        self._dedup = DedupFilter(
+            path,
+            error_rate=error_rate,
+            max_bytes=max_bytes,
+            window=window,
+            logger=self.logger,
+        )
+        self._dedup_key = key
+
     def _get_proxy_uri(self):
+        """Get proxy uri in global setting, it is resolved once per run.
+        :return: proxy uri or None if proxy is not set.
+        """
+        if not self._proxy_uri_resolved:
+            self._proxy_uri = self._resolve_proxy_uri()
+            self._proxy_uri_resolved = True
+        return self._proxy_uri
+
+    def _resolve_proxy_uri(self):
         uri = None
         proxy = self.get_proxy()
         if proxy and proxy.get("proxy_url") and proxy.get("proxy_type"):
@@ -555,6 +1078,49 @@ class BaseModInput(smi.Script):
                     host=dhost,
                     port=dport,
                 )
+            if self.use_checkpoint_cache:
+                self.ckpt = WriteBehindCheckpointer(self.ckpt, logger=self.logger)
+                atexit.register(self._close_check_point)
+                self._handle_sigterm()
+
+    def _handle_sigterm(self):
+        """Exit by SystemExit when the process is terminated, so that buffered events and then cached
+        checkpoints are flushed as the main thread unwinds."""
+        if threading.current_thread() is not threading.main_thread():
+            # signal handlers can only be set in main thread
+            return
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def _teardown(signum, frame):
+            # nothing is written here: the interrupted thread may hold locks
+            # of the checkpointer, and checkpoints must not be saved before
+            # the events they cover
+            if callable(previous):
+                previous(signum, frame)
+            elif previous != signal.SIG_IGN:
+                raise SystemExit(128 + signum)
+
+        signal.signal(signal.SIGTERM, _teardown)
+
+    def _flush_sharded_check_points(self):
+        for name, sharded in list(self._sharded_ckpts.items()):
+            try:
+                sharded.flush()
+            except Exception:
+                self.log_error(f"Fail to flush sharded checkpoint {name}.")
+
+    def _close_check_point(self, timeout=WriteBehindCheckpointer.CLOSE_TIMEOUT):
+        self._flush_sharded_check_points()
+        if self._dedup is not None:
+            try:
+                self._dedup.save()
+            except Exception:
+                self.log_error("Fail to save dedup filter.")
+        if isinstance(self.ckpt, WriteBehindCheckpointer):
+            try:
+                self.ckpt.close(timeout=timeout)
+            except Exception:
+                self.log_error("Fail to flush checkpoints.")
 
     def get_check_point(self, key):
         """Get checkpoint.
@@ -563,7 +1129,8 @@ class BaseModInput(smi.Script):
         """
         if self.ckpt is None:
             self._init_ckpt()
-        return self.ckpt.get(key)
+        with self.metrics.timer("checkpoint_read"):
+            return self.ckpt.get(key)
 
     def save_check_point(self, key, state):
         """Update checkpoint.
@@ -572,7 +1139,8 @@ class BaseModInput(smi.Script):
         """
         if self.ckpt is None:
             self._init_ckpt()
-        self.ckpt.update(key, state)
+        with self.metrics.timer("checkpoint_write"):
+            self.ckpt.update(key, state)
 
     def batch_save_check_point(self, states):
         """Batch update checkpoint.
@@ -580,7 +1148,32 @@ class BaseModInput(smi.Script):
         """
         if self.ckpt is None:
             self._init_ckpt()
-        self.ckpt.batch_update(states)
+        with self.metrics.timer("checkpoint_write"):
+            self.ckpt.batch_update(states)
+
+    def get_sharded_check_point(self, name, shards=ShardedCheckpoint.SHARDS):
+        """Get a checkpoint of many keys, saved in shards.
+        Only shards with updates are saved, by `flush_check_point` or when
+        `collect_events` returns.
+        :param name: name of the sharded checkpoint. `string`
+        :param shards: number of shards, fixed once saved. `int`
+        :return: `ShardedCheckpoint`
+        """
+        sharded = self._sharded_ckpts.get(name)
+        if sharded is None:
+            if self.ckpt is None:
+                self._init_ckpt()
+            sharded = ShardedCheckpoint(self.ckpt, name, shards=shards)
+            self._sharded_ckpts[name] = sharded
+        return sharded
+
+    def flush_check_point(self):
+        """Write cached checkpoint updates when checkpoint cache or
+        sharded checkpoints are used."""
+        with self.metrics.timer("checkpoint_flush"):
+            self._flush_sharded_check_points()
+            if isinstance(self.ckpt, WriteBehindCheckpointer):
+                self.ckpt.flush()
 
     def delete_check_point(self, key):
         """Delete checkpoint.
@@ -588,4 +1181,5 @@ class BaseModInput(smi.Script):
         """
         if self.ckpt is None:
             self._init_ckpt()
-        self.ckpt.delete(key)
+        with self.metrics.timer("checkpoint_write"):
+            self.ckpt.delete(key)
@@ -0,0 +1,183 @@
+#
+# Copyright 2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Write-behind cache of modular input checkpoints.
+
+Reads are served from memory once a key is loaded, and updates are
+coalesced per key and written in batches with ``batch_update`` of the
+underlying checkpointer.
+"""
+
+
+import copy
+import logging
+import threading
+
+from solnlib.modular_input import checkpointer
+
+__all__ = ["WriteBehindCheckpointer"]
+
+
+class WriteBehindCheckpointer(checkpointer.Checkpointer):
+    """
+    Checkpointer which caches states and writes them behind.
+
+    Pending updates are flushed every ``flush_interval`` seconds from a
+    background thread, when ``max_pending`` keys are pending, and on
+    ``flush``/``close``. Updates not flushed are lost if the process is
+    killed, so the owner must call ``close`` before exiting.
+
+    Usage::
+    >>> ckpt = WriteBehindCheckpointer(checkpointer.KVStoreCheckpointer(...))
+    >>> ckpt.update("key", {"offset": 10})
+    >>> ckpt.get("key")
+    >>> ckpt.close()
+    """
+
+    FLUSH_INTERVAL = 5.0
+    MAX_PENDING = 100
+    # max documents of one KV store batch save
+    BATCH_SIZE = 1000
+    CLOSE_TIMEOUT = 10.0
+
+    def __init__(
+        self,
+        ckpt,
+        flush_interval=FLUSH_INTERVAL,
+        max_pending=MAX_PENDING,
+        logger=None,
+    ):
+        """
+
+        :param ckpt: underlying ``Checkpointer``.
+        :param flush_interval: seconds between background flushes, no
+            background flush if it is None.
+        :param max_pending: flush when so many keys are pending.
+        :param logger: logger, root logger if None.
+        """
+        self._ckpt = ckpt
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._logger = logger or logging.getLogger()
+
+        self._lock = threading.RLock()
+        # serializes writes to the underlying checkpointer. Do not flush
+        # from signal handlers, the interrupted thread may hold the locks.
+        self._flush_lock = threading.RLock()
+        self._cache = {}
+        self._pending = {}
+        self._stopped = threading.Event()
+        self._flusher = None
+
+    def get(self, key):
+        with self._lock:
+            if key in self._cache:
+                return copy.deepcopy(self._cache[key])
+        state = self._ckpt.get(key)
+        with self._lock:
+            # keep a state updated while it is being loaded
+            return copy.deepcopy(self._cache.setdefault(key, state))
+
+    def update(self, key, state):
+        self.batch_update([{"_key": key, "state": state}])
+
+    def batch_update(self, states):
+        """
+        :param states: iterable of dict with "_key" and "state".
+        """
+        with self._lock:
+            for state in states:
+                value = copy.deepcopy(state["state"])
+                self._cache[state["_key"]] = value
+                self._pending[state["_key"]] = value
+            full = len(self._pending) >= self._max_pending
+            self._start_flusher()
+        if full:
+            self.flush()
+
+    def delete(self, key):
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(key, None)
+                self._cache[key] = None
+            self._ckpt.delete(key)
+
+    @property
+    def pending(self):
+        """
+        Number of keys not flushed.
+        """
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """
+        Write pending updates. Updates which fail to be written are kept
+        pending. Updates are pending until they are written, so a flush
+        interrupted by an exception, e.g. SystemExit raised on SIGTERM, is
+        completed by the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                items = list(self._pending.items())
+            for i in range(0, len(items), self.BATCH_SIZE):
+                batch = items[i : i + self.BATCH_SIZE]
+                # batch_update of KV store serializes states in place
+                self._ckpt.batch_update(
+                    [{"_key": key, "state": state} for key, state in batch]
+                )
+                with self._lock:
+                    for key, state in batch:
+                        # unless it is updated again meanwhile
+                        if self._pending.get(key) is state:
+                            del self._pending[key]
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """
+        Stop background flushes and write pending updates.
+
+        :param timeout: max seconds to wait for the background thread to
+            stop, 0 not to wait.
+        """
+        self._stopped.set()
+        flusher = self._flusher
+        if (
+            timeout
+            and flusher is not None
+            and flusher is not threading.current_thread()
+        ):
+            flusher.join(timeout)
+        self.flush()
+
+    def _start_flusher(self):
+        if (
+            self._flusher is not None
+            or self._flush_interval is None
+            or self._stopped.is_set()
+        ):
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="checkpoint-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(self._flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                self._logger.exception("Fail to flush checkpoints.")
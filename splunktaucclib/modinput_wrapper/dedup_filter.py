@@ -0,0 +1,280 @@
+#
+# Copyright 2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Probabilistic dedup of events.
+
+Keys of emitted events are added to Bloom filters of bounded size,
+instead of being kept in checkpoints. A key may be reported as seen
+while it is not, at the configured false positive rate, but a key seen
+within the expiry window is never reported as new.
+"""
+
+
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+
+__all__ = ["BloomFilter", "DedupFilter"]
+
+_MAGIC = b"TABLOOM1\n"
+
+
+class BloomFilter:
+    """
+    Bloom filter of string keys.
+
+    Usage::
+    >>> bloom = BloomFilter.for_capacity(100000, error_rate=0.001)
+    >>> bloom.add("id1")
+    >>> "id1" in bloom
+    """
+
+    def __init__(self, bits, hashes, data=None, count=0):
+        """
+
+        :param bits: size of the filter in bits.
+        :param hashes: number of hash functions.
+        :param data: bit array, empty if None.
+        :param count: number of keys added.
+        """
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray((bits + 7) // 8) if data is None else bytearray(data)
+        self.count = count
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate):
+        """
+        :return: filter of the optimal size for capacity keys at error_rate.
+        """
+        bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        return cls(bits, cls.optimal_hashes(bits, capacity))
+
+    @staticmethod
+    def capacity(bits, error_rate):
+        """
+        :return: max keys of a filter of bits to keep error_rate.
+        """
+        return max(1, int(bits * math.log(2) ** 2 / -math.log(error_rate)))
+
+    @staticmethod
+    def optimal_hashes(bits, capacity):
+        return max(1, round(bits / capacity * math.log(2)))
+
+    def _positions(self, key):
+        # double hashing of one digest, h1 + i * h2
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        return all(
+            self.data[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key)
+        )
+
+    def add(self, key):
+        """
+        Add key.
+
+        :return: True if key was not in the filter.
+        """
+        added = False
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not self.data[pos >> 3] & mask:
+                self.data[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+
+class DedupFilter:
+    """
+    Rotating Bloom filters of keys seen within a time window.
+
+    Keys are added to the newest of ``generations`` filters, and a new
+    filter is started every ``window / generations`` seconds, or when the
+    newest filter is full, dropping the oldest one. So a key is remembered
+    for at least ``window * (generations - 1) / generations`` seconds, and
+    at most ``window``. Filters share ``max_bytes`` of memory, and their
+    capacity is sized for ``error_rate``.
+
+    Filters are saved to ``path`` by ``save``, and loaded when created. It
+    is thread safe.
+
+    Usage::
+    >>> dedup = DedupFilter(path, window=7 * 24 * 3600)
+    >>> if not dedup.seen(event_id):
+    >>>     ew.write_event(event)
+    >>> dedup.save()
+    """
+
+    ERROR_RATE = 0.001
+    MAX_BYTES = 4 * 1024 * 1024
+    WINDOW = 7 * 24 * 3600
+    GENERATIONS = 4
+
+    def __init__(
+        self,
+        path=None,
+        error_rate=ERROR_RATE,
+        max_bytes=MAX_BYTES,
+        window=WINDOW,
+        generations=GENERATIONS,
+        logger=None,
+    ):
+        """
+
+        :param path: file the filters are saved to, only in memory if None.
+        :param error_rate: false positive rate of each filter.
+        :param max_bytes: memory of all filters.
+        :param window: seconds keys are remembered, at most.
+        :param generations: number of filters, at least 2.
+        :param logger: logger, root logger if None.
+        """
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1.")
+        if generations < 2:
+            raise ValueError("generations must be at least 2.")
+        self._path = path
+        self._bits = max(8, max_bytes * 8 // generations)
+        self._capacity = BloomFilter.capacity(self._bits, error_rate)
+        self._hashes = BloomFilter.optimal_hashes(self._bits, self._capacity)
+        self._span = window / generations
+        self._generations = generations
+        self._logger = logger or logging.getLogger()
+        # reentrant, the owner may save while interrupted in seen
+        self._lock = threading.RLock()
+        # (start time, filter), newest last
+        self._filters = []
+        self._dirty = False
+        if path:
+            self._load()
+
+    @property
+    def capacity(self):
+        """
+        Keys remembered at the error rate, at least.
+        """
+        return self._capacity * (self._generations - 1)
+
+    def _new_filter(self, now):
+        self._filters.append((now, BloomFilter(self._bits, self._hashes)))
+        del self._filters[: -self._generations]
+
+    def _live(self, now):
+        # keys of a filter are not older than its start
+        window = self._span * self._generations
+        return [
+            (start, bloom) for start, bloom in self._filters if start > now - window
+        ]
+
+    def _rotate(self, now):
+        filters = self._live(now)
+        if len(filters) != len(self._filters):
+            self._filters = filters
+            self._dirty = True
+        if (
+            not self._filters
+            or now - self._filters[-1][0] >= self._span
+            or self._filters[-1][1].count >= self._capacity
+        ):
+            self._new_filter(now)
+            self._dirty = True
+
+    def seen(self, key):
+        """
+        Check and add key.
+
+        :param key: `string`
+        :return: True if key is probably seen, False if it is new.
+        """
+        with self._lock:
+            self._rotate(time.time())
+            if any(key in bloom for _, bloom in self._filters[:-1]):
+                return True
+            if self._filters[-1][1].add(key):
+                self._dirty = True
+                return False
+            return True
+
+    def __contains__(self, key):
+        with self._lock:
+            return any(key in bloom for _, bloom in self._live(time.time()))
+
+    def _load(self):
+        try:
+            with open(self._path, "rb") as f:
+                if f.readline() != _MAGIC:
+                    raise ValueError("not a dedup filter file")
+                header = json.loads(f.readline())
+                if (header["bits"], header["hashes"]) != (self._bits, self._hashes):
+                    self._logger.warning(
+                        "Dedup filter settings changed, previous keys are dropped."
+                    )
+                    return
+                size = (self._bits + 7) // 8
+                filters = []
+                for start, count in header["filters"]:
+                    data = f.read(size)
+                    if len(data) != size:
+                        raise ValueError("truncated dedup filter file")
+                    filters.append(
+                        (start, BloomFilter(self._bits, self._hashes, data, count))
+                    )
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError):
+            self._logger.exception("Fail to load dedup filter, keys are dropped.")
+            return
+        self._filters = filters[-self._generations :]
+
+    def save(self):
+        """
+        Save filters to path, if any keys are added since last save.
+        """
+        if not self._path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            header = {
+                "bits": self._bits,
+                "hashes": self._hashes,
+                "filters": [[start, bloom.count] for start, bloom in self._filters],
+            }
+            dirname = os.path.dirname(self._path) or "."
+            os.makedirs(dirname, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=dirname, prefix=".dedup")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(_MAGIC)
+                    f.write(json.dumps(header).encode("utf-8") + b"\n")
+                    for _, bloom in self._filters:
+                        f.write(bloom.data)
+                os.replace(tmp, self._path)
+            except Exception:
+                os.remove(tmp)
+                raise
+            self._dirty = False
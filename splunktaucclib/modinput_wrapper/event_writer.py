@@ -0,0 +1,494 @@
+#
+# Copyright 2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Buffered event writer for modular inputs.
+
+``smi.EventWriter.write_event`` builds an XML element tree, serializes
+and flushes output for every event. ``BatchEventWriter`` serializes
+events into a buffer, with the constant parts of the events escaped
+once, and writes the buffer when it is large or old enough. Old buffers
+are written by a timer even if no more events come, so the event writer
+must be thread safe, e.g. ``SynchronizedEventWriter``, if it is also
+written to directly.
+"""
+
+
+import contextlib
+import contextvars
+import io
+import logging
+import threading
+import time
+from xml.sax.saxutils import escape
+
+from splunklib import modularinput as smi
+
+__all__ = [
+    "BatchEventWriter",
+    "SynchronizedEventWriter",
+    "MeteredEventWriter",
+    "EventWriterRevoked",
+]
+
+_ATTR_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#09;"}
+
+
+def _ascii(escaped):
+    # like ElementTree, which serializes non-ASCII as character references
+    return escaped.encode("ascii", "xmlcharrefreplace").decode("ascii")
+
+
+def _text(value):
+    return _ascii(escape(str(value)))
+
+
+def _stanza_attr(stanza):
+    if stanza is None:
+        return ""
+    return f' stanza="{_ascii(escape(stanza, _ATTR_ENTITIES))}"'
+
+
+def _elements(source=None, sourcetype=None, index=None, host=None):
+    """
+    Serialized <source>, <sourcetype>, <index> and <host> elements, in
+    the order ``smi.Event`` writes them.
+    """
+    return "".join(
+        "<{tag}>{text}</{tag}>".format(tag=tag, text=_text(value))
+        for tag, value in (
+            ("source", source),
+            ("sourcetype", sourcetype),
+            ("index", index),
+            ("host", host),
+        )
+        if value is not None
+    )
+
+
+class EventWriterRevoked(Exception):
+    pass
+
+
+class SynchronizedEventWriter:
+    """
+    Thread safe wrapper of ``smi.EventWriter``, for collecting events of
+    several input stanzas concurrently into one event writer.
+
+    Wrappers sharing a lock can be handed to different threads, and a
+    wrapper is revoked when its thread must not write any more.
+    """
+
+    def __init__(self, event_writer, lock=None):
+        """
+
+        :param event_writer: ``smi.EventWriter`` to write events to.
+        :param lock: lock shared with other wrappers of event_writer.
+        """
+        self._event_writer = event_writer
+        self.lock = lock or threading.RLock()
+        self._revoked = False
+
+    def handle(self):
+        """
+        :return: a new wrapper of the event writer sharing the lock.
+        """
+        return SynchronizedEventWriter(self._event_writer, self.lock)
+
+    def revoke(self):
+        """
+        Drop access to the event writer, once writing in progress is done.
+        Writing to the wrapper then raises ``EventWriterRevoked``.
+        """
+        with self.lock:
+            self._revoked = True
+
+    def _writer(self):
+        if self._revoked:
+            raise EventWriterRevoked("Event writer is revoked.")
+        return self._event_writer
+
+    @property
+    def _out(self):
+        return self._writer()._out
+
+    @property
+    def header_written(self):
+        return self._writer().header_written
+
+    @header_written.setter
+    def header_written(self, value):
+        self._writer().header_written = value
+
+    def write_event(self, event):
+        with self.lock:
+            self._writer().write_event(event)
+
+    def log(self, severity, message):
+        with self.lock:
+            self._writer().log(severity, message)
+
+    def log_exception(self, message, exception=None, severity=None):
+        with self.lock:
+            self._writer().log_exception(message, exception, severity)
+
+    def write_xml_document(self, document):
+        with self.lock:
+            self._writer().write_xml_document(document)
+
+    def close(self):
+        with self.lock:
+            self._writer().close()
+
+
+class MeteredEventWriter:
+    """
+    Wrapper of ``smi.EventWriter`` counting events and bytes written by
+    ``write_event`` in ``RunMetrics``. Events written by
+    ``BatchEventWriter`` are counted by the batch writer.
+    """
+
+    def __init__(self, event_writer, metrics):
+        """
+
+        :param event_writer: ``smi.EventWriter`` to write events to.
+        :param metrics: ``RunMetrics`` to count "events" and "bytes".
+        """
+        self._event_writer = event_writer
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        # lock, _out, log, log_exception, write_xml_document and close
+        return getattr(self._event_writer, name)
+
+    @property
+    def header_written(self):
+        return self._event_writer.header_written
+
+    @header_written.setter
+    def header_written(self, value):
+        self._event_writer.header_written = value
+
+    def write_event(self, event):
+        # as smi.EventWriter.write_event, with the size of the event
+        serialized = io.StringIO()
+        event.write_to(serialized)
+        content = serialized.getvalue()
+        ew = self._event_writer
+        with getattr(ew, "lock", None) or contextlib.nullcontext():
+            if not ew.header_written:
+                ew._out.write("<stream>")
+                ew.header_written = True
+            ew._out.write(content)
+            ew._out.flush()
+        self.metrics.count("events")
+        self.metrics.count("bytes", len(content))
+
+
+class BatchEventWriter:
+    """
+    Buffered writer of events to Splunk. It is thread safe.
+
+    Usage::
+    >>> with BatchEventWriter(ew, index="main", sourcetype="test") as writer:
+    >>>     writer.write_events(records)
+    >>> writer.events_written, writer.throughput
+    """
+
+    MAX_EVENTS = 1000
+    MAX_BYTES = 1024 * 1024
+    MAX_WAIT = 1.0
+
+    def __init__(
+        self,
+        event_writer,
+        stanza=None,
+        index=None,
+        host=None,
+        source=None,
+        sourcetype=None,
+        max_events=MAX_EVENTS,
+        max_bytes=MAX_BYTES,
+        max_wait=MAX_WAIT,
+        dedup=None,
+        dedup_key=None,
+        metrics=None,
+    ):
+        """
+
+        :param event_writer: ``smi.EventWriter`` to write events to.
+        :param stanza: input stanza of the events, or None.
+        :param index: index of the events, or None if default index.
+        :param host: host of the events, or None.
+        :param source: source of the events, or None.
+        :param sourcetype: sourcetype of the events, or None.
+        :param max_events: flush when so many events are buffered.
+        :param max_bytes: flush when buffered events exceed this size.
+        :param max_wait: flush when buffered events are older than this
+            in seconds, by a timer thread if no event is written. No
+            timer if it is None.
+        :param dedup: ``DedupFilter``, events it has seen are dropped.
+        :param dedup_key: function of the event text to its dedup key,
+            the text itself if None.
+        :param metrics: ``RunMetrics`` to count events, bytes and
+            duplicates written.
+        """
+        self._event_writer = event_writer
+        self._max_events = max_events
+        self._max_bytes = max_bytes
+        self._max_wait = max_wait
+        self._dedup = dedup
+        self._dedup_key = dedup_key
+        self._metrics = metrics
+
+        self._heads = {
+            unbroken: '<event{} unbroken="{}">'.format(
+                _stanza_attr(stanza), int(unbroken)
+            )
+            for unbroken in (False, True)
+        }
+        self._elements = _elements(source, sourcetype, index, host)
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._buffered_since = None
+        self._timer = None
+
+        self.events_written = 0
+        self.bytes_written = 0
+        self.flushes = 0
+        self.duplicates = 0
+        self._started = time.time()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    @property
+    def elapsed(self):
+        return time.time() - self._started
+
+    @property
+    def throughput(self):
+        """
+        Events written per second since the writer is created.
+        """
+        elapsed = self.elapsed
+        return self.events_written / elapsed if elapsed > 0 else 0.0
+
+    def stats(self):
+        """
+        Throughput counters of the writer.
+        :return: `dict`
+        """
+        return {
+            "events": self.events_written,
+            "bytes": self.bytes_written,
+            "flushes": self.flushes,
+            "duplicates": self.duplicates,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+        }
+
+    def write(self, data, time=None, done=True, unbroken=True):
+        """
+        Write an event with the constant fields of the writer.
+
+        :param data: ``string``, the event's text.
+        :param time: ``float``, time in seconds, or None to let Splunk guess.
+        :param done: ``boolean``, is this a complete event?
+        :param unbroken: ``boolean``, Is this event completely encapsulated?
+        """
+        if data is None:
+            raise ValueError(
+                "Events must have at least the data field set to be written to XML."
+            )
+        if self._is_duplicate(data):
+            return
+        self._append(self._serialize(data, time, done, unbroken))
+
+    def write_event(self, event):
+        """
+        Write an ``smi.Event``, with its own fields.
+
+        :return: False if the event is dropped as a duplicate.
+        """
+        if event.data is None:
+            raise ValueError(
+                "Events must have at least the data field set to be written to XML."
+            )
+        if self._is_duplicate(event.data):
+            return False
+        head = '<event{} unbroken="{}">'.format(
+            _stanza_attr(event.stanza), int(event.unbroken)
+        )
+        self._append(
+            "".join(
+                (
+                    head,
+                    self._time(event.time),
+                    _elements(event.source, event.sourceType, event.index, event.host),
+                    "<data>",
+                    _text(event.data),
+                    "</data>",
+                    "<done />" if event.done else "",
+                    "</event>",
+                )
+            )
+        )
+        return True
+
+    def write_events(self, events):
+        """
+        Write events in bulk.
+
+        :param events: iterable of ``smi.Event`` or event texts, which are
+            written with the constant fields of the writer.
+        :return: number of events written, without duplicates.
+        """
+        count = 0
+        chunk = []
+        for event in events:
+            if isinstance(event, smi.Event):
+                if chunk:
+                    self._extend(chunk)
+                    chunk = []
+                if not self.write_event(event):
+                    continue
+            else:
+                if event is None:
+                    raise ValueError(
+                        "Events must have at least the data field set to be written to XML."
+                    )
+                if self._is_duplicate(event):
+                    continue
+                chunk.append(self._serialize(event, None, True, True))
+                if len(chunk) >= self._max_events:
+                    self._extend(chunk)
+                    chunk = []
+            count += 1
+        if chunk:
+            self._extend(chunk)
+        return count
+
+    def flush(self):
+        """
+        Write buffered events.
+        """
+        with self._lock:
+            self._flush()
+
+    def _is_duplicate(self, data):
+        if self._dedup is None:
+            return False
+        key = self._dedup_key(data) if self._dedup_key else str(data)
+        if self._dedup.seen(key):
+            with self._lock:
+                self.duplicates += 1
+            if self._metrics is not None:
+                self._metrics.count("duplicates")
+            return True
+        return False
+
+    def _serialize(self, data, event_time, done, unbroken):
+        return "".join(
+            (
+                self._heads[bool(unbroken)],
+                self._time(event_time),
+                self._elements,
+                "<data>",
+                _text(data),
+                "</data>",
+                "<done />" if done else "",
+                "</event>",
+            )
+        )
+
+    @staticmethod
+    def _time(event_time):
+        return f"<time>{_text(event_time)}</time>" if event_time is not None else ""
+
+    def _append(self, serialized):
+        self._extend([serialized])
+
+    def _extend(self, serialized):
+        with self._lock:
+            if self._buffered_since is None:
+                self._buffered_since = time.time()
+                self._schedule_flush()
+            self._buffer.extend(serialized)
+            self._buffered_bytes += sum(len(s) for s in serialized)
+            if (
+                len(self._buffer) >= self._max_events
+                or self._buffered_bytes >= self._max_bytes
+                or (
+                    self._max_wait is not None
+                    and time.time() - self._buffered_since >= self._max_wait
+                )
+            ):
+                self._flush()
+
+    def _schedule_flush(self):
+        if self._max_wait is None:
+            return
+        # in the context of the writing thread, e.g. its stanza in metrics
+        self._timer = threading.Timer(
+            self._max_wait,
+            contextvars.copy_context().run,
+            args=(self._flush_on_timer,),
+        )
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_on_timer(self):
+        with self._lock:
+            if self._timer is not threading.current_thread():
+                # the buffer is flushed already
+                return
+            self._timer = None
+            try:
+                self._flush()
+            except Exception:
+                # kept buffered, and flushed again on next write
+                logging.getLogger().exception("Fail to flush buffered events.")
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        content = "".join(self._buffer)
+        ew = self._event_writer
+        with getattr(ew, "lock", None) or contextlib.nullcontext():
+            if not ew.header_written:
+                ew._out.write("<stream>")
+                ew.header_written = True
+            ew._out.write(content)
+            ew._out.flush()
+
+        self.events_written += len(self._buffer)
+        self.bytes_written += len(content)
+        self.flushes += 1
+        if self._metrics is not None:
+            self._metrics.count("events", len(self._buffer))
+            self._metrics.count("bytes", len(content))
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._buffered_since = None
@@ -0,0 +1,148 @@
+#
+# Copyright 2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Counters and timings of a modular input run.
+
+Figures are kept per input stanza, the one collected by the current
+thread, and rendered as one compact JSON document per run.
+"""
+
+
+import bisect
+import contextlib
+import json
+import threading
+import time
+
+from splunktaucclib.modinput_wrapper.stanza_executor import current_stanza
+
+__all__ = ["RunMetrics", "Histogram"]
+
+
+class Histogram:
+    """
+    Count, sum, max and bucket counts of observed values.
+    """
+
+    # upper bounds of buckets, in seconds
+    BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60)
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(self.BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "buckets": list(self.buckets),
+        }
+
+
+class RunMetrics:
+    """
+    Thread safe counters and histograms, per input stanza.
+
+    Usage::
+    >>> metrics = RunMetrics()
+    >>> metrics.count("events", 10)
+    >>> with metrics.timer("http_latency"):
+    >>>     ...
+    >>> logger.info("Collection metrics: %s", metrics.render(input="my_input"))
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        # stanza name, or None out of stanzas, to name to value
+        self._counters = {}
+        self._histograms = {}
+
+    def count(self, name, value=1, stanza=None):
+        """
+        Add value to counter name.
+
+        :param stanza: stanza of the counter, the stanza collected by
+            current thread if None.
+        """
+        stanza = stanza if stanza is not None else current_stanza()
+        with self._lock:
+            counters = self._counters.setdefault(stanza, {})
+            counters[name] = counters.get(name, 0) + value
+
+    def observe(self, name, value, stanza=None):
+        """
+        Add value, usually seconds, to histogram name.
+
+        :param stanza: stanza of the histogram, the stanza collected by
+            current thread if None.
+        """
+        stanza = stanza if stanza is not None else current_stanza()
+        with self._lock:
+            histograms = self._histograms.setdefault(stanza, {})
+            histogram = histograms.get(name)
+            if histogram is None:
+                histogram = histograms[name] = Histogram()
+            histogram.observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name, stanza=None):
+        """
+        Observe seconds taken by the with block in histogram name.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.observe(name, time.time() - start, stanza)
+
+    def snapshot(self):
+        """
+        :return: `dict` of "elapsed" seconds, and counters and histograms
+            out of stanzas, with those of each stanza in "stanzas".
+        """
+        with self._lock:
+            figures = {}
+            for stanza in set(self._counters) | set(self._histograms):
+                values = dict(self._counters.get(stanza, {}))
+                for name, histogram in self._histograms.get(stanza, {}).items():
+                    values[name] = histogram.to_dict()
+                figures[stanza] = values
+        snapshot = {"elapsed": round(time.time() - self._started, 6)}
+        snapshot.update(figures.pop(None, {}))
+        if figures:
+            snapshot["stanzas"] = figures
+        return snapshot
+
+    def render(self, **fields):
+        """
+        :param fields: constant fields of the document, e.g. input type.
+        :return: one line JSON document of fields and the snapshot.
+        """
+        document = dict(fields)
+        document.update(self.snapshot())
+        document["bucket_bounds"] = Histogram.BUCKETS
+        return json.dumps(document, separators=(",", ":"), sort_keys=True)
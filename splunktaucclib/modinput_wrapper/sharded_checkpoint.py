@@ -0,0 +1,208 @@
+#
+# Copyright 2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Sharded checkpoint of high cardinality state.
+
+State of many objects, e.g. the last seen time of each device, is split
+by key hash into shards, each saved as one compact checkpoint. Updating
+an object only rewrites its shard instead of the whole state.
+"""
+
+
+import base64
+import copy
+import heapq
+import json
+import threading
+import zlib
+
+__all__ = [
+    "ShardedCheckpoint",
+    "CompactCodec",
+]
+
+
+class CompactCodec:
+    """
+    Encode a shard as zlib compressed JSON, in base64 to be stored by
+    any checkpointer.
+    """
+
+    def __init__(self, level=6):
+        """
+
+        :param level: zlib compression level.
+        """
+        self._level = level
+
+    def encode(self, shard):
+        data = json.dumps(shard, separators=(",", ":"), sort_keys=True)
+        compressed = zlib.compress(data.encode("utf-8"), self._level)
+        return base64.b64encode(compressed).decode("ascii")
+
+    def decode(self, data):
+        return json.loads(zlib.decompress(base64.b64decode(data)).decode("utf-8"))
+
+
+class ShardedCheckpoint:
+    """
+    Key value state saved in shards through a ``Checkpointer``. Only
+    shards with updates are written on ``flush``.
+
+    Usage::
+    >>> devices = ShardedCheckpoint(ckpt, "devices", shards=64)
+    >>> devices.update("device1", 1700000000)
+    >>> devices.get("device1")
+    >>> for key, value in devices.scan(prefix="device"):
+    >>>     ...
+    >>> devices.flush()
+    """
+
+    SHARDS = 64
+    VERSION = 1
+
+    def __init__(self, ckpt, name, shards=SHARDS, codec=None):
+        """
+
+        :param ckpt: ``Checkpointer`` to save shards.
+        :param name: name of the state, prefix of checkpoint keys of shards.
+        :param shards: number of shards, it cannot be changed once shards
+            are saved.
+        :param codec: object with ``encode(dict)`` returning a JSON
+            serializable value, usually `str`, which is saved as is, and
+            ``decode(value)`` returning the dict, ``CompactCodec`` by default.
+        """
+        self._ckpt = ckpt
+        self._name = name
+        self._shards = shards
+        self._codec = codec or CompactCodec()
+        # reentrant, the owner may flush from a signal handler
+        self._lock = threading.RLock()
+        self._loaded = {}
+        self._dirty = set()
+
+    def _shard_index(self, key):
+        # stable across processes, unlike hash()
+        return zlib.crc32(key.encode("utf-8")) % self._shards
+
+    def _shard_key(self, index):
+        return f"{self._name}.shard{index}"
+
+    def _shard(self, index):
+        shard = self._loaded.get(index)
+        if shard is None:
+            state = self._ckpt.get(self._shard_key(index))
+            if state is None:
+                shard = {}
+            else:
+                if state.get("shards") != self._shards:
+                    raise ValueError(
+                        f"Checkpoint {self._name} is saved in {state.get('shards')} "
+                        f"shards, not {self._shards}."
+                    )
+                shard = self._codec.decode(state["data"])
+            self._loaded[index] = shard
+        return shard
+
+    def get(self, key, default=None):
+        """
+        :return: value of key, or default if it is not set.
+        """
+        with self._lock:
+            value = self._shard(self._shard_index(key)).get(key, default)
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def update(self, key, value):
+        self.batch_update({key: value})
+
+    def batch_update(self, values):
+        """
+        :param values: `dict` of key to JSON serializable value.
+        """
+        with self._lock:
+            for key, value in values.items():
+                index = self._shard_index(key)
+                if isinstance(value, (dict, list)):
+                    value = copy.deepcopy(value)
+                self._shard(index)[key] = value
+                self._dirty.add(index)
+
+    def delete(self, key):
+        with self._lock:
+            index = self._shard_index(key)
+            shard = self._shard(index)
+            if key in shard:
+                del shard[key]
+                self._dirty.add(index)
+
+    def scan(self, prefix=None, start=None, end=None):
+        """
+        Iterate over keys in order. All shards are loaded.
+
+        :param prefix: only keys starting with prefix.
+        :param start: only keys not less than start.
+        :param end: only keys less than end.
+        :return: generator of (key, value).
+        """
+        with self._lock:
+            ordered = []
+            for index in range(self._shards):
+                shard = self._shard(index)
+                ordered.append(
+                    sorted(
+                        (key, value)
+                        for key, value in shard.items()
+                        if (prefix is None or key.startswith(prefix))
+                        and (start is None or key >= start)
+                        and (end is None or key < end)
+                    )
+                )
+        for key, value in heapq.merge(*ordered):
+            if isinstance(value, (dict, list)):
+                value = copy.deepcopy(value)
+            yield key, value
+
+    @property
+    def dirty(self):
+        """
+        Number of shards not saved.
+        """
+        with self._lock:
+            return len(self._dirty)
+
+    def flush(self):
+        """
+        Save shards with updates in one batch.
+        """
+        with self._lock:
+            dirty = sorted(self._dirty)
+            if not dirty:
+                return
+            self._ckpt.batch_update(
+                [
+                    {
+                        "_key": self._shard_key(index),
+                        "state": {
+                            "version": self.VERSION,
+                            "shards": self._shards,
+                            "data": self._codec.encode(self._loaded[index]),
+                        },
+                    }
+                    for index in dirty
+                ]
+            )
+            self._dirty.difference_update(dirty)
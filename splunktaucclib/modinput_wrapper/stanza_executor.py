@@ -0,0 +1,191 @@
+#
+# Copyright 2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Concurrent execution of input stanzas of single instance modular inputs.
+"""
+
+
+import contextvars
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from splunktaucclib.modinput_wrapper.event_writer import SynchronizedEventWriter
+
+__all__ = [
+    "StanzaExecutor",
+    "StanzaResult",
+    "StanzaLogFilter",
+    "current_stanza",
+]
+
+StanzaResult = namedtuple("StanzaResult", ("name", "status", "error", "elapsed"))
+
+# copied to pool threads working for a stanza, see ``contextvars``
+_stanza = contextvars.ContextVar("stanza", default=None)
+
+
+def current_stanza():
+    """
+    :return: name of the stanza collected by current thread, or None.
+    """
+    return _stanza.get()
+
+
+class StanzaLogFilter(logging.Filter):
+    """
+    Prefix log messages with the stanza collected by the logging thread.
+    """
+
+    def filter(self, record):
+        stanza = current_stanza()
+        if stanza is not None and not hasattr(record, "stanza"):
+            record.stanza = stanza
+            record.msg = f"[stanza={stanza}] {record.getMessage()}"
+            record.args = ()
+        return True
+
+
+class StanzaExecutor:
+    """
+    Run a collect function for each stanza on a pool of daemon threads.
+
+    A stanza failing does not affect others. A stanza running longer than
+    ``timeout`` is reported as timed out and its thread is abandoned, with
+    a new thread taking over remaining stanzas, so one slow stanza does
+    not block the others, nor the process from exiting. Each stanza has
+    its own handle of the event writer, which is revoked when the stanza
+    times out or ``run`` returns, so an abandoned thread cannot write to
+    the stream after it is closed.
+
+    Usage::
+    >>> executor = StanzaExecutor(collect, max_workers=8, timeout=600)
+    >>> results = executor.run(["stanza1", "stanza2"], ew)
+    """
+
+    DONE = "done"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+
+    MAX_WORKERS = 8
+
+    def __init__(self, collect, max_workers=MAX_WORKERS, timeout=None, logger=None):
+        """
+
+        :param collect: function called as ``collect(stanza_name, event_writer)``.
+        :param max_workers: max stanzas collected concurrently.
+        :param timeout: max seconds to collect one stanza, no limit if None.
+        :param logger: logger, root logger if None.
+        """
+        self._collect = collect
+        self._max_workers = max_workers
+        self._timeout = timeout
+        self._logger = logger or logging.getLogger()
+
+    def run(self, stanza_names, event_writer):
+        """
+        Collect stanzas.
+
+        :param stanza_names: names of stanzas.
+        :param event_writer: event writer shared by stanzas, each stanza
+            writes to its own thread safe handle of it.
+        :return: a list of ``StanzaResult`` in order of ``stanza_names``.
+        """
+        stanza_names = list(stanza_names)
+        if not stanza_names:
+            return []
+        if not isinstance(event_writer, SynchronizedEventWriter):
+            event_writer = SynchronizedEventWriter(event_writer)
+
+        tasks = queue.Queue()
+        for name in stanza_names:
+            tasks.put(name)
+        results = queue.Queue()
+        started = {}
+        handles = {name: event_writer.handle() for name in stanza_names}
+
+        def work():
+            while True:
+                try:
+                    name = tasks.get_nowait()
+                except queue.Empty:
+                    return
+                start = time.time()
+                started[name] = start
+                token = _stanza.set(name)
+                status, error = self.FAILED, None
+                try:
+                    self._collect(name, handles[name])
+                    status = self.DONE
+                except Exception as e:
+                    self._logger.exception("Fail to collect stanza.")
+                    error = e
+                finally:
+                    _stanza.reset(token)
+                    # always report, even on SystemExit, not to block run
+                    results.put(StanzaResult(name, status, error, time.time() - start))
+
+        def spawn():
+            threading.Thread(target=work, name="stanza-worker", daemon=True).start()
+
+        for _ in range(min(self._max_workers, len(stanza_names))):
+            spawn()
+
+        collected = {}
+        try:
+            while len(collected) < len(stanza_names):
+                try:
+                    result = results.get(timeout=self._wait_time(started, collected))
+                except queue.Empty:
+                    pass
+                else:
+                    collected.setdefault(result.name, result)
+                if self._timeout is None:
+                    continue
+                now = time.time()
+                for name, start in list(started.items()):
+                    if name not in collected and now - start >= self._timeout:
+                        self._logger.error(
+                            "Collecting stanza=%s timed out after %s seconds.",
+                            name,
+                            self._timeout,
+                        )
+                        collected[name] = StanzaResult(
+                            name, self.TIMEOUT, None, now - start
+                        )
+                        handles[name].revoke()
+                        # take over stanzas of the blocked thread
+                        spawn()
+        finally:
+            for handle in handles.values():
+                # threads started by collect functions may still hold handles
+                handle.revoke()
+        return [collected[name] for name in stanza_names]
+
+    def _wait_time(self, started, collected):
+        if self._timeout is None:
+            return None
+        deadlines = [
+            start + self._timeout
+            for name, start in list(started.items())
+            if name not in collected
+        ]
+        if not deadlines:
+            return self._timeout
+        return max(0, min(deadlines) - time.time())
@@ -0,0 +1,287 @@
+#
+# Copyright 2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Conditional request cache of HTTP GET responses.
+
+Responses with ``ETag`` or ``Last-Modified`` are kept per URL, query
+parameters and request headers. Requests for them are sent with
+``If-None-Match``/``If-Modified-Since``, and a ``304 Not Modified`` is
+answered with the cached response.
+
+Responses kept in a directory are encrypted when a Fernet key is given,
+e.g. the key of ``GlobalConfigSnapshot``, and are plaintext otherwise.
+"""
+
+
+import base64
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import requests
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    # responses are only kept in memory without cryptography if a key is given
+    Fernet = None
+    InvalidToken = ValueError
+
+__all__ = ["HTTPCache"]
+
+_UNCACHED_HEADERS = (
+    # describe the encoded body, while the cached body is decoded
+    "content-encoding",
+    "content-length",
+    "transfer-encoding",
+    # session of the client, not part of the resource
+    "set-cookie",
+)
+
+
+class HTTPCache:
+    """
+    Size bounded LRU cache in memory, optionally backed by a directory.
+
+    Usage::
+    >>> cache = HTTPCache(cache_dir)
+    >>> key = cache.make_key(url, params, headers)
+    >>> headers.update(cache.conditional_headers(key))
+    >>> response = cache.resolve(key, session.get(url, ...))
+    """
+
+    MAX_ENTRIES = 256
+    MAX_BYTES = 16 * 1024 * 1024
+    MAX_DISK_BYTES = 64 * 1024 * 1024
+
+    def __init__(
+        self,
+        cache_dir=None,
+        max_entries=MAX_ENTRIES,
+        max_bytes=MAX_BYTES,
+        max_disk_bytes=MAX_DISK_BYTES,
+        key=None,
+    ):
+        """
+
+        :param cache_dir: directory to keep responses across runs, in
+            memory only if None.
+        :param max_entries: max responses kept in memory.
+        :param max_bytes: max total size of responses kept in memory.
+        :param max_disk_bytes: max total size of responses in cache_dir.
+        :param key: Fernet key to encrypt responses in cache_dir. They are
+            written in plaintext if None, and only kept in memory if the
+            key is given but ``cryptography`` is not available.
+        """
+        self._fernet = Fernet(key) if key is not None and Fernet else None
+        if key is not None and self._fernet is None:
+            cache_dir = None
+        self._cache_dir = cache_dir
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(url, params=None, headers=None):
+        """
+        :return: cache key of a GET request.
+        """
+        if isinstance(params, dict):
+            params = sorted((str(k), str(v)) for k, v in params.items())
+        elif isinstance(params, bytes):
+            params = params.decode("utf-8", "replace")
+        headers = sorted((str(k).lower(), str(v)) for k, v in (headers or {}).items())
+        digest = hashlib.sha256(
+            json.dumps([url, params, headers], default=str).encode("utf-8")
+        )
+        return digest.hexdigest()
+
+    def conditional_headers(self, key):
+        """
+        :return: `dict` of validator headers for the cached response, empty
+            if the response is not cached.
+        """
+        entry = self._get(key)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def resolve(self, key, response):
+        """
+        Answer a 304 response with the cached response, or cache a 200
+        response with validators.
+
+        :return: ``requests.Response``, with ``from_cache`` True if it is
+            the cached one.
+        """
+        if response.status_code == 304:
+            entry = self._get(key)
+            if entry is not None:
+                return self._to_response(entry, response)
+        elif response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self._put(
+                    key,
+                    {
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "url": response.url,
+                        "headers": {
+                            k: v
+                            for k, v in response.headers.items()
+                            if k.lower() not in _UNCACHED_HEADERS
+                        },
+                        "encoding": response.encoding,
+                        "content": response.content,
+                    },
+                )
+        response.from_cache = False
+        return response
+
+    def _to_response(self, entry, not_modified):
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers.update(entry["headers"])
+        # headers of 304 response, e.g. new expiration, take precedence
+        response.headers.update(not_modified.headers)
+        response.url = entry["url"] or not_modified.url
+        response.encoding = entry["encoding"]
+        response._content = entry["content"]
+        response.request = not_modified.request
+        response.elapsed = not_modified.elapsed
+        response.from_cache = True
+        return response
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = self._load(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def _put(self, key, entry):
+        self._remember(key, entry)
+        self._save(key, entry)
+
+    def _remember(self, key, entry):
+        size = len(entry["content"])
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous["content"])
+            self._entries[key] = entry
+            self._bytes += size
+            while (
+                len(self._entries) > self._max_entries or self._bytes > self._max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted["content"])
+
+    def _path(self, key):
+        return os.path.join(self._cache_dir, key + ".cache")
+
+    def _load(self, key):
+        if not self._cache_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            if self._fernet is not None:
+                data = self._fernet.decrypt(data)
+            entry = json.loads(data)
+            entry["content"] = base64.b64decode(entry["content"])
+        except (OSError, ValueError, KeyError, TypeError, InvalidToken):
+            return None
+        try:
+            # keep recently used entries from eviction
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return entry
+
+    def _save(self, key, entry):
+        if not self._cache_dir or len(entry["content"]) > self._max_disk_bytes:
+            return
+        data = dict(entry)
+        data["content"] = base64.b64encode(entry["content"]).decode("ascii")
+        data = json.dumps(data).encode("utf-8")
+        if self._fernet is not None:
+            data = self._fernet.encrypt(data)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, prefix=".http")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key))
+            except Exception:
+                os.remove(tmp_path)
+                raise
+        except OSError:
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """
+        Remove least recently used files until total size is under limit.
+        """
+        files = []
+        total = 0
+        try:
+            names = os.listdir(self._cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".cache"):
+                continue
+            path = os.path.join(self._cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self._max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,254 @@
+#
+# Copyright 2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Pagination of HTTP APIs.
+
+A paging strategy tells the request of the next page from the request
+and response of the current page, and a records function extracts the
+records of a page. ``paginate`` fetches the next page while records of
+the current page are processed.
+"""
+
+
+import json
+import threading
+import weakref
+
+__all__ = [
+    "paginate",
+    "Paging",
+    "LinkHeaderPaging",
+    "CursorPaging",
+    "OffsetPaging",
+    "json_records",
+    "line_records",
+    "response_json",
+]
+
+# parsed bodies, kept outside responses which may not take new attributes
+_parsed = weakref.WeakKeyDictionary()
+_parsed_lock = threading.Lock()
+
+
+def response_json(response):
+    """
+    JSON body of response, parsed once even if both the paging strategy
+    and the records function need it.
+    """
+    with _parsed_lock:
+        try:
+            return _parsed[response]
+        except KeyError:
+            pass
+    content = response.json()
+    with _parsed_lock:
+        _parsed[response] = content
+    return content
+
+
+def _lookup(content, path):
+    if path is None:
+        return content
+    if isinstance(path, str):
+        path = path.split(".")
+    for key in path:
+        if content is None:
+            return None
+        if isinstance(content, list):
+            content = content[int(key)]
+        else:
+            content = content.get(key)
+    return content
+
+
+class Paging:
+    """
+    Base paging strategy.
+    """
+
+    def prepare(self, request):
+        """
+        :return: request of the first page.
+        """
+        return request
+
+    def next_request(self, request, response):
+        """
+        :return: request of the next page, None if it is the last page.
+        """
+        raise NotImplementedError()
+
+
+class LinkHeaderPaging(Paging):
+    """
+    Follow the "next" URL of the ``Link`` response header. The body of
+    pages is not needed, so records of pages can be streamed.
+    """
+
+    def __init__(self, rel="next"):
+        self._rel = rel
+
+    def next_request(self, request, response):
+        url = response.links.get(self._rel, {}).get("url")
+        if not url:
+            return None
+        # the link includes query parameters
+        return dict(request, url=url, parameters=None)
+
+
+class CursorPaging(Paging):
+    """
+    Send the cursor found in the body of a page as a query parameter.
+    """
+
+    def __init__(self, cursor_path, cursor_param="cursor"):
+        """
+
+        :param cursor_path: dotted path of the cursor in the JSON body,
+            e.g. "meta.next_cursor".
+        :param cursor_param: query parameter of the cursor.
+        """
+        self._cursor_path = cursor_path
+        self._cursor_param = cursor_param
+
+    def next_request(self, request, response):
+        cursor = _lookup(response_json(response), self._cursor_path)
+        if not cursor:
+            return None
+        parameters = dict(request.get("parameters") or {})
+        parameters[self._cursor_param] = cursor
+        return dict(request, parameters=parameters)
+
+
+class OffsetPaging(Paging):
+    """
+    Send offset and limit query parameters, until a page is not full.
+    """
+
+    def __init__(
+        self,
+        limit,
+        records_path=None,
+        offset_param="offset",
+        limit_param="limit",
+        start=0,
+    ):
+        """
+
+        :param limit: records per page.
+        :param records_path: dotted path of records in the JSON body.
+        :param offset_param: query parameter of the offset.
+        :param limit_param: query parameter of the limit.
+        :param start: offset of the first page.
+        """
+        self._limit = limit
+        self._records_path = records_path
+        self._offset_param = offset_param
+        self._limit_param = limit_param
+        self._start = start
+
+    def prepare(self, request):
+        parameters = dict(request.get("parameters") or {})
+        parameters.setdefault(self._offset_param, self._start)
+        parameters.setdefault(self._limit_param, self._limit)
+        return dict(request, parameters=parameters)
+
+    def next_request(self, request, response):
+        records = _lookup(response_json(response), self._records_path) or []
+        if len(records) < self._limit:
+            return None
+        parameters = dict(request["parameters"])
+        offset = int(parameters[self._offset_param]) + len(records)
+        parameters[self._offset_param] = offset
+        return dict(request, parameters=parameters)
+
+
+def json_records(path=None):
+    """
+    :param path: dotted path of records in the JSON body, the body is a
+        list of records if None.
+    :return: records function of JSON pages.
+    """
+
+    def records(response):
+        return _lookup(response_json(response), path) or []
+
+    return records
+
+
+def line_records(parse=json.loads):
+    """
+    Records function of newline delimited pages, e.g. NDJSON. Lines are
+    read as they are received when pages are requested with stream=True.
+
+    :param parse: function to parse a line, None to yield lines as is.
+    """
+
+    def records(response):
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield parse(line) if parse else line
+
+    return records
+
+
+def paginate(send, request, paging, records=None, executor=None):
+    """
+    Iterate over pages or their records.
+
+    :param send: function sending a request, called as ``send(**request)``.
+    :param request: `dict` of arguments of the first request.
+    :param paging: ``Paging`` strategy.
+    :param records: function to extract records of a page, pages are
+        yielded if None.
+    :param executor: ``concurrent.futures.Executor`` to fetch the next page
+        while the current one is processed, no prefetch if None.
+    :return: generator of records or responses.
+    """
+    request = paging.prepare(request)
+    pending = None
+    try:
+        response = send(**request)
+        while response is not None:
+            response.raise_for_status()
+            next_request = paging.next_request(request, response)
+            if next_request is not None and executor is not None:
+                pending = executor.submit(send, **next_request)
+            try:
+                if records is None:
+                    yield response
+                else:
+                    yield from records(response)
+            finally:
+                response.close()
+
+            if next_request is None:
+                response = None
+            elif pending is not None:
+                response, pending = pending.result(), None
+            else:
+                response = send(**next_request)
+            request = next_request
+    finally:
+        # the caller stops iterating
+        if pending is not None and not pending.cancel():
+            pending.add_done_callback(_close_response)
+
+
+def _close_response(future):
+    if future.exception() is None:
+        future.result().close()
@@ -0,0 +1,244 @@
+#
+# Copyright 2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Per-host token bucket rate limiter for HTTP requests.
+
+Requests to a host take a token from the bucket of the host, which is
+refilled at ``rate`` tokens per second up to ``burst`` tokens. Hosts are
+also paused as told by ``Retry-After`` and ``X-RateLimit-*`` headers.
+The state of buckets can be shared by processes of a TA through files
+in a directory.
+"""
+
+
+import email.utils
+import json
+import os
+import threading
+import time
+import urllib.parse
+
+try:
+    import fcntl
+except ImportError:
+    # sharing state between processes is only supported on POSIX
+    fcntl = None
+
+__all__ = [
+    "RateLimiter",
+    "RateLimitExceeded",
+]
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+def _reserve(state, now, rate, burst):
+    """
+    Take a token.
+
+    :param state: (tokens, updated, blocked_until)
+    :return: new state and seconds to wait before retrying, 0 if a token
+        is taken.
+    """
+    tokens, updated, blocked_until = state
+    if now < blocked_until:
+        return state, blocked_until - now
+    if rate is None:
+        return state, 0
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now, blocked_until), 0
+    return (tokens, now, blocked_until), (1 - tokens) / rate
+
+
+class _MemoryStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def update(self, host, default, func):
+        with self._lock:
+            state, result = func(self._states.get(host, default))
+            self._states[host] = state
+        return result
+
+
+class _FileStore:
+    """
+    State of each host in a JSON file, updated under an exclusive lock.
+    """
+
+    def __init__(self, state_dir):
+        self._state_dir = state_dir
+        # flock does not exclude threads of one process sharing the file
+        self._lock = threading.Lock()
+        os.makedirs(state_dir, exist_ok=True)
+
+    def update(self, host, default, func):
+        path = os.path.join(
+            self._state_dir, urllib.parse.quote(host, safe="") + ".ratelimit"
+        )
+        with self._lock, open(path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = tuple(json.loads(f.read()))
+                except ValueError:
+                    state = default
+                state, result = func(state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return result
+
+
+class RateLimiter:
+    """
+    Per-host token bucket rate limiter.
+
+    Usage::
+    >>> limiter = RateLimiter(rate=10, burst=20)
+    >>> limiter.acquire(url)
+    >>> response = session.get(url)
+    >>> limiter.update(url, response)
+    """
+
+    def __init__(
+        self,
+        rate=None,
+        burst=None,
+        host_rates=None,
+        state_dir=None,
+        max_wait=None,
+    ):
+        """
+
+        :param rate: requests per second to each host, only rate limit
+            headers are honored if None.
+        :param burst: max requests sent at once, ``rate`` by default.
+        :param host_rates: `dict` of host to (rate, burst), for hosts with
+            other limits.
+        :param state_dir: directory to share state of buckets between
+            processes, state is kept in memory if None or on platforms
+            without ``fcntl``.
+        :param max_wait: raise ``RateLimitExceeded`` instead of waiting
+            longer than so many seconds, no limit if None.
+        """
+        self._rate = rate
+        self._burst = burst
+        self._host_rates = {
+            host.lower(): value for host, value in (host_rates or {}).items()
+        }
+        self._max_wait = max_wait
+        if state_dir and fcntl is not None:
+            self._store = _FileStore(state_dir)
+        else:
+            self._store = _MemoryStore()
+
+    @staticmethod
+    def _host(url):
+        return urllib.parse.urlsplit(url).netloc.lower()
+
+    def _limits(self, host):
+        rate, burst = self._host_rates.get(host, (self._rate, self._burst))
+        if rate is None:
+            return None, None
+        return rate, max(1, burst if burst is not None else rate)
+
+    def acquire(self, url):
+        """
+        Wait until a request to the host of url can be sent.
+        """
+        host = self._host(url)
+        rate, burst = self._limits(host)
+        default = (burst or 0, 0.0, 0.0)
+        waited = 0
+        while True:
+            wait = self._store.update(
+                host,
+                default,
+                lambda state: _reserve(state, time.time(), rate, burst),
+            )
+            if not wait:
+                return
+            if self._max_wait is not None and waited + wait > self._max_wait:
+                raise RateLimitExceeded(
+                    "Rate limit of {} exceeded, retry in {:.1f} seconds".format(
+                        host, wait
+                    )
+                )
+            time.sleep(wait)
+            waited += wait
+
+    def update(self, url, response):
+        """
+        Pause the host of url as told by rate limit headers of response.
+        """
+        now = time.time()
+        headers = response.headers
+        blocked_until = None
+
+        retry_after = headers.get("Retry-After")
+        if retry_after and response.status_code in (429, 503):
+            blocked_until = self._parse_retry_after(retry_after, now)
+
+        remaining = self._parse_float(headers.get("X-RateLimit-Remaining"))
+        if remaining is not None and remaining < 1:
+            reset = self._parse_float(headers.get("X-RateLimit-Reset"))
+            if reset is not None:
+                # either epoch seconds or seconds from now
+                reset = reset if reset > now / 2 else now + reset
+                blocked_until = max(blocked_until or 0, reset)
+
+        if blocked_until is None and remaining is None:
+            return
+
+        host = self._host(url)
+        rate, burst = self._limits(host)
+
+        def _apply(state):
+            tokens, updated, until = state
+            if remaining is not None and rate is not None:
+                # the server knows requests of all clients
+                tokens = min(burst, tokens + (now - updated) * rate, remaining)
+                updated = now
+            return (tokens, updated, max(until, blocked_until or 0)), None
+
+        self._store.update(host, (burst or 0, 0.0, 0.0), _apply)
+
+    @staticmethod
+    def _parse_float(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def _parse_retry_after(cls, value, now):
+        seconds = cls._parse_float(value)
+        if seconds is not None:
+            return now + seconds
+        try:
+            return email.utils.parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            return None
@@ -14,23 +14,155 @@
 # limitations under the License.
 #
 
+import asyncio
+import collections
+import contextvars
+import functools
+import threading
+import urllib.parse
+from concurrent import futures
+
 import requests
 
+from splunktaucclib.splunk_aoblib import pagination
+
+# result of one request of send_http_requests, error is None on success
+HTTPResult = collections.namedtuple("HTTPResult", ("request", "response", "error"))
+
+
+class _HostQueue:
+    """
+    Requests grouped by host, to start at most ``limit`` requests to one
+    host at a time. Requests wait here instead of in pool threads, so
+    requests to a busy host do not hold up requests to other hosts.
+    """
+
+    def __init__(self, http_requests, limit):
+        self._limit = limit
+        self._queues = collections.OrderedDict()
+        self._running = collections.Counter()
+        for request in http_requests:
+            host = urllib.parse.urlsplit(request["url"]).netloc.lower()
+            self._queues.setdefault(host, collections.deque()).append(request)
+
+    def ready(self):
+        """
+        :return: list of (host, request) which can be started now.
+        """
+        started = []
+        for host, queue in self._queues.items():
+            while queue and (self._limit is None or self._running[host] < self._limit):
+                self._running[host] += 1
+                started.append((host, queue.popleft()))
+        return started
+
+    def done(self, host):
+        self._running[host] -= 1
+
 
 class TARestHelper:
-    def __init__(self, logger=None):
+    # max concurrent requests of send_http_requests
+    MAX_WORKERS = 16
+    # max concurrent requests to one host of send_http_requests
+    HOST_MAX_CONCURRENCY = 4
+    # max connections kept alive to one host by a session
+    POOL_MAXSIZE = 16
+
+    def __init__(
+        self,
+        logger=None,
+        host_max_concurrency=HOST_MAX_CONCURRENCY,
+        rate_limiter=None,
+        http_cache=None,
+        pool_maxsize=POOL_MAXSIZE,
+        metrics=None,
+    ):
+        """
+        :param logger:
+        :param host_max_concurrency: max concurrent requests to one host
+            of ``send_http_requests``, no limit if None
+        :param rate_limiter: ``RateLimiter`` applied to all requests, or None
+        :param http_cache: ``HTTPCache`` for GET requests, or None
+        :param pool_maxsize: max connections kept alive to one host by
+            each session
+        :param metrics: ``RunMetrics`` to count requests, errors and latency,
+            or None
+        """
         self.logger = logger
+        self.rate_limiter = rate_limiter
+        self.http_cache = http_cache
+        self.metrics = metrics
+        # session used for all requests if it is set, otherwise sessions
+        # are pooled by proxy and TLS settings
         self.http_session = None
-        self.requests_proxy = None
+        self.host_max_concurrency = host_max_concurrency
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._executor = None
 
-    def _init_request_session(self, proxy_uri=None):
-        self.http_session = requests.Session()
-        self.http_session.mount("http://", requests.adapters.HTTPAdapter(max_retries=3))
-        self.http_session.mount(
-            "https://", requests.adapters.HTTPAdapter(max_retries=3)
-        )
+    def _new_session(self, proxy_uri=None, verify=True, cert=None):
+        http_session = requests.Session()
+        for prefix in ("http://", "https://"):
+            http_session.mount(
+                prefix,
+                requests.adapters.HTTPAdapter(
+                    max_retries=3, pool_maxsize=self.pool_maxsize
+                ),
+            )
         if proxy_uri:
-            self.requests_proxy = {"http": proxy_uri, "https": proxy_uri}
+            http_session.proxies = {"http": proxy_uri, "https": proxy_uri}
+        http_session.verify = verify
+        http_session.cert = cert
+        return http_session
+
+    def _get_session(self, proxy_uri=None, verify=True, cert=None):
+        """
+        Keep-alive session for requests with the proxy and TLS settings.
+        """
+        if self.http_session is not None:
+            return self.http_session
+        key = (proxy_uri, verify, tuple(cert) if isinstance(cert, list) else cert)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._new_session(proxy_uri, verify, cert)
+                self._sessions[key] = session
+        return session
+
+    def close(self):
+        """
+        Close pooled sessions and stop the thread pool.
+        """
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+            executor, self._executor = self._executor, None
+        for session in sessions:
+            session.close()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(
+                    max_workers=self.MAX_WORKERS
+                )
+        return self._executor
+
+    @staticmethod
+    def _in_context(func):
+        """
+        Run func on pool threads in the context of the caller, e.g. the
+        stanza counted by metrics.
+        """
+        context = contextvars.copy_context()
+
+        def run(*args, **kwargs):
+            # a context cannot be entered by two threads at once
+            return context.copy().run(func, *args, **kwargs)
+
+        return run
 
     def send_http_request(
         self,
@@ -44,9 +176,9 @@ class TARestHelper:
         cert=None,
         timeout=None,
         proxy_uri=None,
+        stream=False,
     ):
-        if self.http_session is None:
-            self._init_request_session(proxy_uri)
+        http_session = self._get_session(proxy_uri, verify, cert)
         requests_args = {"timeout": (10.0, 5.0), "verify": verify}
         if parameters:
             requests_args["params"] = parameters
@@ -55,6 +187,12 @@ class TARestHelper:
                 requests_args["json"] = payload
             else:
                 requests_args["data"] = str(payload)
+        cache_key = None
+        if self.http_cache is not None and method.upper() == "GET" and not stream:
+            cache_key = self.http_cache.make_key(url, parameters, headers)
+            conditional_headers = self.http_cache.conditional_headers(cache_key)
+            if conditional_headers:
+                headers = dict(headers or {}, **conditional_headers)
         if headers:
             requests_args["headers"] = headers
         if cookies:
@@ -63,6 +201,143 @@ class TARestHelper:
             requests_args["cert"] = cert
         if timeout is not None:
             requests_args["timeout"] = timeout
-        if self.requests_proxy:
-            requests_args["proxies"] = self.requests_proxy
-        return self.http_session.request(method, url, **requests_args)
+        if proxy_uri:
+            requests_args["proxies"] = {"http": proxy_uri, "https": proxy_uri}
+        if stream:
+            requests_args["stream"] = True
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        if self.metrics is None:
+            response = http_session.request(method, url, **requests_args)
+        else:
+            response = self._metered_request(http_session, method, url, requests_args)
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(url, response)
+        if cache_key is not None:
+            response = self.http_cache.resolve(cache_key, response)
+        return response
+
+    def _metered_request(self, http_session, method, url, requests_args):
+        self.metrics.count("http_requests")
+        try:
+            with self.metrics.timer("http_latency"):
+                response = http_session.request(method, url, **requests_args)
+        except Exception:
+            self.metrics.count("http_errors")
+            raise
+        if not response.ok:
+            self.metrics.count("http_errors")
+        return response
+
+    def _send(self, request, proxy_uri=None):
+        try:
+            response = self.send_http_request(proxy_uri=proxy_uri, **request)
+        except Exception as e:
+            return HTTPResult(request, None, e)
+        return HTTPResult(request, response, None)
+
+    def send_http_requests(self, http_requests, proxy_uri=None):
+        """
+        Send requests concurrently, with at most ``host_max_concurrency``
+        requests to one host at a time.
+
+        :param http_requests: iterable of dict of ``send_http_request`` arguments,
+            e.g. {"url": url, "method": "GET"}.
+        :param proxy_uri: proxy used by all requests.
+        :return: generator of ``HTTPResult`` in completion order.
+        """
+        executor = self._get_executor()
+        queue = _HostQueue(http_requests, self.host_max_concurrency)
+        running = {}
+
+        send = self._in_context(self._send)
+
+        def start():
+            for host, request in queue.ready():
+                running[executor.submit(send, request, proxy_uri)] = host
+
+        try:
+            start()
+            while running:
+                done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    queue.done(running.pop(future))
+                # start next requests before the caller processes results
+                start()
+                for future in done:
+                    yield future.result()
+        finally:
+            # the caller stops iterating
+            for future in running:
+                future.cancel()
+
+    def paginate(self, request, paging, records=None, prefetch=True, proxy_uri=None):
+        """
+        Iterate over pages of an API, see ``pagination.paginate``.
+
+        :param request: `dict` of ``send_http_request`` arguments of the
+            first page, e.g. {"url": url, "method": "GET"}.
+        :param paging: ``pagination.Paging`` strategy.
+        :param records: function to extract records of a page, e.g.
+            ``pagination.json_records("items")``, pages are yielded if None.
+        :param prefetch: whether the next page is fetched while the current
+            one is processed.
+        :param proxy_uri: proxy used by all requests.
+        :return: generator of records or responses.
+        """
+        return pagination.paginate(
+            self._in_context(
+                functools.partial(self.send_http_request, proxy_uri=proxy_uri)
+            ),
+            request,
+            paging,
+            records=records,
+            executor=self._get_executor() if prefetch else None,
+        )
+
+    async def send_http_request_async(self, url, method, **kwargs):
+        """
+        Awaitable ``send_http_request``, run on a thread pool.
+
+        :return: Response
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            self._in_context(
+                functools.partial(self.send_http_request, url, method, **kwargs)
+            ),
+        )
+
+    async def send_http_requests_async(self, http_requests, proxy_uri=None):
+        """
+        Async version of ``send_http_requests``.
+
+        :return: async generator of ``HTTPResult`` in completion order.
+        """
+        loop = asyncio.get_event_loop()
+        executor = self._get_executor()
+        queue = _HostQueue(http_requests, self.host_max_concurrency)
+        running = {}
+
+        send = self._in_context(self._send)
+
+        def start():
+            for host, request in queue.ready():
+                future = loop.run_in_executor(executor, send, request, proxy_uri)
+                running[future] = host
+
+        try:
+            start()
+            while running:
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    queue.done(running.pop(future))
+                start()
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in running:
+                future.cancel()
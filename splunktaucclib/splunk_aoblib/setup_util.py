@@ -19,7 +19,7 @@ import os
 
 import solnlib.utils as utils
 
-from splunktaucclib.global_config import GlobalConfig, GlobalConfigSchema
+from splunktaucclib.global_config import GlobalConfig, load_global_config_schema
 
 """
 Usage Examples:
@@ -78,6 +78,8 @@ UCC_PROXY = "proxy"
 UCC_LOGGING = "logging"
 UCC_CUSTOMIZED = "additional_parameters"
 UCC_CREDENTIAL = "account"
+UCC_CONFIGS = "configs"
+UCC_SETTINGS = "settings"
 
 CONFIGS = [CREDENTIAL_SETTINGS]
 SETTINGS = [PROXY_SETTINGS, LOG_SETTINGS, CUSTOMIZED_SETTINGS]
@@ -107,8 +109,9 @@ def get_schema_path():
 
 
 class Setup_Util:
-    def __init__(self, uri, session_key, logger=None):
+    def __init__(self, uri, session_key, logger=None, compiled_schema=False):
         self.__uri = uri
+        self.__compiled_schema = compiled_schema
         self.__session_key = session_key
         self.__logger = logger
         self.scheme, self.host, self.port = utils.extract_http_scheme_host_port(
@@ -116,6 +119,7 @@ class Setup_Util:
         )
         self.__cached_global_settings = {}
         self.__global_config = None
+        self.__preloaded = {}
 
     def init_global_config(self):
         if self.__global_config is not None:
@@ -125,14 +129,41 @@ class Setup_Util:
             self.log_error("Global config JSON file not found!")
             self.__global_config = None
         else:
-            with open(get_schema_path()) as f:
-                json_schema = "".join([l for l in f])
             self.__global_config = GlobalConfig(
                 self.__uri,
                 self.__session_key,
-                GlobalConfigSchema(json.loads(json_schema)),
+                load_global_config_schema(schema_file, compiled=self.__compiled_schema),
             )
 
+    def preload(self, configs=None, settings=None):
+        """
+        Use configs and settings which are already loaded, e.g. from a
+        global config snapshot, instead of loading them over REST.
+
+        :param configs: return of ``GlobalConfig.configs.load``
+        :param settings: return of ``GlobalConfig.settings.load``
+        """
+        if configs is not None:
+            self.__preloaded[UCC_CONFIGS] = configs
+        if settings is not None:
+            self.__preloaded[UCC_SETTINGS] = settings
+
+    def _load_ucc_configs(self):
+        if UCC_CONFIGS in self.__preloaded:
+            return self.__preloaded[UCC_CONFIGS]
+        self.init_global_config()
+        if self.__global_config is None:
+            return None
+        return self.__global_config.configs.load()
+
+    def _load_ucc_settings(self):
+        if UCC_SETTINGS in self.__preloaded:
+            return self.__preloaded[UCC_SETTINGS]
+        self.init_global_config()
+        if self.__global_config is None:
+            return None
+        return self.__global_config.settings.load()
+
     def log_error(self, msg):
         if self.__logger:
             self.__logger.error(msg)
@@ -196,18 +227,20 @@ class Setup_Util:
     def _parse_conf_from_global_config(self, key):
         if self.__cached_global_settings and key in self.__cached_global_settings:
             return self.__cached_global_settings.get(key)
-        self.init_global_config()
-        if self.__global_config is None:
-            return None
         if key in CONFIGS:
-            accounts = self.__global_config.configs.load().get(UCC_CREDENTIAL, [])
-            if accounts:
-                for account in accounts:
-                    if "disabled" in account:
-                        del account["disabled"]
+            configs = self._load_ucc_configs()
+            if configs is None:
+                return None
+            # copy accounts, which may be shared with loaded inputs
+            accounts = [
+                {k: v for k, v in account.items() if k != "disabled"}
+                for account in configs.get(UCC_CREDENTIAL, [])
+            ]
             self.__cached_global_settings[CREDENTIAL_SETTINGS] = accounts
         elif key in SETTINGS:
-            settings = self.__global_config.settings.load()
+            settings = self._load_ucc_settings()
+            if settings is None:
+                return None
             self.__cached_global_settings.update(
                 {UCC_PROXY: None, UCC_LOGGING: None, UCC_CUSTOMIZED: None}
             )
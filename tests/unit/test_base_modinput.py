@@ -0,0 +1,436 @@
+import copy
+import json
+import signal
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from splunktaucclib.modinput_wrapper import base_modinput
+from splunktaucclib.modinput_wrapper.base_modinput import BaseModInput
+
+
+class DemoInput(BaseModInput):
+    def get_app_name(self):
+        return "Splunk_TA_test"
+
+    def get_account_fields(self):
+        return ["account"]
+
+    def get_checkbox_fields(self):
+        return []
+
+    def get_global_checkbox_fields(self):
+        return []
+
+
+@pytest.fixture
+def modinput():
+    with patch.object(base_modinput, "Logs"):
+        modinput = DemoInput("ta_test", "demo_input")
+    modinput.setup_util = MagicMock()
+    return modinput
+
+
+def test_resolved_global_config_uses_snapshot(modinput, tmp_path, monkeypatch):
+    fernet = pytest.importorskip("cryptography.fernet")
+    key = fernet.Fernet.generate_key()
+    monkeypatch.setattr(
+        base_modinput.GlobalConfigSnapshot, "make_key", staticmethod(lambda app: key)
+    )
+    monkeypatch.setattr(modinput, "_get_global_config_path", lambda: __file__)
+    global_config = MagicMock()
+    global_config.configs.load.return_value = {"account": [{"name": "acc1"}]}
+    global_config.inputs.load.return_value = {"demo_input": [{"name": "in1"}]}
+    global_config.settings.load.return_value = {"settings": []}
+    monkeypatch.setattr(base_modinput, "load_global_config_schema", MagicMock())
+    monkeypatch.setattr(
+        base_modinput, "GlobalConfig", MagicMock(return_value=global_config)
+    )
+    modinput.use_config_snapshot = True
+    metadata = {
+        "server_uri": "https://127.0.0.1:8089",
+        "session_key": "key",
+        "checkpoint_dir": str(tmp_path),
+    }
+
+    first = modinput._load_resolved_global_config(metadata)
+    second = modinput._load_resolved_global_config(metadata)
+
+    assert first == second
+    global_config.inputs.load.assert_called_once()
+    modinput.setup_util.preload.assert_called_with(
+        {"account": [{"name": "acc1"}]}, {"settings": []}
+    )
+
+
+def test_write_events(modinput):
+    ew = MagicMock(header_written=True)
+
+    count = modinput.write_events(ew, ["e1", "e2"], index="main")
+
+    assert count == 2
+    ew._out.write.assert_called_once_with(
+        '<event unbroken="1"><index>main</index><data>e1</data><done /></event>'
+        '<event unbroken="1"><index>main</index><data>e2</data><done /></event>'
+    )
+
+
+def test_checkpoint_cache_is_flushed_after_collect(modinput, monkeypatch):
+    kvstore = MagicMock()
+    monkeypatch.setattr(
+        base_modinput.checkpointer,
+        "KVStoreCheckpointer",
+        MagicMock(return_value=kvstore),
+    )
+    monkeypatch.setattr(base_modinput, "Setup_Util", MagicMock())
+    monkeypatch.setattr(base_modinput.atexit, "register", MagicMock())
+    monkeypatch.setattr(modinput, "_handle_sigterm", MagicMock())
+    monkeypatch.setattr(modinput, "parse_input_args", MagicMock())
+    modinput.use_checkpoint_cache = True
+    modinput.input_stanzas = {"in1": {}}
+
+    def collect_events(ew):
+        modinput.save_check_point("k", 1)
+        modinput.save_check_point("k", 2)
+        kvstore.batch_update.assert_not_called()
+
+    modinput.collect_events = collect_events
+    inputs = MagicMock()
+    inputs.metadata = {"server_uri": "https://127.0.0.1:8089", "session_key": "key"}
+    inputs.inputs = {}
+
+    modinput.stream_events(inputs, MagicMock())
+
+    kvstore.batch_update.assert_called_once_with([{"_key": "k", "state": 2}])
+
+
+def test_collect_stanza_events_runs_each_stanza(modinput):
+    collected = []
+
+    class StanzaInput(DemoInput):
+        def collect_stanza_events(self, input_stanza_name, event_writer):
+            if input_stanza_name == "bad":
+                raise ValueError()
+            collected.append(input_stanza_name)
+
+    with patch.object(base_modinput, "Logs"):
+        stanza_input = StanzaInput("ta_test", "demo_input", use_single_instance=True)
+    stanza_input.input_stanzas = {"in1": {}, "in2": {}}
+
+    results = stanza_input.collect_events(MagicMock())
+
+    assert sorted(collected) == ["in1", "in2"]
+    assert [r.name for r in results] == ["in1", "in2"]
+
+    stanza_input.input_stanzas["bad"] = {}
+    with pytest.raises(RuntimeError, match="bad"):
+        stanza_input.collect_events(MagicMock())
+
+
+def test_proxy_uri_is_resolved_once(modinput):
+    modinput.setup_util.get_proxy_settings.return_value = {
+        "proxy_url": "proxy.test",
+        "proxy_port": "3128",
+        "proxy_type": "http",
+    }
+    modinput.rest_helper.http_session = MagicMock()
+
+    modinput.send_http_request("https://a.test/", "GET")
+    modinput.send_http_request("https://a.test/", "GET", use_proxy=False)
+    modinput.send_http_request("https://a.test/", "GET")
+
+    modinput.setup_util.get_proxy_settings.assert_called_once()
+    proxies = [
+        c.kwargs.get("proxies")
+        for c in modinput.rest_helper.http_session.request.call_args_list
+    ]
+    assert proxies == [
+        {"http": "http://proxy.test:3128", "https": "http://proxy.test:3128"},
+        None,
+        {"http": "http://proxy.test:3128", "https": "http://proxy.test:3128"},
+    ]
+
+
+def test_stanzas_share_read_only_accounts(modinput, monkeypatch):
+    account = {"name": "acc1", "username": "admin"}
+    monkeypatch.setattr(
+        modinput,
+        "_load_resolved_global_config",
+        lambda metadata: {
+            "inputs": {
+                "demo_input": [
+                    {"name": "in1", "account": dict(account)},
+                    {"name": "in2", "account": dict(account)},
+                ]
+            }
+        },
+    )
+    inputs = MagicMock()
+    inputs.inputs = {"demo_input://in1": {}, "demo_input://in2": {}}
+    modinput.use_single_instance = True
+
+    modinput.parse_input_args(inputs)
+
+    shared = modinput.get_arg("account", "in1")
+    assert modinput.get_arg("account", "in2") is shared
+    assert shared == account
+    assert json.loads(json.dumps(shared)) == account
+    with pytest.raises(TypeError):
+        shared["username"] = "root"
+    copied = copy.deepcopy(shared)
+    copied["username"] = "root"
+    assert shared["username"] == "admin"
+
+
+def test_parse_input_args_from_env_keeps_inputs(modinput, monkeypatch):
+    monkeypatch.setenv(base_modinput.AOB_TEST_FLAG, "true")
+    modinput.get_user_credential_by_id = lambda name: {"name": name}
+    inputs = MagicMock()
+    inputs.inputs = {
+        "demo_input://in1": {"account": "acc1"},
+        "demo_input://in2": {"account": "acc1"},
+    }
+    modinput.use_single_instance = True
+
+    modinput.parse_input_args(inputs)
+
+    assert len(inputs.inputs) == 2
+    assert list(modinput.input_stanzas) == ["in2", "in1"]
+    assert modinput.get_arg("account", "in1") is modinput.get_arg("account", "in2")
+
+
+def test_sharded_check_point_is_flushed_after_collect(modinput, monkeypatch):
+    kvstore = MagicMock()
+    kvstore.get.return_value = None
+    monkeypatch.setattr(
+        base_modinput.checkpointer,
+        "KVStoreCheckpointer",
+        MagicMock(return_value=kvstore),
+    )
+    monkeypatch.setattr(base_modinput, "Setup_Util", MagicMock())
+    monkeypatch.setattr(modinput, "parse_input_args", MagicMock())
+    modinput.input_stanzas = {"in1": {}}
+
+    def collect_events(ew):
+        devices = modinput.get_sharded_check_point("devices", shards=4)
+        assert modinput.get_sharded_check_point("devices") is devices
+        devices.update("d1", 1)
+        devices.update("d2", 2)
+        kvstore.batch_update.assert_not_called()
+
+    modinput.collect_events = collect_events
+    inputs = MagicMock()
+    inputs.metadata = {"server_uri": "https://127.0.0.1:8089", "session_key": "key"}
+    inputs.inputs = {}
+
+    modinput.stream_events(inputs, MagicMock())
+
+    kvstore.batch_update.assert_called_once()
+    (states,) = kvstore.batch_update.call_args[0]
+    assert {state["_key"] for state in states} <= {
+        f"devices.shard{i}" for i in range(4)
+    }
+
+
+def test_dedup_filter_is_saved_in_checkpoint_dir(modinput, tmp_path):
+    modinput.context_meta = {"checkpoint_dir": str(tmp_path)}
+    modinput.enable_dedup()
+    ew = MagicMock()
+    ew.header_written = True
+
+    assert modinput.write_events(ew, ["a", "b", "a"]) == 2
+    modinput._close_check_point()
+
+    assert (tmp_path / "dedup" / "demo_input").exists()
+    modinput.enable_dedup()
+    assert modinput.write_events(ew, ["a", "c"]) == 1
+
+
+def test_metrics_are_logged_once_per_run(modinput, monkeypatch):
+    monkeypatch.setattr(base_modinput, "Setup_Util", MagicMock())
+    monkeypatch.setattr(modinput, "parse_input_args", MagicMock())
+    monkeypatch.setattr(modinput, "_init_ckpt", MagicMock())
+    modinput.ckpt = MagicMock()
+    modinput.input_stanzas = {"in1": {}}
+    modinput.rest_helper.http_session = MagicMock()
+    modinput.rest_helper.http_session.request.return_value.ok = False
+
+    def collect_events(ew):
+        modinput.get_check_point("k")
+        modinput.save_check_point("k", 1)
+        modinput.send_http_request("https://a.test/", "GET", use_proxy=False)
+        modinput.write_events(ew, ["e1", "e2"])
+
+    modinput.collect_events = collect_events
+    inputs = MagicMock()
+    inputs.metadata = {"server_uri": "https://127.0.0.1:8089", "session_key": "key"}
+    inputs.inputs = {}
+    log_info = MagicMock()
+    monkeypatch.setattr(modinput, "log_info", log_info)
+
+    modinput.stream_events(inputs, MagicMock(header_written=True))
+
+    (message,) = (
+        c.args[0]
+        for c in log_info.call_args_list
+        if c.args[0].startswith("Collection metrics: ")
+    )
+    metrics = json.loads(message[len("Collection metrics: ") :])
+    assert metrics["input_type"] == "demo_input"
+    assert metrics["events"] == 2
+    assert metrics["bytes"] > 0
+    assert metrics["http_requests"] == metrics["http_errors"] == 1
+    for name in ("collect", "http_latency", "checkpoint_read", "checkpoint_write"):
+        assert metrics[name]["count"] == 1
+
+
+@pytest.fixture
+def daemon_input(monkeypatch):
+    collected = []
+
+    class StanzaInput(DemoInput):
+        def collect_stanza_events(self, input_stanza_name, event_writer):
+            collected.append(input_stanza_name)
+            if collected.count("fast") >= 3:
+                self.stop_daemon()
+
+    with patch.object(base_modinput, "Logs"):
+        daemon_input = StanzaInput(
+            "ta_test", "demo_input", use_single_instance=True, use_daemon_mode=True
+        )
+    daemon_input.collected = collected
+    daemon_input.DAEMON_CONFIG_CHECK_INTERVAL = 0
+    monkeypatch.setattr(base_modinput, "Setup_Util", MagicMock())
+    monkeypatch.setattr(daemon_input, "_handle_daemon_sigterm", MagicMock())
+    monkeypatch.setattr(daemon_input, "_close_check_point", MagicMock())
+    return daemon_input
+
+
+def _daemon_inputs():
+    inputs = MagicMock()
+    inputs.metadata = {"server_uri": "https://127.0.0.1:8089", "session_key": "key"}
+    inputs.inputs = {}
+    return inputs
+
+
+def test_daemon_collects_stanzas_at_their_intervals(daemon_input, monkeypatch):
+    def parse_input_args(inputs):
+        daemon_input.input_stanzas = {
+            "fast": {"interval": "0.01"},
+            "slow": {"interval": "60"},
+        }
+
+    monkeypatch.setattr(daemon_input, "parse_input_args", parse_input_args)
+    monkeypatch.setattr(daemon_input, "_config_change_token", lambda: "token")
+
+    daemon_input.stream_events(_daemon_inputs(), MagicMock())
+
+    assert daemon_input.collected.count("fast") == 3
+    assert daemon_input.collected.count("slow") == 1
+    daemon_input._close_check_point.assert_called_once()
+
+
+def test_daemon_reloads_stanzas_on_config_change(daemon_input, monkeypatch):
+    parse_input_args = MagicMock(
+        side_effect=[
+            lambda: {"fast": {"interval": "60"}},
+            lambda: {"fast": {"interval": "0.01"}},
+        ]
+    )
+
+    def parse(inputs):
+        daemon_input.input_stanzas = parse_input_args()()
+
+    monkeypatch.setattr(daemon_input, "parse_input_args", parse)
+    tokens = iter(["a", "a", "b"])
+    monkeypatch.setattr(daemon_input, "_config_change_token", lambda: next(tokens, "b"))
+
+    daemon_input.stream_events(_daemon_inputs(), MagicMock())
+
+    assert parse_input_args.call_count == 2
+    assert daemon_input.collected == ["fast", "fast", "fast"]
+
+
+def test_daemon_skips_stanzas_disabled_on_reload(daemon_input, monkeypatch):
+    def config(other_disabled):
+        return {
+            "inputs": {
+                "demo_input": [
+                    {"name": "fast", "interval": "0.01"},
+                    {"name": "other", "interval": "0.01", "disabled": other_disabled},
+                ]
+            }
+        }
+
+    monkeypatch.setattr(
+        daemon_input,
+        "_load_resolved_global_config",
+        MagicMock(side_effect=[config(False), config(True)]),
+    )
+    tokens = iter(["a", "a", "b"])
+    monkeypatch.setattr(daemon_input, "_config_change_token", lambda: next(tokens, "b"))
+    set_log_level = MagicMock()
+    monkeypatch.setattr(daemon_input, "set_log_level", set_log_level)
+    inputs = _daemon_inputs()
+    inputs.inputs = {"demo_input://fast": {}, "demo_input://other": {}}
+
+    daemon_input.stream_events(inputs, MagicMock())
+
+    assert daemon_input.collected.count("fast") == 3
+    assert daemon_input.collected.count("other") == 1
+    assert list(daemon_input.input_stanzas) == ["fast"]
+    assert set_log_level.call_count == 2
+
+
+def test_sigterm_exits_without_writing_checkpoints(modinput):
+    previous = signal.getsignal(signal.SIGTERM)
+    modinput.ckpt = MagicMock()
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        modinput._handle_sigterm()
+        handler = signal.getsignal(signal.SIGTERM)
+        with pytest.raises(SystemExit):
+            handler(signal.SIGTERM, None)
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+    assert modinput.ckpt.mock_calls == []
+
+
+def test_checkpoints_are_flushed_after_events_on_sigterm(modinput, monkeypatch):
+    kvstore = MagicMock()
+    kvstore.get.return_value = None
+    monkeypatch.setattr(
+        base_modinput.checkpointer,
+        "KVStoreCheckpointer",
+        MagicMock(return_value=kvstore),
+    )
+    monkeypatch.setattr(base_modinput, "Setup_Util", MagicMock())
+    monkeypatch.setattr(base_modinput.atexit, "register", MagicMock())
+    monkeypatch.setattr(modinput, "parse_input_args", MagicMock())
+    modinput.use_checkpoint_cache = True
+    modinput.input_stanzas = {"in1": {}}
+    calls = []
+    ew = MagicMock(header_written=True)
+    ew._out.write.side_effect = lambda content: calls.append("events")
+    kvstore.batch_update.side_effect = lambda states: calls.append("checkpoints")
+
+    def collect_events(ew):
+        with modinput.new_event_writer(ew) as writer:
+            writer.write("e1")
+            modinput.save_check_point("k", 1)
+            signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+
+    modinput.collect_events = collect_events
+    inputs = MagicMock()
+    inputs.metadata = {"server_uri": "https://127.0.0.1:8089", "session_key": "key"}
+    inputs.inputs = {}
+    previous = signal.getsignal(signal.SIGTERM)
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        with pytest.raises(SystemExit):
+            modinput.stream_events(inputs, ew)
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+    assert calls == ["events", "checkpoints"]
@@ -0,0 +1,119 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from splunktaucclib.modinput_wrapper.checkpoint_cache import WriteBehindCheckpointer
+
+
+@pytest.fixture
+def ckpt():
+    ckpt = MagicMock()
+    ckpt.get.return_value = {"offset": 0}
+    return ckpt
+
+
+def test_get_is_served_from_memory(ckpt):
+    cache = WriteBehindCheckpointer(ckpt, flush_interval=None)
+
+    assert cache.get("k") == {"offset": 0}
+    assert cache.get("k") == {"offset": 0}
+    ckpt.get.assert_called_once_with("k")
+
+
+def test_updates_are_coalesced(ckpt):
+    cache = WriteBehindCheckpointer(ckpt, flush_interval=None)
+
+    cache.update("k", {"offset": 1})
+    cache.update("k", {"offset": 2})
+    cache.update("j", 3)
+
+    assert cache.get("k") == {"offset": 2}
+    ckpt.get.assert_not_called()
+    ckpt.batch_update.assert_not_called()
+    cache.close()
+    ckpt.batch_update.assert_called_once_with(
+        [{"_key": "k", "state": {"offset": 2}}, {"_key": "j", "state": 3}]
+    )
+
+
+def test_update_copies_state(ckpt):
+    cache = WriteBehindCheckpointer(ckpt, flush_interval=None)
+    state = {"offset": 1}
+
+    cache.update("k", state)
+    state["offset"] = 2
+
+    assert cache.get("k") == {"offset": 1}
+
+
+def test_flush_on_max_pending(ckpt):
+    cache = WriteBehindCheckpointer(ckpt, flush_interval=None, max_pending=2)
+
+    cache.update("a", 1)
+    ckpt.batch_update.assert_not_called()
+    cache.update("b", 2)
+
+    ckpt.batch_update.assert_called_once()
+    assert cache.pending == 0
+
+
+def test_flush_on_timer(ckpt):
+    flushed = threading.Event()
+    ckpt.batch_update.side_effect = lambda states: flushed.set()
+    cache = WriteBehindCheckpointer(ckpt, flush_interval=0.01)
+
+    cache.update("a", 1)
+
+    assert flushed.wait(5)
+    cache.close()
+
+
+def test_failed_flush_keeps_updates_pending(ckpt):
+    ckpt.batch_update.side_effect = [Exception("kvstore is down"), None]
+    cache = WriteBehindCheckpointer(ckpt, flush_interval=None)
+    cache.update("a", 1)
+
+    with pytest.raises(Exception):
+        cache.flush()
+    assert cache.pending == 1
+
+    cache.flush()
+    assert cache.pending == 0
+
+
+def test_delete_drops_pending_update(ckpt):
+    cache = WriteBehindCheckpointer(ckpt, flush_interval=None)
+    cache.update("a", 1)
+
+    cache.delete("a")
+    cache.close()
+
+    ckpt.delete.assert_called_once_with("a")
+    ckpt.batch_update.assert_not_called()
+    assert cache.get("a") is None
+
+
+def test_get_returns_copy(ckpt):
+    cache = WriteBehindCheckpointer(ckpt, flush_interval=None)
+
+    cache.get("k")["offset"] = 1
+    cache.update("j", {"offset": 2})
+    cache.get("j")["offset"] = 3
+
+    assert cache.get("k") == {"offset": 0}
+    assert cache.get("j") == {"offset": 2}
+
+
+def test_close_from_flushing_thread_does_not_wait(ckpt):
+    cache = WriteBehindCheckpointer(ckpt, flush_interval=0.01)
+    cache.update("a", 1)
+
+    # e.g. a signal handler interrupting a flush of the main thread, while
+    # the background thread waits for the flush lock
+    with cache._flush_lock:
+        cache._flusher.join(0.05)
+        cache.close(timeout=0)
+
+        ckpt.batch_update.assert_called_once_with([{"_key": "a", "state": 1}])
+        assert cache.pending == 0
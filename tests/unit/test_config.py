@@ -0,0 +1,220 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# loggers are created while importing, which requires Splunk
+with patch("solnlib.log.Logs"):
+    from splunktaucclib import config as config_module
+    from splunktaucclib.config import (
+        Config,
+        ConfigException,
+        TransientConfigException,
+    )
+
+
+SCHEMA = json.dumps(
+    {
+        "_product": "Splunk_TA_test",
+        "_rest_namespace": "splunk_ta_test",
+        "_rest_prefix": "ta_test_",
+        "_version": "1.0.0",
+        "account": {
+            "endpoint": "account",
+            "field_types": {"*": {"enabled": "bool"}},
+        },
+        "settings": {"endpoint": "settings"},
+    }
+)
+
+
+def _response(status_code=200, entries=None):
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.text = json.dumps(
+        {
+            "entry": [
+                {"name": name, "content": content}
+                for name, content in (entries or {}).items()
+            ]
+        }
+    )
+    return resp
+
+
+@pytest.fixture
+def splunkd_request(monkeypatch):
+    mock = MagicMock()
+    monkeypatch.setattr(config_module, "splunkd_request", mock)
+    monkeypatch.setattr(config_module.time, "sleep", MagicMock())
+    return mock
+
+
+@pytest.fixture
+def config():
+    return Config("https://127.0.0.1:8089", "session_key", SCHEMA)
+
+
+def test_load_all_endpoints(config, splunkd_request):
+    splunkd_request.side_effect = lambda splunkd_uri, **kwargs: (
+        _response(entries={"acc1": {"enabled": "1", "eai:acl": {}}})
+        if "account" in splunkd_uri
+        else _response(entries={"logging": {"level": "INFO"}})
+    )
+
+    ret = config.load()
+
+    assert ret["account"] == {"acc1": {"enabled": True}}
+    assert ret["settings"] == {"logging": {"level": "INFO"}}
+    assert ret["_product"] == "Splunk_TA_test"
+
+
+def test_load_retries_transient_failure(config, splunkd_request):
+    responses = {"account": [None, _response(503), _response()]}
+    splunkd_request.side_effect = lambda splunkd_uri, **kwargs: (
+        responses["account"].pop(0) if "account" in splunkd_uri else _response()
+    )
+
+    ret = config.load()
+
+    assert ret["account"] == {}
+    assert config_module.time.sleep.call_count == 2
+
+
+def test_load_raises_on_permanent_failure(config, splunkd_request):
+    splunkd_request.return_value = _response(403)
+
+    with pytest.raises(ConfigException) as exc_info:
+        config.load()
+
+    assert not isinstance(exc_info.value, TransientConfigException)
+    config_module.time.sleep.assert_not_called()
+
+
+def test_load_gives_up_after_retries(config, splunkd_request):
+    splunkd_request.side_effect = lambda splunkd_uri, **kwargs: (
+        None if "account" in splunkd_uri else _response()
+    )
+
+    with pytest.raises(TransientConfigException):
+        config.load()
+
+    assert config_module.time.sleep.call_count == Config.LOAD_RETRIES - 1
+
+
+def test_load_deadline(config, splunkd_request):
+    splunkd_request.return_value = _response(503)
+
+    with pytest.raises(TransientConfigException):
+        config.load(timeout=0)
+
+
+def test_update_items_returns_failed_items(config, splunkd_request):
+    splunkd_request.side_effect = lambda splunkd_uri, **kwargs: (
+        _response(500) if splunkd_uri.endswith("acc2") else _response(200)
+    )
+
+    failed = config.update_items(
+        "account",
+        ["acc1", "acc2", "acc3"],
+        ["enabled"],
+        {"acc1": {"enabled": True}, "acc2": {"enabled": False}},
+    )
+
+    assert failed == ["acc2"]
+    assert splunkd_request.call_count == 2
+    _, kwargs = splunkd_request.call_args_list[0]
+    assert kwargs["data"] == {"enabled": "true"}
+
+
+def test_update_items_status(config, splunkd_request):
+    splunkd_request.side_effect = lambda splunkd_uri, **kwargs: (
+        _response(500) if splunkd_uri.endswith("acc2") else _response(201)
+    )
+    data = {name: {"enabled": True} for name in ("acc1", "acc2", "acc3")}
+
+    results = config.update_items_status(
+        "account", list(data), ["enabled"], data, max_workers=3
+    )
+
+    assert results["acc1"] == (Config.UPDATED, 201, None)
+    assert results["acc3"].status == Config.UPDATED
+    assert results["acc2"].status == Config.FAILED
+    assert results["acc2"].code == 500
+
+
+def test_concurrent_calls_share_executor(config, splunkd_request):
+    splunkd_request.return_value = _response(200)
+    data = {name: {"enabled": True} for name in ("acc1", "acc2")}
+
+    config.load()
+    executor = Config.shared_executor()
+    config.update_items_status("account", list(data), ["enabled"], data)
+
+    assert Config.shared_executor() is executor
+    assert len(executor._threads) <= Config.MAX_WORKERS
+
+
+def test_update_items_status_skips_unchanged(config, splunkd_request):
+    splunkd_request.return_value = _response(200)
+    data = {"acc1": {"enabled": True}, "acc2": {"enabled": True}}
+    config.update_items_status("account", ["acc1"], ["enabled"], data)
+
+    results = config.update_items_status("account", list(data), ["enabled"], data)
+
+    assert results["acc1"].status == Config.SKIPPED
+    assert results["acc2"].status == Config.UPDATED
+    assert splunkd_request.call_count == 2
+
+
+def test_update_items_status_raises_if_failed(config, splunkd_request):
+    splunkd_request.return_value = None
+    data = {"acc1": {"enabled": True}}
+
+    with pytest.raises(ConfigException):
+        config.update_items_status(
+            "account", ["acc1"], ["enabled"], data, raise_if_failed=True
+        )
+
+
+def test_load_value_codecs(config):
+    assert config.load_value("account", "acc1", "enabled", "0") is False
+    assert config.load_value("account", "acc1", "name", "acc1") == "acc1"
+    assert config.dump_value("account", "acc1", "enabled", True) == "true"
+
+
+def test_load_corrupted_json(monkeypatch):
+    log = MagicMock()
+    monkeypatch.setattr(config_module, "log", log)
+    config = Config(
+        "https://127.0.0.1:8089",
+        "session_key",
+        json.dumps(
+            dict(
+                json.loads(SCHEMA),
+                token={"endpoint": "token", "field_types": {"*": {"data": "json"}}},
+            )
+        ),
+    )
+
+    assert config.load_value("token", "t1", "data", ' {"a": 1}{"a"') == {"a": 1}
+    assert log.call_args.kwargs["level"] == config_module.logging.WARNING
+    with pytest.raises(ConfigException):
+        config.load_value("token", "t1", "data", '{"a": ')
+
+
+def test_unsupported_field_type():
+    config = Config(
+        "https://127.0.0.1:8089",
+        "session_key",
+        json.dumps(
+            dict(
+                json.loads(SCHEMA),
+                token={"endpoint": "token", "field_types": {"t1": {"data": "list"}}},
+            )
+        ),
+    )
+
+    assert config.load_value("token", "t2", "data", "a") == "a"
+    with pytest.raises(ConfigException):
+        config.load_value("token", "t1", "data", "a")
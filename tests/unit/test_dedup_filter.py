@@ -0,0 +1,84 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from splunktaucclib.modinput_wrapper import dedup_filter
+from splunktaucclib.modinput_wrapper.dedup_filter import BloomFilter, DedupFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter.for_capacity(1000, error_rate=0.01)
+
+    assert all(bloom.add(str(i)) for i in range(100))
+    assert all(str(i) in bloom for i in range(100))
+    assert not bloom.add("1")
+    assert bloom.count == 100
+
+
+def test_false_positive_rate():
+    dedup = DedupFilter(error_rate=0.01, max_bytes=64 * 1024, generations=2)
+    keys = [f"id{i}" for i in range(dedup.capacity)]
+
+    false_positives = sum(dedup.seen(key) for key in keys)
+    assert false_positives < len(keys) * 0.02
+    assert all(dedup.seen(key) for key in keys)
+    false_positives = sum(f"other{i}" in dedup for i in range(10000))
+    assert false_positives < 10000 * 0.02
+
+
+def test_keys_expire_after_window():
+    now = [1000.0]
+    with patch.object(dedup_filter.time, "time", lambda: now[0]):
+        dedup = DedupFilter(window=100, generations=4, max_bytes=1024)
+        assert not dedup.seen("a")
+        now[0] += 60
+        assert dedup.seen("a")
+        assert not dedup.seen("b")
+        now[0] += 50
+        assert "a" not in dedup
+        assert not dedup.seen("a")
+        assert dedup.seen("b")
+
+
+def test_full_filter_is_rotated():
+    dedup = DedupFilter(max_bytes=64, generations=2)
+
+    for i in range(dedup.capacity * 3):
+        dedup.seen(str(i))
+
+    assert len(dedup._filters) == 2
+    assert dedup.seen(str(dedup.capacity * 3 - 1))
+
+
+def test_saved_and_loaded(tmp_path):
+    path = str(tmp_path / "dedup" / "input")
+    dedup = DedupFilter(path, max_bytes=1024)
+    dedup.seen("a")
+    dedup.save()
+
+    assert DedupFilter(path, max_bytes=1024).seen("a")
+    assert not DedupFilter(path, max_bytes=2048).seen("a")
+
+
+def test_corrupted_file_is_dropped(tmp_path):
+    path = tmp_path / "input"
+    path.write_bytes(b"garbage")
+
+    assert not DedupFilter(str(path)).seen("a")
+
+
+@pytest.mark.parametrize("kwargs", [{"error_rate": 0}, {"generations": 1}])
+def test_invalid_settings(kwargs):
+    with pytest.raises(ValueError):
+        DedupFilter(**kwargs)
+
+
+def test_save_while_lock_is_held(tmp_path):
+    dedup = DedupFilter(str(tmp_path / "input"), max_bytes=1024)
+    dedup.seen("a")
+
+    with dedup._lock:
+        dedup.save()
+
+    assert (tmp_path / "input").exists()
@@ -0,0 +1,148 @@
+import io
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from splunklib import modularinput as smi
+
+from splunktaucclib.modinput_wrapper.dedup_filter import DedupFilter
+from splunktaucclib.modinput_wrapper.event_writer import (
+    BatchEventWriter,
+    EventWriterRevoked,
+    SynchronizedEventWriter,
+)
+
+
+def _splunklib_output(events):
+    out = io.StringIO()
+    ew = smi.EventWriter(output=out)
+    for event in events:
+        ew.write_event(event)
+    return out.getvalue()
+
+
+def test_output_matches_splunklib():
+    fields = dict(index="main", host="h<1>", source="s&1", sourcetype="st")
+    out = io.StringIO()
+    writer = BatchEventWriter(smi.EventWriter(output=out), **fields)
+
+    with writer:
+        writer.write("a < b & c", time=1.5)
+        writer.write_events(["x", "y"])
+        writer.write("partial", done=False, unbroken=False)
+
+    assert out.getvalue() == _splunklib_output(
+        [
+            smi.Event(data="a < b & c", time=1.5, **fields),
+            smi.Event(data="x", **fields),
+            smi.Event(data="y", **fields),
+            smi.Event(data="partial", done=False, unbroken=False, **fields),
+        ]
+    )
+    assert writer.flushes == 1
+    assert writer.stats()["events"] == 4
+
+
+def test_non_ascii_output_matches_splunklib():
+    out = io.StringIO()
+    writer = BatchEventWriter(smi.EventWriter(output=out), host="h\u00f4te")
+
+    with writer:
+        writer.write("h\u00e9llo \u2603 \U0001f600")
+        writer.write_event(smi.Event(data="\u00e9", stanza="s\u00e9", index="main"))
+
+    assert out.getvalue() == _splunklib_output(
+        [
+            smi.Event(data="h\u00e9llo \u2603 \U0001f600", host="h\u00f4te"),
+            smi.Event(data="\u00e9", stanza="s\u00e9", index="main"),
+        ]
+    )
+    assert out.getvalue().isascii()
+
+
+def test_write_events_keeps_event_fields():
+    out = io.StringIO()
+    event = smi.Event(data="d", stanza='in "1"', index="other", time=2)
+
+    with BatchEventWriter(smi.EventWriter(output=out), index="main") as writer:
+        writer.write_events([event])
+
+    assert out.getvalue() == _splunklib_output([event])
+
+
+def test_flush_on_thresholds():
+    out = io.StringIO()
+    writer = BatchEventWriter(smi.EventWriter(output=out), max_events=2)
+
+    writer.write_events(["1", "2", "3"])
+
+    assert writer.events_written == 2
+    assert out.getvalue().count("<event ") == 2
+
+    writer = BatchEventWriter(smi.EventWriter(output=io.StringIO()), max_bytes=10)
+    writer.write("long enough")
+    assert writer.events_written == 1
+
+    writer = BatchEventWriter(smi.EventWriter(output=io.StringIO()), max_wait=0)
+    writer.write("1")
+    assert writer.events_written == 1
+
+
+def test_revoked_handle_raises():
+    ew = SynchronizedEventWriter(MagicMock())
+    handle = ew.handle()
+
+    handle.revoke()
+
+    assert handle.lock is ew.lock
+    with pytest.raises(EventWriterRevoked):
+        handle.write_event("event")
+    writer = BatchEventWriter(handle)
+    writer.write("event")
+    with pytest.raises(EventWriterRevoked):
+        writer.flush()
+    ew.write_event("event")
+
+
+def test_duplicates_are_dropped():
+    out = io.StringIO()
+    dedup = DedupFilter(max_bytes=1024)
+    writer = BatchEventWriter(
+        smi.EventWriter(output=out),
+        dedup=dedup,
+        dedup_key=lambda data: data.split(":")[0],
+    )
+
+    with writer:
+        assert writer.write_events(["1:a", "2:b", "1:c"]) == 2
+        writer.write("2:d")
+        writer.write_event(smi.Event(data="3:e"))
+        writer.write_event(smi.Event(data="3:f"))
+
+    assert out.getvalue() == _splunklib_output(
+        [smi.Event(data="1:a"), smi.Event(data="2:b"), smi.Event(data="3:e")]
+    )
+    assert writer.stats()["duplicates"] == 3
+
+
+def test_old_buffer_is_flushed_without_writes():
+    out = io.StringIO()
+    writer = BatchEventWriter(smi.EventWriter(output=out), max_wait=0.05)
+
+    writer.write("e1")
+    assert out.getvalue() == ""
+    deadline = time.time() + 5
+    while writer.flushes == 0 and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert out.getvalue() == _splunklib_output([smi.Event(data="e1")])
+    assert writer.flushes == 1
+
+
+def test_no_timer_without_max_wait():
+    writer = BatchEventWriter(MagicMock(), max_wait=None)
+
+    writer.write("e1")
+
+    assert writer._timer is None
+    assert writer.flushes == 0
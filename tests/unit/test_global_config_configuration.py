@@ -0,0 +1,189 @@
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from splunktaucclib.global_config import Configs, GlobalConfigError, GlobalConfigSchema
+
+SCHEMA = {
+    "meta": {"name": "Splunk_TA_test", "restRoot": "ta_test"},
+    "pages": {
+        "configuration": {
+            "tabs": [
+                {
+                    "name": "account",
+                    "table": {},
+                    "entity": [
+                        {"field": "name"},
+                        {"field": "username"},
+                        {
+                            "field": "scopes",
+                            "type": "multipleSelect",
+                            "options": {"delimiter": "|"},
+                        },
+                    ],
+                },
+                {"name": "logging", "entity": [{"field": "loglevel"}]},
+            ]
+        }
+    },
+}
+
+
+def _response(entries):
+    response = MagicMock()
+    response.body.read.return_value = json.dumps(
+        {
+            "entry": [
+                {"name": name, "content": content} for name, content in entries.items()
+            ]
+        }
+    )
+    return response
+
+
+@pytest.fixture
+def splunkd_client():
+    client = MagicMock()
+    client.get.return_value = _response(
+        {
+            "acc1": {
+                "username": "admin",
+                "scopes": "a|b",
+                "eai:appName": "Splunk_TA_test",
+            }
+        }
+    )
+    return client
+
+
+@pytest.fixture
+def configs(splunkd_client):
+    return Configs(splunkd_client, GlobalConfigSchema(SCHEMA))
+
+
+def test_save_lists_each_endpoint_once(configs, splunkd_client):
+    errors = configs.save(
+        {
+            "account": [
+                {"name": "acc1", "username": "admin", "scopes": ["a", "b"]},
+                {"name": "acc2", "username": "user"},
+            ]
+        }
+    )
+
+    assert errors == [None, None]
+    splunkd_client.get.assert_called_once()
+
+
+def test_save_routes_new_stanza_to_create(configs, splunkd_client):
+    configs.save({"account": [{"name": "acc2", "username": "user"}]})
+
+    splunkd_client.post.assert_called_once_with(
+        "ta_test_account", name="acc2", username="user"
+    )
+
+
+def test_save_sends_only_changed_fields(configs, splunkd_client):
+    configs.save(
+        {"account": [{"name": "acc1", "username": "root", "scopes": ["a", "b"]}]}
+    )
+
+    splunkd_client.post.assert_called_once_with("ta_test_account/acc1", username="root")
+
+
+def test_save_skips_unchanged_stanza(configs, splunkd_client):
+    errors = configs.save(
+        {"account": [{"name": "acc1", "username": "admin", "scopes": ["a", "b"]}]}
+    )
+
+    assert errors == [None]
+    splunkd_client.post.assert_not_called()
+
+
+def test_save_falls_back_when_listing_fails(configs, splunkd_client):
+    splunkd_client.get.side_effect = Exception("listing failed")
+
+    errors = configs.save({"account": [{"name": "acc1", "username": "root"}]})
+
+    assert errors == [None]
+    splunkd_client.post.assert_called_once_with("ta_test_account/acc1", username="root")
+
+
+def test_save_uses_given_executor(splunkd_client):
+    executor = MagicMock()
+    executor.submit.side_effect = lambda fn, task: _done_future(fn(task))
+    configs = Configs(splunkd_client, GlobalConfigSchema(SCHEMA), executor)
+
+    errors = configs.save({"account": [{"name": "acc2", "username": "user"}]})
+
+    assert errors == [None]
+    executor.submit.assert_called_once()
+    assert configs.save_stats.total == 1
+    assert configs.save_stats.failed == 0
+
+
+def test_iter_save_yields_each_stanza(configs, splunkd_client):
+    splunkd_client.post.side_effect = [Exception("failed")]
+
+    results = list(
+        configs.iter_save({"account": [{"name": "acc2", "username": "user"}]})
+    )
+
+    assert len(results) == 1
+    type_name, name, error = results[0]
+    assert (type_name, name) == ("account", "acc2")
+    assert str(error) == "failed"
+    assert configs.save_stats.failed == 1
+
+
+def test_save_reports_timed_out_stanzas(configs, splunkd_client):
+    event = threading.Event()
+    splunkd_client.post.side_effect = lambda *args, **kwargs: event.wait(5)
+
+    errors = configs.save(
+        {"account": [{"name": "acc2", "username": "user"}]}, timeout=0.01
+    )
+    event.set()
+
+    assert isinstance(errors[0], GlobalConfigError)
+    assert "still running" in str(errors[0])
+    assert configs.save_stats.running == 1
+    assert configs.save_stats.cancelled == 0
+
+
+def test_save_cancels_stanzas_not_started(splunkd_client):
+    event = threading.Event()
+    splunkd_client.post.side_effect = lambda *args, **kwargs: event.wait(5)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        configs = Configs(splunkd_client, GlobalConfigSchema(SCHEMA), executor)
+
+        errors = configs.save(
+            {
+                "account": [
+                    {"name": "acc2", "username": "user"},
+                    {"name": "acc3", "username": "user"},
+                ]
+            },
+            timeout=0.05,
+        )
+        event.set()
+
+    assert "still running" in str(errors[0])
+    assert "cancelled" in str(errors[1])
+    assert configs.save_stats.running == 1
+    assert configs.save_stats.cancelled == 1
+
+
+def _done_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def test_load_splits_multiple_select(configs):
+    accounts = configs.load()["account"]
+
+    assert accounts == [{"name": "acc1", "username": "admin", "scopes": ["a", "b"]}]
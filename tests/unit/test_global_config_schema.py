@@ -0,0 +1,120 @@
+import json
+import os
+
+from splunktaucclib.global_config import GlobalConfigSchema, load_global_config_schema
+from splunktaucclib.global_config import schema as schema_module
+
+SCHEMA = {
+    "meta": {"name": "Splunk_TA_test", "restRoot": "ta_test"},
+    "pages": {
+        "configuration": {
+            "tabs": [
+                {
+                    "name": "account",
+                    "table": {},
+                    "entity": [
+                        {"field": "name", "type": "text"},
+                        {
+                            "field": "scopes",
+                            "type": "multipleSelect",
+                            "options": {"delimiter": "|"},
+                        },
+                    ],
+                },
+                {"name": "logging", "entity": [{"field": "loglevel"}]},
+            ]
+        },
+        "inputs": {
+            "services": [
+                {
+                    "name": "demo_input",
+                    "entity": [
+                        {"field": "name", "type": "text"},
+                        {
+                            "field": "account",
+                            "type": "singleSelect",
+                            "options": {"referenceName": "account"},
+                        },
+                    ],
+                }
+            ]
+        },
+    },
+}
+
+
+def test_internal_schema_is_built_once():
+    schema = GlobalConfigSchema(SCHEMA)
+
+    assert [item["name"] for item in schema.internal_schema] == [
+        "demo_input",
+        "account",
+        "logging",
+    ]
+    assert schema.internal_schema is schema.internal_schema
+
+
+def test_entity_lookup():
+    schema = GlobalConfigSchema(SCHEMA)
+
+    assert schema.entity("logging") == [{"field": "loglevel"}]
+    assert schema.entity("unknown") is None
+
+
+def test_field_indexes():
+    schema = GlobalConfigSchema(SCHEMA)
+
+    assert schema.multiple_select_delimiters("account") == [("scopes", "|")]
+    assert schema.multiple_select_delimiters("logging") == []
+    assert schema.references("demo_input") == [("account", "account")]
+    assert [f["field"] for f in schema.fields_of_type("account", "text")] == ["name"]
+
+
+def test_multiple_select_without_delimiter():
+    content = json.loads(json.dumps(SCHEMA))
+    content["pages"]["inputs"]["services"][0]["entity"].append(
+        {"field": "regions", "type": "multipleSelect"}
+    )
+
+    schema = GlobalConfigSchema(content)
+
+    assert schema.multiple_select_delimiters("demo_input") == [("regions", ",")]
+
+
+def test_load_global_config_schema_is_cached(tmp_path):
+    path = tmp_path / "globalConfig.json"
+    path.write_text(json.dumps(SCHEMA))
+
+    schema = load_global_config_schema(str(path))
+
+    assert schema.entity("logging") == [{"field": "loglevel"}]
+    assert load_global_config_schema(str(path)) is schema
+
+
+def test_load_global_config_schema_reloads_changed_file(tmp_path):
+    path = tmp_path / "globalConfig.json"
+    path.write_text(json.dumps(SCHEMA))
+    schema = load_global_config_schema(str(path))
+
+    content = dict(SCHEMA, meta={"name": "Splunk_TA_other", "restRoot": "ta_other"})
+    path.write_text(json.dumps(content))
+    os.utime(path, ns=(0, 0))
+
+    assert load_global_config_schema(str(path)).product == "Splunk_TA_other"
+    assert schema.product == "Splunk_TA_test"
+
+
+def test_load_global_config_schema_uses_compiled(tmp_path, monkeypatch):
+    path = tmp_path / "globalConfig.json"
+    path.write_text(json.dumps(SCHEMA))
+    load_global_config_schema(str(path), compiled=True)
+    assert (tmp_path / "globalConfig.json.pickle").exists()
+
+    # same size and modification time, but not valid JSON any more
+    stat = path.stat()
+    path.write_text(" " * stat.st_size)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    monkeypatch.setattr(schema_module, "_schema_cache", {})
+    schema = load_global_config_schema(str(path), compiled=True)
+
+    assert schema.multiple_select_delimiters("account") == [("scopes", "|")]
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from splunktaucclib.global_config import GlobalConfigSnapshot, change_token
+
+fernet = pytest.importorskip("cryptography.fernet")
+
+
+@pytest.fixture
+def app_dir(tmp_path):
+    local = tmp_path / "local"
+    local.mkdir()
+    (local / "ta_test_account.conf").write_text("[acc1]\nusername = admin\n")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def key():
+    return fernet.Fernet.generate_key()
+
+
+def test_change_token_is_stable(app_dir):
+    assert change_token(app_dir) == change_token(app_dir)
+
+
+def test_change_token_changes_with_conf(app_dir):
+    token = change_token(app_dir)
+    with open(os.path.join(app_dir, "local", "ta_test_account.conf"), "a") as f:
+        f.write("password = secret\n")
+
+    assert change_token(app_dir) != token
+
+
+def test_snapshot_round_trip(tmp_path, key):
+    path = str(tmp_path / "snapshot")
+    content = {"configs": {"account": [{"name": "acc1", "password": "secret"}]}}
+
+    assert GlobalConfigSnapshot(path, "token", key).save(content)
+
+    assert GlobalConfigSnapshot(path, "token", key).load() == content
+    with open(path) as f:
+        assert "secret" not in f.read()
+
+
+def test_snapshot_is_stale_when_token_changes(tmp_path, key):
+    path = str(tmp_path / "snapshot")
+    GlobalConfigSnapshot(path, "token", key).save({"inputs": {}})
+
+    assert GlobalConfigSnapshot(path, "other", key).load() is None
+
+
+def test_snapshot_with_wrong_key(tmp_path, key):
+    path = str(tmp_path / "snapshot")
+    GlobalConfigSnapshot(path, "token", key).save({"inputs": {}})
+
+    other_key = fernet.Fernet.generate_key()
+    assert GlobalConfigSnapshot(path, "token", other_key).load() is None
+
+
+def test_snapshot_disabled_without_key(tmp_path):
+    snapshot = GlobalConfigSnapshot(str(tmp_path / "snapshot"), "token", None)
+
+    assert not snapshot.enabled
+    assert not snapshot.save({"inputs": {}})
+    assert snapshot.load() is None
@@ -0,0 +1,119 @@
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from splunktaucclib.splunk_aoblib.http_cache import HTTPCache
+from splunktaucclib.splunk_aoblib.rest_helper import TARestHelper
+
+URL = "https://api.test/v1/users"
+
+
+def _response(status_code, content=b"", **headers):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.url = URL
+    response.headers.update({k.replace("_", "-"): v for k, v in headers.items()})
+    return response
+
+
+@pytest.fixture
+def helper():
+    helper = TARestHelper(http_cache=HTTPCache())
+    helper.http_session = MagicMock()
+    return helper
+
+
+def test_not_modified_returns_cached_response(helper):
+    helper.http_session.request.side_effect = [
+        _response(200, b'{"users": []}', ETag='"v1"', Content_Encoding="gzip"),
+        _response(304, ETag='"v1"'),
+    ]
+
+    first = helper.send_http_request(URL, "GET", parameters={"page": 1})
+    second = helper.send_http_request(URL, "GET", parameters={"page": 1})
+
+    assert first.from_cache is False
+    assert second.from_cache is True
+    assert second.status_code == 200
+    assert second.json() == {"users": []}
+    assert "Content-Encoding" not in second.headers
+    headers = helper.http_session.request.call_args.kwargs["headers"]
+    assert headers == {"If-None-Match": '"v1"'}
+
+
+def test_cache_key_includes_parameters(helper):
+    helper.http_session.request.side_effect = [
+        _response(200, b"1", Last_Modified="Mon, 01 Jan 2024 00:00:00 GMT"),
+        _response(200, b"2"),
+    ]
+
+    helper.send_http_request(URL, "GET", parameters={"page": 1})
+    helper.send_http_request(URL, "GET", parameters={"page": 2})
+
+    assert "headers" not in helper.http_session.request.call_args.kwargs
+
+
+def test_only_get_is_cached(helper):
+    helper.http_session.request.return_value = _response(200, b"1", ETag='"v1"')
+
+    helper.send_http_request(URL, "POST", payload={"a": 1})
+    helper.send_http_request(URL, "POST", payload={"a": 1})
+
+    assert "headers" not in helper.http_session.request.call_args.kwargs
+
+
+def test_cache_survives_restart(tmp_path):
+    key = HTTPCache.make_key(URL)
+    HTTPCache(str(tmp_path)).resolve(key, _response(200, b"body", ETag='"v1"'))
+
+    cache = HTTPCache(str(tmp_path))
+
+    assert cache.conditional_headers(key) == {"If-None-Match": '"v1"'}
+    assert cache.resolve(key, _response(304)).content == b"body"
+
+
+def test_disk_cache_is_encrypted_with_key(tmp_path):
+    Fernet = pytest.importorskip("cryptography.fernet").Fernet
+    key = Fernet.generate_key()
+    cache_key = HTTPCache.make_key(URL)
+    HTTPCache(str(tmp_path), key=key).resolve(
+        cache_key,
+        _response(200, b"secret body", ETag='"v1"', Set_Cookie="session=secret"),
+    )
+
+    (path,) = tmp_path.iterdir()
+    assert b"secret" not in path.read_bytes()
+    assert HTTPCache(str(tmp_path)).conditional_headers(cache_key) == {}
+    assert (
+        HTTPCache(str(tmp_path), key=Fernet.generate_key()).conditional_headers(
+            cache_key
+        )
+        == {}
+    )
+
+    response = HTTPCache(str(tmp_path), key=key).resolve(cache_key, _response(304))
+    assert response.content == b"secret body"
+    assert "Set-Cookie" not in response.headers
+
+
+def test_memory_eviction():
+    cache = HTTPCache(max_entries=2, max_bytes=10)
+    for i, content in enumerate((b"aaaa", b"bbbb", b"cccc")):
+        cache.resolve(str(i), _response(200, content, ETag=str(i)))
+
+    assert cache.conditional_headers("0") == {}
+    assert cache.conditional_headers("2") == {"If-None-Match": "2"}
+
+    cache.resolve("big", _response(200, b"x" * 11, ETag="big"))
+    assert cache.conditional_headers("big") == {}
+
+
+def test_disk_eviction(tmp_path):
+    cache = HTTPCache(str(tmp_path), max_disk_bytes=200)
+    for i in range(5):
+        cache.resolve(str(i), _response(200, b"x" * 40, ETag=str(i)))
+
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 200
+    assert (tmp_path / "4.cache").exists()
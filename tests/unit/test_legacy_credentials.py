@@ -0,0 +1,177 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# loggers are created while importing, which requires Splunk
+with patch("solnlib.log.Logs"):
+    from splunktaucclib.legacy import credentials
+
+
+SEP = "``splunk_cred_sep``"
+
+
+def _entry(realm, username, clear_password):
+    name = f"{realm}:{username}:"
+    return {
+        "name": name,
+        "acl": {"app": "Splunk_TA_test"},
+        "content": {
+            "realm": realm,
+            "username": username,
+            "clear_password": clear_password,
+            "encr_password": "$7$" + clear_password,
+            "eai:acl": None,
+            "eai:appName": "Splunk_TA_test",
+            "eai:attributes": {},
+        },
+    }
+
+
+def _response(status_code=200, entries=()):
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.text = json.dumps({"entry": list(entries)})
+    return resp
+
+
+@pytest.fixture
+def splunkd_request(monkeypatch):
+    mock = MagicMock()
+    monkeypatch.setattr(credentials.rest, "splunkd_request", mock)
+    return mock
+
+
+@pytest.fixture
+def manager():
+    with pytest.warns(DeprecationWarning):
+        return credentials.CredentialManager(
+            "https://127.0.0.1:8089", "session_key", app="Splunk_TA_test"
+        )
+
+
+def test_get_all_passwords_merges_chunks(manager, splunkd_request):
+    splunkd_request.return_value = _response(
+        entries=[
+            _entry("Splunk_TA_test", f"acc1{SEP}1", "def"),
+            _entry("Splunk_TA_test", "acc2", "xyz"),
+            _entry("Splunk_TA_test", f"acc1{SEP}0", "abc"),
+        ]
+    )
+
+    stanzas = manager.get_all_passwords(realm="Splunk_TA_test")
+
+    assert [s["name"] for s in stanzas] == [
+        "Splunk_TA_test:acc1:",
+        "Splunk_TA_test:acc2:",
+    ]
+    assert stanzas[0]["username"] == "acc1"
+    assert stanzas[0]["clear_password"] == "abcdef"
+    assert stanzas[0]["encr_password"] == "$7$abc$7$def"
+    assert stanzas[1]["appName"] == "Splunk_TA_test"
+    assert stanzas[1]["eai:acl"] == {"app": "Splunk_TA_test"}
+    assert "attributes" not in stanzas[1]
+    url = splunkd_request.call_args[0][0]
+    assert "output_mode=json" in url
+    assert "search=realm%3DSplunk_TA_test" in url
+
+
+def test_get_clear_password_by_name(manager, splunkd_request):
+    splunkd_request.return_value = _response(
+        entries=[_entry("Splunk_TA_test", "acc1", f"user{SEP}pass")]
+    )
+
+    assert manager.get_clear_password("acc1") == {"acc1": {"user": "pass"}}
+    splunkd_request.assert_called_once()
+    assert "/storage/passwords/Splunk_TA_test%3Aacc1%3A?" in (
+        splunkd_request.call_args[0][0]
+    )
+
+
+def test_get_clear_password_by_name_with_chunks(manager, splunkd_request):
+    splunkd_request.side_effect = [
+        _response(404),
+        _response(
+            entries=[
+                _entry("Splunk_TA_test", f"acc1{SEP}0", f"user{SEP}pa"),
+                _entry("Splunk_TA_test", f"acc1{SEP}1", "ss"),
+                _entry("Splunk_TA_test", f"acc10{SEP}0", f"user{SEP}other"),
+            ]
+        ),
+    ]
+
+    assert manager.get_clear_password("acc1") == {"acc1": {"user": "pass"}}
+
+
+def _calls(splunkd_request, method):
+    return [
+        c for c in splunkd_request.call_args_list if c.kwargs.get("method") == method
+    ]
+
+
+def test_update_split_credential_lists_once(manager, splunkd_request):
+    splunkd_request.side_effect = lambda url, *args, **kwargs: (
+        _response(
+            entries=[
+                _entry("Splunk_TA_test", f"acc1{SEP}0", "a"),
+                _entry("Splunk_TA_test", f"acc1{SEP}1", "b"),
+                _entry("Splunk_TA_test", f"acc1{SEP}2", "c"),
+                _entry("Splunk_TA_test", f"acc10{SEP}0", "d"),
+            ]
+        )
+        if kwargs["method"] == "GET"
+        else _response()
+    )
+
+    manager._update("acc1", "x" * 300)
+
+    assert len(_calls(splunkd_request, "GET")) == 1
+    posts = _calls(splunkd_request, "POST")
+    # existing chunks are updated directly, without a failing create
+    assert len(posts) == 2
+    assert all("name" not in c.kwargs["data"] for c in posts)
+    assert sorted(len(c.kwargs["data"]["password"]) for c in posts) == [45, 255]
+    deletes = _calls(splunkd_request, "DELETE")
+    assert [c.args[0].rsplit("/", 1)[1] for c in deletes] == [
+        "Splunk_TA_test%3Aacc1%60%60splunk_cred_sep%60%602%3A"
+    ]
+
+
+def test_update_creates_and_removes_unsplit_stanza(manager, splunkd_request):
+    splunkd_request.side_effect = lambda url, *args, **kwargs: (
+        _response(entries=[_entry("Splunk_TA_test", "acc1", "old")])
+        if kwargs["method"] == "GET"
+        else _response()
+    )
+
+    manager._update("acc1", "x" * 256)
+
+    posts = _calls(splunkd_request, "POST")
+    assert sorted(c.kwargs["data"]["name"] for c in posts) == [
+        f"acc1{SEP}0",
+        f"acc1{SEP}1",
+    ]
+    deletes = _calls(splunkd_request, "DELETE")
+    assert [c.args[0].rsplit("/", 1)[1] for c in deletes] == [
+        "Splunk_TA_test%3Aacc1%3A"
+    ]
+
+
+def test_update_falls_back_when_listing_fails(manager, splunkd_request):
+    splunkd_request.side_effect = [_response(500), _response(409), _response()]
+
+    manager._update("acc1", "short")
+
+    posts = _calls(splunkd_request, "POST")
+    assert "name" in posts[0].kwargs["data"]
+    assert posts[1].kwargs["data"] == {"password": "short"}
+    assert not _calls(splunkd_request, "DELETE")
+
+
+def test_update_raises_on_failed_chunk(manager, splunkd_request):
+    splunkd_request.side_effect = lambda url, *args, **kwargs: (
+        _response() if kwargs["method"] == "GET" else _response(500)
+    )
+
+    with pytest.raises(credentials.CredException):
+        manager._update("acc1", "x" * 300)
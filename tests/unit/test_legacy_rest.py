@@ -0,0 +1,91 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# loggers are created while importing, which requires Splunk
+with patch("solnlib.log.Logs"):
+    from splunktaucclib.legacy import rest
+
+
+@pytest.fixture(autouse=True)
+def sessions():
+    yield
+    rest.close_sessions()
+
+
+def test_session_is_pooled_per_host_and_verify():
+    session = rest.get_session("https://127.0.0.1:8089/services/a")
+
+    assert rest.get_session("https://127.0.0.1:8089/services/b") is session
+    assert rest.get_session("https://127.0.0.1:8089/services/a", True) is not session
+    assert rest.get_session("https://127.0.0.2:8089/services/a") is not session
+
+
+def test_session_does_not_keep_cookies():
+    session = rest.get_session("https://127.0.0.1:8089")
+
+    assert session.cookies.get_policy().allowed_domains() == ()
+
+
+def test_session_does_not_retry_status():
+    session = rest.get_session("https://127.0.0.3:8089")
+    retry = session.get_adapter("https://127.0.0.3:8089").max_retries
+
+    assert retry.status == 0
+    assert retry.read == 0
+    assert retry.connect == rest.ADAPTER_RETRIES
+
+
+def test_splunkd_request_reuses_session(monkeypatch):
+    session = MagicMock()
+    session.request.return_value.status_code = 200
+    monkeypatch.setattr(rest, "get_session", MagicMock(return_value=session))
+
+    resp = rest.splunkd_request(
+        "https://127.0.0.1:8089/services/a", "key", data={"a": "b"}
+    )
+
+    assert resp is session.request.return_value
+    _, kwargs = session.request.call_args
+    assert kwargs["headers"]["Authorization"] == "Splunk key"
+    assert kwargs["data"] == "a=b"
+
+
+def test_splunkd_request_backoff_between_retries(monkeypatch):
+    session = MagicMock()
+    session.request.return_value.status_code = 500
+    monkeypatch.setattr(rest, "get_session", MagicMock(return_value=session))
+    sleep = MagicMock()
+    monkeypatch.setattr(rest.time, "sleep", sleep)
+
+    resp = rest.splunkd_request("https://127.0.0.1:8089/services/a", "key", retry=3)
+
+    assert resp.status_code == 500
+    assert session.request.call_count == 3
+    assert [c.args[0] for c in sleep.call_args_list] == [0.5, 1.0]
+
+
+@pytest.mark.parametrize("status", [400, 404, 409])
+def test_splunkd_request_does_not_retry_client_errors(monkeypatch, status):
+    session = MagicMock()
+    session.request.return_value.status_code = status
+    monkeypatch.setattr(rest, "get_session", MagicMock(return_value=session))
+    sleep = MagicMock()
+    monkeypatch.setattr(rest.time, "sleep", sleep)
+
+    resp = rest.splunkd_request("https://127.0.0.1:8089/services/a", "key", retry=3)
+
+    assert resp.status_code == status
+    session.request.assert_called_once()
+    sleep.assert_not_called()
+
+
+def test_splunkd_request_retries_too_many_requests(monkeypatch):
+    session = MagicMock()
+    session.request.return_value.status_code = 429
+    monkeypatch.setattr(rest, "get_session", MagicMock(return_value=session))
+    monkeypatch.setattr(rest.time, "sleep", MagicMock())
+
+    rest.splunkd_request("https://127.0.0.1:8089/services/a", "key", retry=2)
+
+    assert session.request.call_count == 2
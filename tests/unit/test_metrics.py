@@ -0,0 +1,143 @@
+import io
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+from splunklib import modularinput as smi
+
+from splunktaucclib.modinput_wrapper import stanza_executor
+from splunktaucclib.modinput_wrapper.event_writer import (
+    BatchEventWriter,
+    MeteredEventWriter,
+    SynchronizedEventWriter,
+)
+from splunktaucclib.modinput_wrapper.metrics import Histogram, RunMetrics
+from splunktaucclib.splunk_aoblib.rest_helper import TARestHelper
+
+
+def test_histogram_buckets():
+    histogram = Histogram()
+
+    for value in (0.005, 0.01, 0.3, 100):
+        histogram.observe(value)
+
+    assert histogram.to_dict() == {
+        "count": 4,
+        "sum": 100.315,
+        "max": 100,
+        "buckets": [2, 0, 0, 1, 0, 0, 0, 0, 1],
+    }
+
+
+def test_figures_are_kept_per_stanza():
+    metrics = RunMetrics()
+    metrics.count("events", 2)
+    metrics.count("events", 3, stanza="in1")
+    metrics.observe("collect", 0.2, stanza="in1")
+
+    def collect():
+        stanza_executor._stanza.set("in2")
+        metrics.count("events", 4)
+        with metrics.timer("http_latency"):
+            pass
+
+    thread = threading.Thread(target=collect)
+    thread.start()
+    thread.join()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["events"] == 2
+    assert snapshot["stanzas"]["in1"]["events"] == 3
+    assert snapshot["stanzas"]["in1"]["collect"]["count"] == 1
+    assert snapshot["stanzas"]["in2"]["events"] == 4
+    assert snapshot["stanzas"]["in2"]["http_latency"]["count"] == 1
+
+
+def test_render_one_line_json():
+    metrics = RunMetrics()
+    metrics.count("events", 2, stanza="in1")
+
+    line = metrics.render(input_type="demo")
+
+    assert "\n" not in line
+    document = json.loads(line)
+    assert document["input_type"] == "demo"
+    assert document["stanzas"] == {"in1": {"events": 2}}
+    assert document["bucket_bounds"] == list(Histogram.BUCKETS)
+
+
+def test_events_written_directly_are_counted():
+    metrics = RunMetrics()
+    out = io.StringIO()
+    ew = SynchronizedEventWriter(
+        MeteredEventWriter(smi.EventWriter(output=out), metrics)
+    )
+
+    ew.write_event(smi.Event(data="a", stanza="in1"))
+    ew.write_event(smi.Event(data="b", stanza="in1"))
+
+    assert out.getvalue().startswith("<stream><event")
+    assert metrics.snapshot()["events"] == 2
+    assert metrics.snapshot()["bytes"] == len(out.getvalue()) - len("<stream>")
+
+
+def test_batched_events_are_counted_once():
+    metrics = RunMetrics()
+    out = io.StringIO()
+    ew = MeteredEventWriter(smi.EventWriter(output=out), metrics)
+
+    with BatchEventWriter(ew, metrics=metrics) as writer:
+        writer.write("a")
+
+    assert metrics.snapshot()["events"] == 1
+
+
+def test_timer_flush_is_counted_in_stanza():
+    metrics = RunMetrics()
+    out = io.StringIO()
+    writer = BatchEventWriter(
+        smi.EventWriter(output=out), max_wait=0.05, metrics=metrics
+    )
+
+    def collect():
+        stanza_executor._stanza.set("in1")
+        writer.write("a")
+
+    thread = threading.Thread(target=collect)
+    thread.start()
+    thread.join()
+    deadline = time.time() + 5
+    while not out.getvalue() and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert metrics.snapshot()["stanzas"]["in1"]["events"] == 1
+
+
+def test_http_requests_are_counted_in_stanza_of_caller():
+    metrics = RunMetrics()
+    helper = TARestHelper(metrics=metrics)
+    helper.http_session = MagicMock()
+    helper.http_session.request.side_effect = lambda method, url, **kwargs: MagicMock(
+        ok=not url.endswith("/missing")
+    )
+
+    def collect():
+        stanza_executor._stanza.set("in1")
+        list(
+            helper.send_http_requests(
+                [
+                    {"url": "https://a.test/found", "method": "GET"},
+                    {"url": "https://b.test/missing", "method": "GET"},
+                ]
+            )
+        )
+
+    thread = threading.Thread(target=collect)
+    thread.start()
+    thread.join()
+
+    figures = metrics.snapshot()["stanzas"]["in1"]
+    assert figures["http_requests"] == 2
+    assert figures["http_errors"] == 1
+    assert figures["http_latency"]["count"] == 2
@@ -0,0 +1,137 @@
+import json
+import threading
+from concurrent import futures
+from unittest.mock import MagicMock
+
+import pytest
+
+from splunktaucclib.splunk_aoblib import pagination
+from splunktaucclib.splunk_aoblib.rest_helper import TARestHelper
+
+
+def _response(body=None, lines=None, links=None):
+    response = MagicMock()
+    response.json.return_value = body
+    response.iter_lines.return_value = lines or []
+    response.links = links or {}
+    return response
+
+
+def test_link_header_paging_streams_lines():
+    pages = {
+        "https://a.test/1": _response(
+            lines=['{"id": 1}', "", '{"id": 2}'],
+            links={"next": {"url": "https://a.test/2"}},
+        ),
+        "https://a.test/2": _response(lines=['{"id": 3}']),
+    }
+    send = MagicMock(side_effect=lambda url, **kwargs: pages[url])
+
+    records = list(
+        pagination.paginate(
+            send,
+            {"url": "https://a.test/1", "method": "GET", "parameters": {"q": 1}},
+            pagination.LinkHeaderPaging(),
+            pagination.line_records(),
+        )
+    )
+
+    assert records == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert send.call_args.kwargs["parameters"] is None
+    pages["https://a.test/1"].close.assert_called_once()
+
+
+def test_cursor_paging():
+    send = MagicMock(
+        side_effect=[
+            _response({"items": [1, 2], "meta": {"next": "c1"}}),
+            _response({"items": [3], "meta": {"next": None}}),
+        ]
+    )
+
+    records = list(
+        pagination.paginate(
+            send,
+            {"url": "u", "method": "GET"},
+            pagination.CursorPaging("meta.next"),
+            pagination.json_records("items"),
+        )
+    )
+
+    assert records == [1, 2, 3]
+    assert send.call_args.kwargs["parameters"] == {"cursor": "c1"}
+
+
+def test_offset_paging_yields_pages():
+    send = MagicMock(side_effect=[_response([1, 2]), _response([3, 4]), _response([])])
+
+    pages = list(
+        pagination.paginate(
+            send, {"url": "u", "method": "GET"}, pagination.OffsetPaging(limit=2)
+        )
+    )
+
+    assert len(pages) == 3
+    assert [c.kwargs["parameters"] for c in send.call_args_list] == [
+        {"offset": 0, "limit": 2},
+        {"offset": 2, "limit": 2},
+        {"offset": 4, "limit": 2},
+    ]
+
+
+def test_next_page_is_prefetched():
+    second_sent = threading.Event()
+
+    def send(url, **kwargs):
+        if url == "2":
+            second_sent.set()
+            return _response({"items": ["b"]})
+        return _response({"items": ["a"], "next": "2"})
+
+    class NextUrl(pagination.Paging):
+        def next_request(self, request, response):
+            url = pagination.response_json(response).get("next")
+            return dict(request, url=url) if url else None
+
+    with futures.ThreadPoolExecutor(1) as executor:
+        records = pagination.paginate(
+            send,
+            {"url": "1"},
+            NextUrl(),
+            pagination.json_records("items"),
+            executor=executor,
+        )
+        assert next(records) == "a"
+        assert second_sent.wait(5)
+        assert list(records) == ["b"]
+
+
+def test_error_page_raises():
+    response = _response([])
+    response.raise_for_status.side_effect = Exception("500")
+
+    with pytest.raises(Exception, match="500"):
+        list(
+            pagination.paginate(
+                MagicMock(return_value=response),
+                {"url": "u"},
+                pagination.OffsetPaging(limit=2),
+            )
+        )
+
+
+def test_rest_helper_paginate_streams():
+    helper = TARestHelper()
+    helper.http_session = MagicMock()
+    helper.http_session.request.return_value = _response(lines=[json.dumps({"id": 1})])
+
+    records = list(
+        helper.paginate(
+            {"url": "https://a.test", "method": "GET", "stream": True},
+            pagination.LinkHeaderPaging(),
+            pagination.line_records(),
+        )
+    )
+
+    assert records == [{"id": 1}]
+    assert helper.http_session.request.call_args.kwargs["stream"] is True
@@ -0,0 +1,117 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from splunktaucclib.splunk_aoblib import rate_limiter
+from splunktaucclib.splunk_aoblib.rate_limiter import RateLimiter, RateLimitExceeded
+from splunktaucclib.splunk_aoblib.rest_helper import TARestHelper
+
+URL = "https://api.test/v1/items"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "time", clock.time)
+    monkeypatch.setattr(rate_limiter.time, "sleep", clock.sleep)
+    return clock
+
+
+def _response(status_code=200, **headers):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = {k.replace("_", "-"): v for k, v in headers.items()}
+    return response
+
+
+def test_token_bucket_allows_burst_then_rate(clock):
+    limiter = RateLimiter(rate=2, burst=3)
+
+    for _ in range(3):
+        limiter.acquire(URL)
+    assert clock.slept == []
+
+    limiter.acquire(URL)
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_hosts_are_limited_separately(clock):
+    limiter = RateLimiter(rate=1, host_rates={"other.test": (5, 5)})
+
+    limiter.acquire(URL)
+    for _ in range(5):
+        limiter.acquire("https://other.test/")
+
+    assert clock.slept == []
+
+
+def test_retry_after_pauses_host(clock):
+    limiter = RateLimiter()
+
+    limiter.update(URL, _response(429, Retry_After="30"))
+    limiter.acquire(URL)
+    limiter.acquire("https://other.test/")
+
+    assert clock.slept == [pytest.approx(30)]
+
+
+def test_retry_after_http_date(clock):
+    limiter = RateLimiter()
+    date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(clock.now + 10))
+
+    limiter.update(URL, _response(503, Retry_After=date))
+    limiter.acquire(URL)
+
+    assert clock.slept == [pytest.approx(10)]
+
+
+def test_exhausted_rate_limit_header_pauses_until_reset(clock):
+    limiter = RateLimiter(rate=100)
+
+    limiter.update(
+        URL, _response(X_RateLimit_Remaining="0", X_RateLimit_Reset=str(clock.now + 5))
+    )
+    limiter.acquire(URL)
+
+    assert clock.slept == [pytest.approx(5)]
+
+
+def test_max_wait(clock):
+    limiter = RateLimiter(max_wait=10)
+    limiter.update(URL, _response(429, Retry_After="60"))
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(URL)
+
+
+@pytest.mark.skipif(rate_limiter.fcntl is None, reason="fcntl is not available")
+def test_state_is_shared_through_files(clock, tmp_path):
+    RateLimiter(rate=1, state_dir=str(tmp_path)).acquire(URL)
+    RateLimiter(rate=1, state_dir=str(tmp_path)).acquire(URL)
+
+    assert clock.slept == [pytest.approx(1)]
+
+
+def test_rest_helper_applies_rate_limiter():
+    limiter = MagicMock()
+    helper = TARestHelper(rate_limiter=limiter)
+    helper.http_session = MagicMock()
+
+    response = helper.send_http_request(URL, "GET")
+
+    limiter.acquire.assert_called_once_with(URL)
+    limiter.update.assert_called_once_with(URL, response)
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from splunktaucclib.splunk_aoblib.rest_helper import TARestHelper
+
+
+@pytest.fixture
+def helper():
+    helper = TARestHelper(host_max_concurrency=2)
+    helper.http_session = MagicMock()
+    return helper
+
+
+def test_send_http_requests_in_completion_order(helper):
+    release = threading.Event()
+
+    def request(method, url, **kwargs):
+        if url.endswith("/slow"):
+            release.wait(5)
+        return url
+
+    helper.http_session.request.side_effect = request
+
+    results = helper.send_http_requests(
+        [
+            {"url": "https://a.test/slow", "method": "GET"},
+            {"url": "https://b.test/fast", "method": "GET"},
+        ]
+    )
+    first = next(results)
+    release.set()
+    rest = list(results)
+
+    assert [r.response for r in [first] + rest] == [
+        "https://b.test/fast",
+        "https://a.test/slow",
+    ]
+    assert all(r.error is None for r in [first] + rest)
+
+
+def test_send_http_requests_reports_errors(helper):
+    helper.http_session.request.side_effect = ConnectionError("refused")
+
+    (result,) = helper.send_http_requests([{"url": "https://a.test", "method": "GET"}])
+
+    assert result.request == {"url": "https://a.test", "method": "GET"}
+    assert result.response is None
+    assert isinstance(result.error, ConnectionError)
+
+
+def test_concurrency_is_limited_per_host(helper):
+    lock = threading.Lock()
+    running = {}
+    peak = {}
+
+    def request(method, url, **kwargs):
+        host = url.split("/")[2]
+        with lock:
+            running[host] = running.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), running[host])
+        threading.Event().wait(0.02)
+        with lock:
+            running[host] -= 1
+
+    helper.http_session.request.side_effect = request
+
+    list(
+        helper.send_http_requests(
+            [
+                {"url": f"https://{host}/{i}", "method": "GET"}
+                for i in range(6)
+                for host in ("a.test", "b.test")
+            ]
+        )
+    )
+
+    assert peak == {"a.test": 2, "b.test": 2}
+
+
+def test_busy_host_does_not_hold_pool_workers(helper):
+    release = threading.Event()
+
+    def request(method, url, **kwargs):
+        if "a.test" in url:
+            release.wait(5)
+        return url
+
+    helper.http_session.request.side_effect = request
+    helper.MAX_WORKERS = 4
+
+    results = helper.send_http_requests(
+        [{"url": f"https://a.test/{i}", "method": "GET"} for i in range(8)]
+        + [{"url": "https://b.test/", "method": "GET"}]
+    )
+    first = next(results)
+    release.set()
+
+    assert first.response == "https://b.test/"
+    assert len(list(results)) == 8
+
+
+def test_send_http_request_is_not_limited(helper):
+    barrier = threading.Barrier(3, timeout=5)
+    helper.http_session.request.side_effect = lambda *args, **kwargs: barrier.wait()
+    threads = [
+        threading.Thread(
+            target=helper.send_http_request, args=("https://a.test/", "GET")
+        )
+        for _ in range(3)
+    ]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not barrier.broken
+
+
+def test_send_http_requests_async(helper):
+    helper.http_session.request.side_effect = lambda method, url, **kwargs: url
+
+    async def collect():
+        response = await helper.send_http_request_async("https://a.test/1", "GET")
+        results = [
+            result.response
+            async for result in helper.send_http_requests_async(
+                [{"url": "https://a.test/2", "method": "GET"}], proxy_uri=None
+            )
+        ]
+        return [response] + results
+
+    assert asyncio.run(collect()) == ["https://a.test/1", "https://a.test/2"]
+
+
+def test_sessions_are_pooled_by_proxy_and_tls_settings():
+    helper = TARestHelper(pool_maxsize=4)
+
+    session = helper._get_session()
+    proxied = helper._get_session("http://proxy.test:3128")
+    unverified = helper._get_session(verify=False)
+
+    assert helper._get_session() is session
+    assert helper._get_session("http://proxy.test:3128") is proxied
+    assert len({id(session), id(proxied), id(unverified)}) == 3
+    assert helper._get_session(cert=["c.pem", "k.pem"]) is helper._get_session(
+        cert=("c.pem", "k.pem")
+    )
+    assert proxied.proxies["https"] == "http://proxy.test:3128"
+    assert unverified.verify is False
+    assert session.get_adapter("https://a.test/")._pool_maxsize == 4
+    helper.close()
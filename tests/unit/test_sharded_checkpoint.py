@@ -0,0 +1,103 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from solnlib.modular_input import checkpointer
+
+from splunktaucclib.modinput_wrapper.sharded_checkpoint import ShardedCheckpoint
+
+
+@pytest.fixture
+def ckpt(tmp_path):
+    return checkpointer.FileCheckpointer(str(tmp_path))
+
+
+def test_update_and_get(ckpt):
+    store = ShardedCheckpoint(ckpt, "devices", shards=4)
+
+    store.update("d1", {"last": 1})
+    store.batch_update({"d2": 2, "d3": [3]})
+
+    assert store.get("d1") == {"last": 1}
+    assert store.get("d2") == 2
+    assert store.get("missing", 0) == 0
+
+
+def test_flush_writes_only_dirty_shards(ckpt, tmp_path):
+    store = ShardedCheckpoint(ckpt, "devices", shards=8)
+    store.batch_update({f"d{i}": i for i in range(100)})
+    store.flush()
+    assert store.dirty == 0
+    assert len(list(tmp_path.iterdir())) == 8
+
+    spy = MagicMock(wraps=ckpt)
+    store = ShardedCheckpoint(spy, "devices", shards=8)
+    store.update("d1", "new")
+    store.flush()
+
+    (states,) = spy.batch_update.call_args[0]
+    assert len(states) == 1
+    assert ShardedCheckpoint(ckpt, "devices", shards=8).get("d1") == "new"
+    assert ShardedCheckpoint(ckpt, "devices", shards=8).get("d2") == 2
+
+
+def test_shards_are_compact(ckpt):
+    store = ShardedCheckpoint(ckpt, "devices", shards=1)
+    store.batch_update({f"device-{i}": {"last": 1700000000} for i in range(1000)})
+    store.flush()
+
+    state = ckpt.get("devices.shard0")
+    assert state["shards"] == 1
+    assert len(state["data"]) < 40000 / 4
+
+
+def test_delete(ckpt):
+    store = ShardedCheckpoint(ckpt, "devices", shards=4)
+    store.update("d1", 1)
+    store.flush()
+
+    store.delete("d1")
+    store.flush()
+
+    assert ShardedCheckpoint(ckpt, "devices", shards=4).get("d1") is None
+
+
+def test_scan_in_key_order(ckpt):
+    store = ShardedCheckpoint(ckpt, "devices", shards=4)
+    store.batch_update({"b1": 1, "a2": 2, "a1": 3, "c1": 4})
+    store.flush()
+    store = ShardedCheckpoint(ckpt, "devices", shards=4)
+
+    assert list(store.scan()) == [("a1", 3), ("a2", 2), ("b1", 1), ("c1", 4)]
+    assert list(store.scan(prefix="a")) == [("a1", 3), ("a2", 2)]
+    assert list(store.scan(start="a2", end="c1")) == [("a2", 2), ("b1", 1)]
+
+
+def test_shard_count_mismatch_raises(ckpt):
+    store = ShardedCheckpoint(ckpt, "devices", shards=4)
+    store.update("d1", 1)
+    store.flush()
+
+    with pytest.raises(ValueError):
+        list(ShardedCheckpoint(ckpt, "devices", shards=8).scan())
+
+
+def test_get_returns_copy(ckpt):
+    store = ShardedCheckpoint(ckpt, "devices", shards=4)
+    store.update("d1", {"last": 1})
+
+    store.get("d1")["last"] = 2
+
+    assert store.get("d1") == {"last": 1}
+
+
+def test_custom_codec(ckpt):
+    codec = MagicMock()
+    codec.encode.side_effect = json.dumps
+    codec.decode.side_effect = json.loads
+    store = ShardedCheckpoint(ckpt, "devices", shards=1, codec=codec)
+    store.update("d1", 1)
+    store.flush()
+
+    assert ckpt.get("devices.shard0")["data"] == '{"d1": 1}'
+    assert ShardedCheckpoint(ckpt, "devices", shards=1, codec=codec).get("d1") == 1
@@ -0,0 +1,119 @@
+import logging
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from splunktaucclib.modinput_wrapper.event_writer import (
+    EventWriterRevoked,
+    SynchronizedEventWriter,
+)
+from splunktaucclib.modinput_wrapper.stanza_executor import (
+    StanzaExecutor,
+    StanzaLogFilter,
+    current_stanza,
+)
+
+
+def test_run_isolates_failed_stanza():
+    def collect(name, ew):
+        if name == "bad":
+            raise ValueError("bad stanza")
+        ew.write_event(name)
+
+    ew = MagicMock()
+    results = StanzaExecutor(collect).run(["s1", "bad", "s2"], ew)
+
+    assert [(r.name, r.status) for r in results] == [
+        ("s1", StanzaExecutor.DONE),
+        ("bad", StanzaExecutor.FAILED),
+        ("s2", StanzaExecutor.DONE),
+    ]
+    assert isinstance(results[1].error, ValueError)
+    assert sorted(c.args[0] for c in ew.write_event.call_args_list) == ["s1", "s2"]
+
+
+def test_run_collects_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    results = StanzaExecutor(lambda name, ew: barrier.wait(), max_workers=3).run(
+        ["s1", "s2", "s3"], MagicMock()
+    )
+
+    assert all(r.status == StanzaExecutor.DONE for r in results)
+
+
+def test_slow_stanza_times_out_without_blocking_others():
+    release = threading.Event()
+
+    def collect(name, ew):
+        if name == "slow":
+            release.wait(5)
+
+    try:
+        results = StanzaExecutor(collect, max_workers=1, timeout=0.05).run(
+            ["slow", "s1", "s2"], MagicMock()
+        )
+    finally:
+        release.set()
+
+    assert [r.status for r in results] == [
+        StanzaExecutor.TIMEOUT,
+        StanzaExecutor.DONE,
+        StanzaExecutor.DONE,
+    ]
+
+
+def test_timed_out_stanza_cannot_write():
+    timed_out = threading.Event()
+    written = threading.Event()
+    errors = []
+
+    def collect(name, ew):
+        timed_out.wait(5)
+        try:
+            ew.write_event("late")
+        except EventWriterRevoked as e:
+            errors.append(e)
+        finally:
+            written.set()
+
+    ew = MagicMock()
+    results = StanzaExecutor(collect, timeout=0.05).run(["slow"], ew)
+    timed_out.set()
+
+    assert results[0].status == StanzaExecutor.TIMEOUT
+    assert written.wait(5)
+    assert len(errors) == 1
+    ew.write_event.assert_not_called()
+
+
+def test_event_writer_is_synchronized():
+    writers = []
+
+    StanzaExecutor(lambda name, ew: writers.append(ew)).run(["s1"], MagicMock())
+
+    assert isinstance(writers[0], SynchronizedEventWriter)
+
+
+def test_log_filter_adds_stanza():
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    handler.addFilter(StanzaLogFilter())
+    logger = logging.getLogger("test_stanza_executor")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    def collect(name, ew):
+        assert current_stanza() == name
+        logger.info("collected %s events", 3)
+
+    StanzaExecutor(collect).run(["s1"], MagicMock())
+    logger.info("outside")
+
+    assert [r.getMessage() for r in records] == [
+        "[stanza=s1] collected 3 events",
+        "outside",
+    ]
+    assert current_stanza() is None
@@ -0,0 +1,72 @@
+import io
+
+import pytest
+
+from splunktaucclib.common import xml_dom_parser
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:s="http://dev.splunk.com/ns/rest">
+  <title>passwords</title>
+  <entry>
+    <title>realm:acc1:</title>
+    <content type="text/xml">
+      <s:dict>
+        <s:key name="clear_password">secret</s:key>
+        <s:key name="eai:acl">
+          <s:dict>
+            <s:key name="app">Splunk_TA_test</s:key>
+          </s:dict>
+        </s:key>
+        <s:key name="eai:appName">Splunk_TA_test</s:key>
+        <s:key name="eai:attributes"><s:dict/></s:key>
+        <s:key name="realm">None</s:key>
+        <s:key name="scopes">
+          <s:list><s:item>a</s:item><s:item>b</s:item></s:list>
+        </s:key>
+      </s:dict>
+    </content>
+  </entry>
+  <entry>
+    <title>realm:acc2:</title>
+    <content type="text/xml"><s:dict/></content>
+  </entry>
+</feed>
+"""
+
+EXPECTED = [
+    {
+        "name": "realm:acc1:",
+        "stanza": "realm:acc1:",
+        "clear_password": "secret",
+        "eai:acl": {"app": "Splunk_TA_test"},
+        "appName": "Splunk_TA_test",
+        "realm": None,
+        "scopes": ["a", "b"],
+    },
+    {"name": "realm:acc2:", "stanza": "realm:acc2:"},
+]
+
+
+def test_parse_conf_xml_dom():
+    assert xml_dom_parser.parse_conf_xml_dom(FEED) == EXPECTED
+
+
+@pytest.mark.parametrize(
+    "source",
+    [FEED, FEED.encode("utf-8"), io.BytesIO(FEED.encode("utf-8"))],
+)
+def test_iter_conf_xml_dom(source):
+    assert list(xml_dom_parser.iter_conf_xml_dom(source)) == EXPECTED
+
+
+def test_iter_conf_xml_dom_is_lazy():
+    stanzas = xml_dom_parser.iter_conf_xml_dom(io.BytesIO(FEED.encode("utf-8")))
+
+    assert next(stanzas)["name"] == "realm:acc1:"
+
+
+def test_iter_conf_xml_dom_forbids_entities():
+    content = '<!DOCTYPE feed [<!ENTITY a "b">]><feed>&a;</feed>'
+
+    with pytest.raises(Exception):
+        list(xml_dom_parser.iter_conf_xml_dom(content))